@@ -0,0 +1,222 @@
+# -*- encoding: utf-8 -*-
+"""Memoization of read-mostly entity searches.
+
+Some entities practically never change during a test session (permissions,
+architectures, operating systems, partition tables...), but helpers search
+them again and again. Only such read-mostly entities should be registered, the
+entities the tests create and modify, organizations or products for example,
+are not cached. :func:`cached_search` keeps the search results of the
+registered entity classes for a time to live, after which the results are
+revalidated using a conditional GET (``If-None-Match`` /
+``If-Modified-Since``) when the server returned an ``ETag`` or a
+``Last-Modified`` header.
+
+The results are cached by server url and credentials, a user never gets the
+results searched by an other user.
+
+The cached results of an entity class are invalidated when an entity of that
+class is created, updated or deleted through NailGun, but NailGun signals are
+only emitted when the optional ``blinker`` package is installed: the helpers
+that modify a registered entity must call :func:`invalidate_lookups`.
+
+Usage::
+
+    from robottelo.api.lookup import cached_search
+
+    arch = cached_search(
+        entities.Architecture(),
+        query={'search': 'name="x86_64"'}
+    )[0]
+"""
+import copy
+import json
+import logging
+import threading
+import time
+
+from nailgun import client, entities, signals
+from nailgun.entity_mixins import EntitySearchMixin
+
+LOGGER = logging.getLogger(__name__)
+
+#: The entity classes cached by default and their time to live in seconds.
+DEFAULT_LOOKUP_TTLS = {
+    entities.Architecture: 3600,
+    entities.OperatingSystem: 600,
+    entities.PartitionTable: 600,
+    entities.Permission: 3600,
+}
+
+_NOT_MODIFIED = 304
+
+
+class _LookupEntry(object):
+    """A cached search result and its validators"""
+
+    def __init__(self, result, etag=None, last_modified=None):
+        self.result = result
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time()
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class LookupCache(object):
+    """Cache the ``search_json`` results of the registered entity classes.
+
+    :param ttls: a dict of entity classes and their time to live in seconds
+    """
+
+    def __init__(self, ttls=None):
+        self._lock = threading.Lock()
+        self._ttls = {}
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        for entity_cls, ttl in (ttls or {}).items():
+            self.register(entity_cls, ttl)
+
+    def register(self, entity_cls, ttl):
+        """Cache the searches of entity_cls for ttl seconds"""
+        self._ttls[entity_cls] = ttl
+        if not signals.SIGNALS_AVAILABLE:
+            return
+        for signal in (
+                signals.post_create, signals.post_update, signals.post_delete):
+            signal.connect(self._on_entity_changed, sender=entity_cls)
+
+    def is_registered(self, entity_cls):
+        return entity_cls in self._ttls
+
+    def _on_entity_changed(self, sender, **kwargs):
+        self.invalidate(sender)
+
+    def invalidate(self, entity_cls=None):
+        """Remove the cached searches of entity_cls, or all of them if
+        entity_cls is None
+        """
+        with self._lock:
+            if entity_cls is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries
+                        if key[0] == entity_cls.__name__]:
+                del self._entries[key]
+        LOGGER.debug('lookup cache invalidated for {0}'.format(entity_cls))
+
+    @staticmethod
+    def _get_key(entity, payload):
+        return (
+            type(entity).__name__,
+            entity._server_config.url,
+            # a server config has no auth attribute when created without one
+            json.dumps(
+                getattr(entity._server_config, 'auth', None), default=str),
+            json.dumps(payload, sort_keys=True, default=str),
+        )
+
+    def _fetch(self, entity, fields, query, entry=None):
+        """Send the search request, conditional if possible, and return the
+        new cache entry
+        """
+        if type(entity).search_raw is EntitySearchMixin.search_raw:
+            headers = entry.conditional_headers() if entry else {}
+            response = client.get(
+                entity.path('base'),
+                data=entity.search_payload(fields, query),
+                headers=headers,
+                **entity._server_config.get_client_kwargs()
+            )
+        else:
+            # can not add headers to a customized search request
+            response = entity.search_raw(fields, query)
+        if entry is not None and response.status_code == _NOT_MODIFIED:
+            self.revalidations += 1
+            entry.fetched_at = time.time()
+            return entry
+        response.raise_for_status()
+        return _LookupEntry(
+            response.json(),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+        )
+
+    def search_json(self, entity, fields=None, query=None):
+        """A cached replacement of ``entity.search_json``"""
+        ttl = self._ttls[type(entity)]
+        key = self._get_key(entity, entity.search_payload(fields, query))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.time() - entry.fetched_at < ttl:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = self._fetch(entity, fields, query, entry=entry)
+            with self._lock:
+                self._entries[key] = entry
+        # the caller may modify the results
+        return copy.deepcopy(entry.result)
+
+    def search(self, entity, fields=None, query=None, filters=None):
+        """Same as ``entity.search`` but use the cached search results if the
+        entity class is registered.
+        """
+        if not self.is_registered(type(entity)):
+            return entity.search(fields=fields, query=query, filters=filters)
+
+        def search_json(fields=None, query=None):
+            return self.search_json(entity, fields=fields, query=query)
+
+        if fields is None:
+            # resolve the default fields before adding the search_json
+            # attribute, as the default fields are the entity attributes
+            fields = set(entity.get_values().keys())
+        # let the entity build the results, as some entities customize it
+        entity.search_json = search_json
+        try:
+            return entity.search(fields=fields, query=query, filters=filters)
+        finally:
+            del entity.search_json
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'entries': len(self._entries),
+        }
+
+
+#: The lookup cache of the current process.
+lookup_cache = LookupCache(DEFAULT_LOOKUP_TTLS)
+
+
+def cached_search(entity, fields=None, query=None, filters=None):
+    """Search entities using the process lookup cache.
+
+    :param entity: a ``nailgun.entities`` instance, the search payload is
+        generated the same way as ``entity.search``
+    :param fields: the entity fields to search with
+    :param query: a dict containing a raw search query
+    :param filters: a dict used to filter the search results locally
+    :return: a list of new entities, all of type ``type(entity)``
+    """
+    return lookup_cache.search(
+        entity, fields=fields, query=query, filters=filters)
+
+
+def invalidate_lookups(entity_cls=None):
+    """Remove the cached searches of entity_cls from the process lookup cache,
+    or all of them if entity_cls is None. To be called when a registered
+    entity is created, updated or deleted, whether NailGun signals are
+    available or not.
+    """
+    lookup_cache.invalidate(entity_cls)
@@ -0,0 +1,262 @@
+# -*- encoding: utf-8 -*-
+"""Shared keep-alive HTTP session for all NailGun traffic.
+
+NailGun sends every request through the ``requests`` module level functions,
+which create a new session, and so a new TCP connection and TLS handshake, for
+each request. :func:`install_pooled_session` replaces the ``requests`` module
+used by ``nailgun.client`` with a :class:`PooledSession`, a thin proxy that
+sends the requests through a single ``requests.Session`` per process with a
+tuned connection pool, and records connection reuse and per endpoint latency.
+Only the kept alive connections save the handshakes: urllib3 does not resume
+the TLS session of a new connection.
+
+The pooled session is installed when the ``[http_client]`` ``pooled`` option is
+set, it is disabled by default.
+
+The session is shared by all the server configs and credentials of the
+process, it keeps no cookie: as with the ``requests`` module functions, each
+request is authenticated by its own ``auth`` only.
+
+Usage::
+
+    from robottelo.api.session import get_pooled_session
+
+    stats = get_pooled_session().get_stats()
+    stats['reuse_ratio']
+    stats['endpoints']['GET /katello/api/v2/repositories/:id']
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+from nailgun import client
+from requests.adapters import HTTPAdapter
+from six.moves.http_cookiejar import DefaultCookiePolicy
+from six.moves.urllib.parse import urlsplit
+
+LOGGER = logging.getLogger(__name__)
+
+#: The default number of connections kept alive per host.
+DEFAULT_POOL_SIZE = 10
+
+_POOLED_SESSION = None
+
+_ID_PATH_SEGMENT = re.compile(r'(?<=/)(\d+|[0-9a-f]{8}-[0-9a-f-]{27,})(?=/|$)')
+
+
+def get_endpoint_name(method, url):
+    """Return a name that group the requests sent to the same API endpoint,
+    the ids in the url path are replaced by ``:id``.
+
+        >>> get_endpoint_name('get', 'https://sat/api/v2/hosts/12/facts')
+        'GET /api/v2/hosts/:id/facts'
+    """
+    path = _ID_PATH_SEGMENT.sub(':id', urlsplit(url).path)
+    return '{0} {1}'.format(method.upper(), path)
+
+
+class RequestsStats(object):
+    """Thread safe aggregation of requests count and latency by endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def add(self, endpoint, duration):
+        """Record a request to endpoint that took duration seconds"""
+        with self._lock:
+            count, total, maximum = self._endpoints.get(endpoint, (0, 0.0, 0))
+            self._endpoints[endpoint] = (
+                count + 1, total + duration, max(maximum, duration))
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def as_dict(self):
+        """Return a dict with endpoint as keys and a dict with count, total,
+        average and max duration in seconds as values.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    'count': count,
+                    'total': total,
+                    'average': total / count,
+                    'max': maximum,
+                }
+                for endpoint, (count, total, maximum)
+                in self._endpoints.items()
+            }
+
+
+class PooledSession(object):
+    """A replacement of the ``requests`` module that send all the requests
+    through a ``requests.Session`` with keep-alive connections.
+
+    The session is recreated when used from a forked process, as connections
+    can not be shared between processes. The session cookie jar rejects all
+    the cookies, a session cookie set for a user would else be sent with the
+    requests of the other users.
+
+    :param pool_size: the number of connections kept alive per host, should be
+        at least the number of threads sending requests at the same time.
+    :param max_retries: the number of retries of failed connections.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=0):
+        self._pool_size = pool_size
+        self._max_retries = max_retries
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        self.stats = RequestsStats()
+
+    def __getattr__(self, name):
+        # any other attribute, exceptions for example, is the requests one
+        return getattr(requests, name)
+
+    @property
+    def session(self):
+        """Return the ``requests.Session`` of the current process"""
+        if self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session_pid != os.getpid():
+                    self._session = self._create_session()
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        # an empty allowed domains list blocks all the cookies
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=self._pool_size,
+            pool_maxsize=self._pool_size,
+            max_retries=self._max_retries,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _connection_pools(self):
+        if self._session is None or self._session_pid != os.getpid():
+            return []
+        pools = []
+        for adapter in self._session.adapters.values():
+            pools.extend(
+                adapter.poolmanager.pools[key]
+                for key in adapter.poolmanager.pools.keys()
+            )
+        return pools
+
+    def get_stats(self):
+        """Return the requests statistics of the current process.
+
+        :return: a dict with the number of ``requests``, the number of opened
+            ``connections``, the connection ``reuse_ratio`` and the latency
+            of each endpoint in ``endpoints``.
+        """
+        pools = self._connection_pools()
+        requests_count = sum(pool.num_requests for pool in pools)
+        connections_count = sum(pool.num_connections for pool in pools)
+        reuse_ratio = 0.0
+        if requests_count:
+            reuse_ratio = 1 - float(connections_count) / requests_count
+        return {
+            'requests': requests_count,
+            'connections': connections_count,
+            'reuse_ratio': reuse_ratio,
+            'endpoints': self.stats.as_dict(),
+        }
+
+    def request(self, method, url, **kwargs):
+        """Send the request through the pooled session"""
+        start = time.time()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            self.stats.add(
+                get_endpoint_name(method, url), time.time() - start)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('head', url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('get', url, params=params, **kwargs)
+
+    def options(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('options', url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request('post', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('put', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request('patch', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('delete', url, **kwargs)
+
+
+def install_pooled_session(pool_size=DEFAULT_POOL_SIZE, max_retries=0):
+    """Send all ``nailgun.client`` requests through a :class:`PooledSession`
+
+    :return: the installed :class:`PooledSession`
+    """
+    global _POOLED_SESSION
+    if _POOLED_SESSION is None:
+        _POOLED_SESSION = PooledSession(
+            pool_size=pool_size, max_retries=max_retries)
+        client.requests = _POOLED_SESSION
+        LOGGER.debug(
+            'nailgun requests pooled session installed, pool size: {0}'
+            .format(pool_size)
+        )
+    return _POOLED_SESSION
+
+
+def uninstall_pooled_session():
+    """Restore the ``requests`` module used by ``nailgun.client``"""
+    global _POOLED_SESSION
+    client.requests = requests
+    _POOLED_SESSION = None
+
+
+def get_pooled_session():
+    """Return the installed :class:`PooledSession` or ``None``"""
+    return _POOLED_SESSION
+
+
+def log_stats(log=None, top=10):
+    """Log the connection reuse ratio and the slowest endpoints of the
+    installed pooled session.
+
+    :param log: a callable that receive a message, defaults to debug logging
+    :param top: the number of endpoints to log, sorted by total time
+    """
+    if _POOLED_SESSION is None:
+        return
+    if log is None:
+        log = LOGGER.debug
+    stats = _POOLED_SESSION.get_stats()
+    log('nailgun requests: {0}, connections: {1}, reuse ratio: {2:.2%}'.format(
+        stats['requests'], stats['connections'], stats['reuse_ratio']))
+    endpoints = sorted(
+        stats['endpoints'].items(),
+        key=lambda item: item[1]['total'],
+        reverse=True
+    )
+    for endpoint, endpoint_stats in endpoints[:top]:
+        log('{0}: count {1} total {2:.3f}s average {3:.3f}s max {4:.3f}s'
+            .format(endpoint, endpoint_stats['count'],
+                    endpoint_stats['total'], endpoint_stats['average'],
+                    endpoint_stats['max']))
@@ -0,0 +1,238 @@
+# -*- encoding: utf-8 -*-
+"""Run long entity actions (sync, publish, promote, upload) concurrently.
+
+Nailgun waits for asynchronous foreman tasks using the module level
+``nailgun.entity_mixins.TASK_TIMEOUT`` and a timer that interrupts the main
+thread, which means that the timeout can not be changed per call without
+touching a global, and that a task can not be safely waited from a thread.
+
+This module triggers the entity action asynchronously (``synchronous=False``)
+and polls the returned task with its own deadline, so each call has its own
+timeout and several calls can be waited at the same time.
+
+Usage::
+
+    from robottelo.api.tasks import EntityTaskExecutor, wait_all
+
+    with EntityTaskExecutor(max_workers=4) as executor:
+        handles = [
+            executor.submit(repo.sync, timeout=3600) for repo in repos]
+        wait_all(handles)
+        cv.publish()
+
+    # or a single call in the current thread
+    run_entity_task(content_view.publish, timeout=1500)
+
+The code that calls the synchronous entity methods from other threads, the
+shared functions warmup for example, calls :func:`install_thread_safe_polling`
+first: the tasks waited by nailgun out of the main thread are then polled by
+:func:`poll_task`.
+"""
+import logging
+import threading
+import time
+
+from multiprocessing.pool import ThreadPool
+
+from nailgun import entities, entity_mixins
+
+LOGGER = logging.getLogger(__name__)
+
+#: The default number of threads used by :class:`EntityTaskExecutor`.
+DEFAULT_MAX_WORKERS = 4
+#: The default time in seconds to wait for a task to finish.
+DEFAULT_TASK_TIMEOUT = 300
+
+_TASK_FINISHED_STATES = ('paused', 'stopped')
+
+# the nailgun task polling function replaced by install_thread_safe_polling
+_nailgun_poll_task = None
+_install_lock = threading.Lock()
+
+
+def _get_task_id(response):
+    """Return the foreman task id from an asynchronous entity call response or
+    ``None`` if the response is not a task.
+    """
+    if isinstance(response, dict) and 'id' in response and (
+            'state' in response or 'label' in response):
+        return response['id']
+    return None
+
+
+def poll_task(task_id, timeout=DEFAULT_TASK_TIMEOUT, poll_rate=None,
+              server_config=None):
+    """Poll a foreman task until it finishes or ``timeout`` expires.
+
+    Unlike ``nailgun.entities.ForemanTask.poll`` this function does not use
+    any global timeout value nor interrupts the main thread, so it can be
+    called from any thread.
+
+    :param task_id: The foreman task id.
+    :param timeout: Maximum number of seconds to wait until timing out.
+    :param poll_rate: Delay between two task check-ups. Defaults to
+        ``nailgun.entity_mixins.TASK_POLL_RATE``.
+    :param server_config: A ``nailgun.config.ServerConfig`` object.
+    :returns: Information about the finished task.
+    :raises: ``nailgun.entity_mixins.TaskTimedOutError`` if the task did not
+        finish in time.
+    :raises: ``nailgun.entity_mixins.TaskFailedError`` if the task did not
+        succeed.
+    """
+    if poll_rate is None:
+        poll_rate = entity_mixins.TASK_POLL_RATE
+    task = entities.ForemanTask(server_config, id=task_id)
+    deadline = time.time() + timeout
+    while True:
+        task_info = task.read_json()
+        if task_info['state'] in _TASK_FINISHED_STATES:
+            break
+        if time.time() + poll_rate > deadline:
+            raise entity_mixins.TaskTimedOutError(
+                'Timed out polling task {0}. Task information: {1}'
+                .format(task_id, task_info)
+            )
+        time.sleep(poll_rate)
+
+    if task_info['result'] != 'success':
+        raise entity_mixins.TaskFailedError(
+            'Task {0} did not succeed. Task information: {1}'
+            .format(task_id, task_info)
+        )
+    return task_info
+
+
+def run_entity_task(entity_callable, timeout=DEFAULT_TASK_TIMEOUT,
+                    poll_rate=None, **kwargs):
+    """Call an entity method that may return a foreman task and wait for it
+    using a per call timeout.
+
+    :param entity_callable: the entity method object to call, the method must
+        accept the ``synchronous`` keyword argument, e.g.
+        ``entities.Repository(id=repo_id).sync``
+    :param timeout: the time to wait for the task to finish
+    :param poll_rate: delay between two task check-ups
+    :param kwargs: the kwargs to pass to the entity callable, with
+        ``synchronous=False`` the triggered task is not waited
+    :returns: the entity method result: the finished task information, as
+        returned by the synchronous entity method, or the server response if
+        the call did not trigger a task or is not synchronous
+    """
+    synchronous = kwargs.pop('synchronous', True)
+    response = entity_callable(synchronous=False, **kwargs)
+    task_id = _get_task_id(response)
+    if task_id is None or not synchronous:
+        return response
+    server_config = getattr(
+        getattr(entity_callable, '__self__', None), '_server_config', None)
+    LOGGER.debug(
+        'waiting for task {0} with timeout {1}'.format(task_id, timeout))
+    return poll_task(task_id, timeout=timeout, poll_rate=poll_rate,
+                     server_config=server_config)
+
+
+def _poll_task_out_of_main_thread(task_id, server_config, poll_rate=None,
+                                  timeout=None):
+    """Replace ``nailgun.entity_mixins._poll_task``, the tasks waited out of
+    the main thread are polled by :func:`poll_task` with the nailgun timeout
+    """
+    if isinstance(threading.current_thread(), threading._MainThread):
+        return _nailgun_poll_task(
+            task_id, server_config, poll_rate=poll_rate, timeout=timeout)
+    if timeout is None:
+        timeout = entity_mixins.TASK_TIMEOUT
+    return poll_task(task_id, timeout=timeout, poll_rate=poll_rate,
+                     server_config=server_config)
+
+
+def install_thread_safe_polling():
+    """Make the synchronous entity methods safe to call from any thread.
+
+    Nailgun waits the tasks with a timer that interrupts the main thread when
+    the timeout expires, even if the task is waited by an other thread. The
+    tasks waited by nailgun out of the main thread are polled by
+    :func:`poll_task` instead, the main thread keeps the nailgun polling.
+    """
+    global _nailgun_poll_task
+    with _install_lock:
+        if _nailgun_poll_task is not None:
+            return
+        _nailgun_poll_task = entity_mixins._poll_task
+        # nailgun.entities imports the function by name
+        entity_mixins._poll_task = _poll_task_out_of_main_thread
+        entities._poll_task = _poll_task_out_of_main_thread
+
+
+class EntityTaskExecutor(object):
+    """Thread pool that runs entity tasks concurrently, each with its own
+    timeout.
+
+    :param max_workers: the number of entity tasks that can be waited at the
+        same time.
+    :param poll_rate: delay between two task check-ups.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, poll_rate=None):
+        self._pool = ThreadPool(processes=max_workers)
+        self._poll_rate = poll_rate
+
+    def submit(self, entity_callable, timeout=DEFAULT_TASK_TIMEOUT, **kwargs):
+        """Run :func:`run_entity_task` in the pool.
+
+        :returns: a ``multiprocessing.pool.AsyncResult`` handle, use
+            :func:`wait_all` or ``handle.get()`` to get the task result.
+        """
+        kwargs.update(timeout=timeout, poll_rate=self._poll_rate)
+        return self._pool.apply_async(
+            run_entity_task, (entity_callable,), kwargs)
+
+    def map(self, entity_callables, timeout=DEFAULT_TASK_TIMEOUT):
+        """Submit all the entity callables and wait for all of them.
+
+        :returns: the list of results in the same order as entity_callables
+        """
+        return wait_all(
+            [self.submit(entity_callable, timeout=timeout)
+             for entity_callable in entity_callables]
+        )
+
+    def shutdown(self):
+        """Wait for the submitted tasks and release the pool threads."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.shutdown()
+        else:
+            self._pool.terminate()
+
+
+def wait_all(handles, timeout=None):
+    """Wait for all the handles returned by :meth:`EntityTaskExecutor.submit`
+
+    All the handles are waited even if some of them fail, the first error
+    found is then raised.
+
+    :param handles: a list of ``multiprocessing.pool.AsyncResult``
+    :param timeout: an optional maximum time in seconds to wait for each
+        handle, the task timeout is already enforced by the executor.
+    :returns: the list of results in the same order as handles
+    """
+    results = []
+    error = None
+    for handle in handles:
+        handle.wait(timeout)
+        try:
+            results.append(handle.get(0))
+        except Exception as err:
+            LOGGER.exception(err)
+            results.append(None)
+            if error is None:
+                error = err
+    if error is not None:
+        raise error
+    return results
@@ -2,10 +2,16 @@
 """Module containing convenience functions for working with the API."""
 import time
 
+from collections import Counter
+from multiprocessing.pool import ThreadPool
+
 from fauxfactory import gen_string
 from inflector import Inflector
-from nailgun import entities, entity_mixins
+from nailgun import entities
+from requests.exceptions import HTTPError
 from robottelo import ssh
+from robottelo.api.lookup import cached_search, invalidate_lookups
+from robottelo.api.tasks import run_entity_task, wait_all
 from robottelo.config import settings
 from robottelo.config.base import ImproperlyConfigured
 from robottelo.constants import (
@@ -18,25 +24,28 @@ from robottelo.constants import (
     RHEL_7_MAJOR_VERSION,
 )
 from robottelo.decorators import bz_bug_is_open
+from robottelo.decorators.func_shared import shared
 
 
 def call_entity_method_with_timeout(entity_callable, timeout=300, **kwargs):
     """Call Entity callable with a custom timeout
 
+        The global ``nailgun.entity_mixins.TASK_TIMEOUT`` is not modified, the
+        triggered task is polled with its own timeout by
+        :func:`robottelo.api.tasks.run_entity_task`, so this function is safe
+        to use from several threads at once.
+
         :param entity_callable, the entity method object to call
         :param timeout: the time to wait for the method call to finish
         :param kwargs: the kwargs to pass to the entity callable
+        :return: the entity callable result, the finished task information
+            for the methods that trigger a task
 
         Usage:
             call_entity_method_with_timeout(
                 entities.Repository(id=repo_id).sync, timeout=1500)
     """
-    original_task_timeout = entity_mixins.TASK_TIMEOUT
-    entity_mixins.TASK_TIMEOUT = timeout
-    try:
-        entity_callable(**kwargs)
-    finally:
-        entity_mixins.TASK_TIMEOUT = original_task_timeout
+    return run_entity_task(entity_callable, timeout=timeout, **kwargs)
 
 
 def enable_rhrepo_and_fetchid(basearch, org_id, product, repo,
@@ -222,30 +231,19 @@ def one_to_many_names(name):
     return set((name, name + '_ids', Inflector().pluralize(name)))
 
 
-def configure_provisioning(org=None, loc=None, compute=False, os=None):
-    """Create and configure org, loc, product, repo, cv, env. Update proxy,
-    domain, subnet, compute resource, provision templates and medium with
-    previously created entities and create a hostgroup using all mentioned
-    entities.
+#: The number of entity groups configured at the same time by
+#: :func:`configure_provisioning`.
+PROVISIONING_THREADS = 5
 
-    :param string org: Default Organization that should be used in both host
-        discovering and host provisioning procedures
-    :param string loc: Default Location that should be used in both host
-        discovering and host provisioning procedures
-    :param boolean compute: If False creates a default Libvirt compute resource
-    :param string os: Specify the os to be used while provisioning and to
-        associate related entities to the specified os.
-    :return: List of created entities that can be re-used further in
-        provisioning or validation procedure (e.g. hostgroup or domain)
+
+def _configure_provisioning_content(org):
+    """Create a life-cycle environment, a product and a repository for RHEL
+    contents, sync the repository and publish and promote a content view with
+    it.
+
+    :return: a tuple of the life-cycle environment, the repository and the
+        content view
     """
-    # Create new organization and location in case they were not passed
-    if org is None:
-        org = entities.Organization().create()
-    if loc is None:
-        loc = entities.Location(organization=[org]).create()
-    if settings.rhel7_os is None:
-        raise ImproperlyConfigured(
-            'settings file is not configured for rhel os')
     # Create a new Life-Cycle environment
     lc_env = entities.LifecycleEnvironment(organization=org).create()
     # Create a Product, Repository for custom RHEL6 contents
@@ -256,33 +254,43 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
     ).create()
 
     # Increased timeout value for repo sync and CV publishing and promotion
-    try:
-        old_task_timeout = entity_mixins.TASK_TIMEOUT
-        entity_mixins.TASK_TIMEOUT = 3600
-        repo.sync()
-        # Create, Publish and promote CV
-        content_view = entities.ContentView(organization=org).create()
-        content_view.repository = [repo]
-        content_view = content_view.update(['repository'])
-        content_view.publish()
-        content_view = content_view.read()
-        promote(content_view.version[0], lc_env.id)
-    finally:
-        entity_mixins.TASK_TIMEOUT = old_task_timeout
-    # Search for existing organization puppet environment, otherwise create a
-    # new one, associate organization and location where it is appropriate.
+    run_entity_task(repo.sync, timeout=3600)
+    # Create, Publish and promote CV
+    content_view = entities.ContentView(organization=org).create()
+    content_view.repository = [repo]
+    content_view = content_view.update(['repository'])
+    run_entity_task(content_view.publish, timeout=3600)
+    content_view = content_view.read()
+    run_entity_task(
+        content_view.version[0].promote,
+        timeout=3600,
+        data={u'environment_id': lc_env.id, u'force': False},
+    )
+    return lc_env, repo, content_view
+
+
+def _configure_provisioning_environment(org, loc):
+    """Search for existing organization puppet environment, otherwise create a
+    new one, associate organization and location where it is appropriate.
+    """
     environments = entities.Environment().search(
         query=dict(search='organization_id={0}'.format(org.id)))
     if len(environments) > 0:
         environment = environments[0].read()
         environment.location.append(loc)
-        environment = environment.update(['location'])
-    else:
-        environment = entities.Environment(
-            organization=[org],
-            location=[loc]
-        ).create()
+        return environment.update(['location'])
+    return entities.Environment(
+        organization=[org],
+        location=[loc]
+    ).create()
+
+
+def _configure_provisioning_network(org, loc):
+    """Associate the smart proxy, the domain and the subnet to org and loc,
+    the domain and the subnet are created if they do not exist.
 
+    :return: a tuple of the smart proxy, the domain and the subnet
+    """
     # Search for SmartProxy, and associate location
     proxy = entities.SmartProxy().search(
         query={
@@ -354,40 +362,48 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
             tftp=proxy,
             discovery=proxy
         ).create()
+    return proxy, domain, subnet
+
+
+def _configure_provisioning_compute_resource(org, loc):
+    """Search if Libvirt compute-resource already exists, if so, just update
+    its relevant fields otherwise, create new compute-resource with 'libvirt'
+    provider.
+    """
+    resource_url = u'qemu+ssh://root@{0}/system'.format(
+        settings.compute_resources.libvirt_hostname
+    )
+    comp_res = [
+        res for res in entities.LibvirtComputeResource().search()
+        if res.provider == 'Libvirt' and res.url == resource_url
+    ]
+    if len(comp_res) > 0:
+        computeresource = entities.LibvirtComputeResource(
+            id=comp_res[0].id).read()
+        computeresource.location.append(loc)
+        computeresource.organization.append(org)
+        return computeresource.update(['location', 'organization'])
+    # Create Libvirt compute-resource
+    return entities.LibvirtComputeResource(
+        provider=u'libvirt',
+        url=resource_url,
+        set_console_password=False,
+        display_type=u'VNC',
+        location=[loc.id],
+        organization=[org.id],
+    ).create()
 
-    # Search if Libvirt compute-resource already exists
-    # If so, just update its relevant fields otherwise,
-    # Create new compute-resource with 'libvirt' provider.
-    # compute boolean is added to not block existing test's that depend on
-    # Libvirt resource and use this same functionality to all CR's.
-    if compute is False:
-        resource_url = u'qemu+ssh://root@{0}/system'.format(
-            settings.compute_resources.libvirt_hostname
-        )
-        comp_res = [
-            res for res in entities.LibvirtComputeResource().search()
-            if res.provider == 'Libvirt' and res.url == resource_url
-        ]
-        if len(comp_res) > 0:
-            computeresource = entities.LibvirtComputeResource(
-                id=comp_res[0].id).read()
-            computeresource.location.append(loc)
-            computeresource.organization.append(org)
-            computeresource = computeresource.update([
-                'location', 'organization'])
-        else:
-            # Create Libvirt compute-resource
-            computeresource = entities.LibvirtComputeResource(
-                provider=u'libvirt',
-                url=resource_url,
-                set_console_password=False,
-                display_type=u'VNC',
-                location=[loc.id],
-                organization=[org.id],
-            ).create()
 
+def _configure_provisioning_os(org, loc, os=None):
+    """Associate the partition table and the provisioning templates to org and
+    loc and update the operating system with them and the architecture.
+
+    :return: a tuple of the architecture, the partition table and the
+        operating system
+    """
     # Get the Partition table ID
-    ptable = entities.PartitionTable().search(
+    ptable = cached_search(
+        entities.PartitionTable(),
         query={
             u'search': u'name="{0}"'.format(DEFAULT_PTABLE)
         }
@@ -395,15 +411,16 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
     ptable.location.append(loc)
     ptable.organization.append(org)
     ptable = ptable.update(['location', 'organization'])
+    invalidate_lookups(entities.PartitionTable)
 
     # Get the OS ID
     if os is None:
-        os = entities.OperatingSystem().search(query={
+        os = cached_search(entities.OperatingSystem(), query={
             u'search': u'name="RedHat" AND (major="{0}" OR major="{1}")'
             .format(RHEL_6_MAJOR_VERSION, RHEL_7_MAJOR_VERSION)
             })[0].read()
     else:
-        os = entities.OperatingSystem().search(query={
+        os = cached_search(entities.OperatingSystem(), query={
             u'search': u'family="Redhat" '
                        u'AND major="{0}" '
                        u'AND minor="{1}")'
@@ -444,7 +461,8 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
     )
 
     # Get the arch ID
-    arch = entities.Architecture().search(
+    arch = cached_search(
+        entities.Architecture(),
         query={
             u'search': u'name="{0}"'.format(DEFAULT_ARCHITECTURE)
         }
@@ -460,6 +478,36 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
         'config_template',
         'ptable',
     ])
+    invalidate_lookups(entities.OperatingSystem)
+    return arch, ptable, os
+
+
+def _create_provisioning_environment(org, loc, compute=False, os=None):
+    """Configure all the provisioning entities and create the hostgroup, the
+    independent entities are configured at the same time.
+
+    :return: a dict with the names and ids of the provisioning entities
+    """
+    pool = ThreadPool(PROVISIONING_THREADS)
+    try:
+        handles = [
+            pool.apply_async(_configure_provisioning_content, (org,)),
+            pool.apply_async(_configure_provisioning_environment, (org, loc)),
+            pool.apply_async(_configure_provisioning_network, (org, loc)),
+            pool.apply_async(_configure_provisioning_os, (org, loc, os)),
+        ]
+        # compute boolean is added to not block existing test's that depend
+        # on Libvirt resource and use this same functionality to all CR's.
+        if compute is False:
+            handles.append(pool.apply_async(
+                _configure_provisioning_compute_resource, (org, loc)))
+        results = wait_all(handles)
+    finally:
+        pool.terminate()
+    (lc_env, repo, content_view), environment, network, os_entities = (
+        results[:4])
+    proxy, domain, subnet = network
+    arch, ptable, os = os_entities
 
     # Create Hostgroup
     host_group = entities.HostGroup(
@@ -482,14 +530,217 @@ def configure_provisioning(org=None, loc=None, compute=False, os=None):
 
     return {
         'host_group': host_group.name,
+        'host_group_id': host_group.id,
         'domain': domain.name,
+        'domain_id': domain.id,
         'environment': environment.name,
+        'environment_id': environment.id,
         'ptable': ptable.name,
+        'ptable_id': ptable.id,
         'subnet': subnet.name,
-        'os': os.title
+        'subnet_id': subnet.id,
+        'os': os.title,
+        'os_id': os.id,
     }
 
 
+#: The entities of the provisioning environment that must still exist to reuse
+#: a stored environment.
+_PROVISIONING_ENTITIES = (
+    ('host_group_id', entities.HostGroup),
+    ('domain_id', entities.Domain),
+    ('environment_id', entities.Environment),
+    ('subnet_id', entities.Subnet),
+)
+
+
+def _provisioning_environment_exists(environment):
+    """Return whether the entities of a stored provisioning environment still
+    exist.
+    """
+    for key, entity_cls in _PROVISIONING_ENTITIES:
+        if environment.get(key) is None:
+            return False
+        try:
+            entity_cls(id=environment[key]).read_json()
+        except HTTPError:
+            return False
+    return True
+
+
+@shared(inject=True, injected_kw='_injected',
+        function_kw=['org_id', 'loc_id', 'compute', 'os_name'])
+def _shared_provisioning_environment(org_id=None, loc_id=None, compute=False,
+                                     os_name=None, _injected=False,
+                                     **environment):
+    """Share the provisioning environment of an organization and location
+    between processes, a stored environment is reused only if its entities
+    still exist, else it is forgotten and a new one is created and stored.
+    """
+    key_kwargs = dict(
+        org_id=org_id, loc_id=loc_id, compute=compute, os_name=os_name)
+    if _injected and not _provisioning_environment_exists(environment):
+        _shared_provisioning_environment.invalidate(**key_kwargs)
+        return _shared_provisioning_environment(**key_kwargs)
+    if not _injected:
+        environment = _create_provisioning_environment(
+            entities.Organization(id=org_id),
+            entities.Location(id=loc_id),
+            compute=compute,
+            os=os_name,
+        )
+    environment.update(key_kwargs)
+    return environment
+
+
+def configure_provisioning(org=None, loc=None, compute=False, os=None):
+    """Create and configure org, loc, product, repo, cv, env. Update proxy,
+    domain, subnet, compute resource, provision templates and medium with
+    previously created entities and create a hostgroup using all mentioned
+    entities.
+
+    The independent entities are configured at the same time and, when shared
+    functions are enabled, the result is shared per org, loc, compute and os:
+    later calls, from any process, return the stored environment as long as
+    its hostgroup, domain, environment and subnet still exist.
+
+    :param string org: Default Organization that should be used in both host
+        discovering and host provisioning procedures
+    :param string loc: Default Location that should be used in both host
+        discovering and host provisioning procedures
+    :param boolean compute: If False creates a default Libvirt compute resource
+    :param string os: Specify the os to be used while provisioning and to
+        associate related entities to the specified os.
+    :return: List of created entities that can be re-used further in
+        provisioning or validation procedure (e.g. hostgroup or domain)
+    """
+    # Create new organization and location in case they were not passed
+    if org is None:
+        org = entities.Organization().create()
+    if loc is None:
+        loc = entities.Location(organization=[org]).create()
+    if settings.rhel7_os is None:
+        raise ImproperlyConfigured(
+            'settings file is not configured for rhel os')
+    environment = _shared_provisioning_environment(
+        org_id=org.id, loc_id=loc.id, compute=compute, os_name=os)
+    return {
+        key: value for key, value in environment.items()
+        if key not in ('org_id', 'loc_id', 'compute', 'os_name')
+    }
+
+
+#: The number of permissions fetched per request by
+#: :func:`get_permissions_index`.
+PERMISSIONS_PAGE_SIZE = 1000
+#: The number of filters created at the same time by
+#: :func:`create_role_permissions`.
+FILTERS_CREATE_THREADS = 5
+
+
+def get_permissions_index():
+    """Fetch the whole permissions catalog and index it.
+
+    The catalog pages are searched through the lookup cache, which keeps them
+    per server url and credentials, see :mod:`robottelo.api.lookup`.
+
+    :return: A dict with ``(resource_type, name)`` keys and
+        ``nailgun.entities.Permission`` values, every permission is also
+        indexed with the ``(None, name)`` key when its name is unique.
+    """
+    permissions = []
+    page = 1
+    while True:
+        results = cached_search(
+            entities.Permission(),
+            query={'per_page': PERMISSIONS_PAGE_SIZE, 'page': page}
+        )
+        permissions.extend(results)
+        if len(results) < PERMISSIONS_PAGE_SIZE:
+            break
+        page += 1
+    index = {}
+    names_count = Counter(permission.name for permission in permissions)
+    for permission in permissions:
+        index[(permission.resource_type, permission.name)] = permission
+        if names_count[permission.name] == 1:
+            index.setdefault((None, permission.name), permission)
+    return index
+
+
+def _get_first_permission(index, name):
+    """Return the indexed permission of the lowest id named name, or None if
+    not found"""
+    permissions = [
+        permission for (_, permission_name), permission in index.items()
+        if permission_name == name
+    ]
+    if not permissions:
+        return None
+    return min(permissions, key=lambda permission: permission.id)
+
+
+def get_permissions_by_names(permissions_types_names, first_match=False):
+    """Return the permissions entities of the requested permissions names
+
+    :param permissions_types_names: a dict containing resource types and
+        permission names, ``None`` resource type matches any resource type if
+        the permission name is unique, see :func:`create_role_permissions`.
+    :param first_match: whether ``None`` resource type matches the first
+        permission of a name that is not unique
+    :return: a dict with the same resource types keys and a list of
+        ``nailgun.entities.Permission`` values
+    :raises: ``nailgun.entities.APIResponseError`` listing all the permissions
+        that were not found.
+    """
+    index = get_permissions_index()
+    permissions = {}
+    not_found = []
+    for resource_type, permissions_names in permissions_types_names.items():
+        if resource_type is not None and not permissions_names:
+            raise ValueError('resource type "{}" empty. You must select at'
+                             ' least one permission'.format(resource_type))
+        permissions[resource_type] = []
+        for name in permissions_names:
+            permission = index.get((resource_type, name))
+            if permission is None and first_match and resource_type is None:
+                permission = _get_first_permission(index, name)
+            if permission is None:
+                not_found.append((resource_type, name))
+            else:
+                permissions[resource_type].append(permission)
+    if not_found:
+        raise entities.APIResponseError(
+            'permissions not found (resource type, name): {}'.format(
+                ', '.join('({0}, "{1}")'.format(resource_type, name)
+                          for resource_type, name in not_found))
+        )
+    return permissions
+
+
+def create_filters(role, permissions_groups):
+    """Create concurrently a role filter for each permissions group
+
+    :param role: nailgun.entities.Role
+    :param permissions_groups: a list of lists of
+        ``nailgun.entities.Permission``
+    :return: the list of created ``nailgun.entities.Filter``
+    """
+    def create_filter(permissions):
+        return entities.Filter(
+            permission=permissions,
+            role=role,
+            search=None
+        ).create()
+
+    pool = ThreadPool(processes=FILTERS_CREATE_THREADS)
+    try:
+        return pool.map(create_filter, permissions_groups)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def get_role_by_bz(bz_id):
     """Create and configure custom role entity for the testing of specific bugs
      This function will read the dictionary of permissions and their associated
@@ -502,21 +753,28 @@ def get_role_by_bz(bz_id):
         will be fetched and filters will be created
      :return: A single role entity will be created from all the created filters
      """
-    role = entities.Role().create()
+    permissions_names = []
     for perms in PERMISSIONS_WITH_BZ.values():
         perms_with_bz = [x for x in perms if bz_id in x.get('bz', [])]
         if perms_with_bz:
-            permissions = [
-                entities.Permission(name=perm['name']).search()[0]
-                for perm in perms_with_bz
-                ]
-            entities.Filter(permission=permissions, role=role).create()
+            permissions_names.append([perm['name'] for perm in perms_with_bz])
+    # search the permissions by name, the first one when a name is not unique
+    permissions_groups = [
+        get_permissions_by_names({None: names}, first_match=True)[None]
+        for names in permissions_names
+    ]
+    role = entities.Role().create()
+    create_filters(role, permissions_groups)
     return role.read()
 
 
 def create_role_permissions(role, permissions_types_names):  # pragma: no cover
     """Create role permissions found in dict permissions_types_names.
 
+    All the permissions are looked up in the permissions catalog index before
+    creating any filter, an error listing all the unknown permissions is
+    raised if some are not found. The filters are then created concurrently.
+
     :param role: nailgun.entities.Role
     :param permissions_types_names: a dict containing resource types
         and permission names to add to the role, example usage.
@@ -536,62 +794,8 @@ def create_role_permissions(role, permissions_types_names):  # pragma: no cover
            role = entities.Role(name='example_role_name').create()
            create_role_permissions(role, permissions_types_names)
     """
-    for resource_type, permissions_name in permissions_types_names.items():
-        if resource_type is None:
-            permissions_entities = []
-            for name in permissions_name:
-                result = entities.Permission(name=name).search()
-                if not result:
-                    raise entities.APIResponseError(
-                        'permission "{}" not found'.format(name))
-                if len(result) > 1:
-                    raise entities.APIResponseError(
-                        'found more than one entity for permission'
-                        ' "{}"'.format(name)
-                    )
-                entity_permission = result[0]
-                if entity_permission.name != name:
-                    raise entities.APIResponseError(
-                        'the returned permission is different from the'
-                        ' requested one "{0} != {1}"'.format(
-                            entity_permission.name, name)
-                    )
-                permissions_entities.append(entity_permission)
-        else:
-            if not permissions_name:
-                raise ValueError('resource type "{}" empty. You must select at'
-                                 ' least one permission'.format(resource_type))
-
-            resource_type_permissions_entities = entities.Permission(
-                resource_type=resource_type).search()
-            if not resource_type_permissions_entities:
-                raise entities.APIResponseError(
-                    'resource type "{}" permissions not found'.format(
-                        resource_type)
-                )
-
-            permissions_entities = [
-                entity
-                for entity in resource_type_permissions_entities
-                if entity.name in permissions_name
-            ]
-            # ensure that all the requested permissions entities where
-            # retrieved
-            permissions_entities_names = {
-                entity.name for entity in permissions_entities
-            }
-            not_found_names = set(permissions_name).difference(
-                permissions_entities_names)
-            if not_found_names:
-                raise entities.APIResponseError(
-                    'permissions names entities not found'
-                    ' "{}"'.format(not_found_names)
-                )
-        entities.Filter(
-            permission=permissions_entities,
-            role=role,
-            search=None
-        ).create()
+    permissions = get_permissions_by_names(permissions_types_names)
+    create_filters(role, list(permissions.values()))
 
 
 def wait_for_tasks(search_query, search_rate=1, max_tries=10, poll_rate=None,
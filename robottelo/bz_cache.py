@@ -0,0 +1,245 @@
+# coding: utf-8
+"""Persistent cache of the Bugzilla lookups.
+
+At every pytest start the tests tree is parsed for the bug decorators and the
+data of the decorated bugs is fetched from Bugzilla, and the runtime
+``bz_bug_is_open`` checks fetch more bugs. The cache is a json file that
+keeps between the runs:
+
+    - the decorator locations of each parsed file, keyed by the file path and
+      invalidated by its modification time and size, only the modified files
+      are parsed again
+    - the data of the decorated bugs, fetched again, concurrently by chunks,
+      once older than the cache ttl
+    - the bugs fetched at runtime, loaded in the robozilla decorators cache at
+      session start and saved at session end
+
+In offline mode nothing is fetched, the cached bugs data is used whatever its
+age.
+
+Usage::
+
+    bz_cache = BugzillaCache('/var/tmp/robottelo_bugzilla_cache.json')
+    bugs = bz_cache.get_decorated_bugs('tests/foreman')
+    bz_cache.save()
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+
+from multiprocessing.pool import ThreadPool
+
+from robozilla.bz import BZReader
+from robozilla.filters import BZDecorator
+from robozilla.providers.fs import FilesProvider
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = 'robottelo_bugzilla_cache.json'
+DEFAULT_TTL = 3600
+DEFAULT_FETCH_THREADS = 4
+CHUNK_SIZE = 150
+
+
+def _chunks(items, size):
+    """Yield successive size-sized chunks of items"""
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def parse_file(file_path, filters=(BZDecorator,)):
+    """Return the list of the bug ids, line numbers and filter names found in
+    the file"""
+    locations = []
+    with open(file_path) as file_handler:
+        for line_number, line in enumerate(file_handler):
+            for filter_handler in filters:
+                bug_ids, _ = filter_handler.retrieve_warn(line)
+                for bug_id in bug_ids:
+                    locations.append(
+                        [bug_id, line_number, filter_handler.name])
+    return locations
+
+
+class BugzillaCache(object):
+    """On disk cache of the bug decorators locations and of the bugs data
+
+    :param file_path: the json cache file path
+    :param ttl: the seconds after which a cached bug data is fetched again
+    :param offline: never fetch, use the cached bugs data whatever its age
+    """
+
+    def __init__(self, file_path, ttl=DEFAULT_TTL, offline=False):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.offline = offline
+        content = self._read()
+        self.files = content['files']
+        self.bugs = content['bugs']
+        self.runtime_bugs = content['runtime_bugs']
+        self.parsed_files = 0
+        self.fetched_bugs = 0
+
+    def _read(self):
+        """Return the cache file content, empty if the file does not exist or
+        is not readable"""
+        content = dict(files={}, bugs={}, runtime_bugs={})
+        if not os.path.exists(self.file_path):
+            return content
+        try:
+            with open(self.file_path) as file_handler:
+                stored = json.load(file_handler)
+        except (IOError, ValueError) as err:
+            LOGGER.warning('not able to read bugzilla cache {0}: {1}'.format(
+                self.file_path, err))
+            return content
+        if stored.get('version') == CACHE_VERSION:
+            content.update(
+                (name, stored[name]) for name in content if name in stored)
+        return content
+
+    def is_fresh(self, entry):
+        """Return whether the cached bug entry does not need to be fetched"""
+        return self.offline or time.time() - entry['fetched'] < self.ttl
+
+    def get_locations(self, files_provider):
+        """Return the dict of bug ids and their files locations, only the
+        files modified since the last call are parsed
+
+        :param files_provider: the tests root path or a robozilla files
+            provider
+        """
+        if not hasattr(files_provider, 'get_files'):
+            files_provider = FilesProvider(files_provider)
+        files = {}
+        bug_objects = {}
+        for file_path in files_provider.get_files():
+            file_stat = os.stat(file_path)
+            entry = self.files.get(file_path)
+            if (entry is None or entry['mtime'] != file_stat.st_mtime or
+                    entry['size'] != file_stat.st_size):
+                entry = dict(
+                    mtime=file_stat.st_mtime,
+                    size=file_stat.st_size,
+                    bugs=parse_file(file_path),
+                )
+                self.parsed_files += 1
+            files[file_path] = entry
+            for bug_id, line_number, handler_name in entry['bugs']:
+                bug_object = bug_objects.get(bug_id)
+                if bug_object is None:
+                    bug_object = bug_objects[bug_id] = dict(
+                        bug_id=bug_id, files_data=[])
+                bug_object['files_data'].append(dict(
+                    file_path=file_path,
+                    line_number=line_number,
+                    handler_name=handler_name,
+                ))
+        # the removed files are forgotten
+        self.files = files
+        return bug_objects
+
+    def fetch(self, bug_ids, reader_options=None,
+              threads=DEFAULT_FETCH_THREADS):
+        """Fetch concurrently by chunks the data of the bug ids that are not
+        cached or are stale"""
+        stale_ids = [
+            bug_id for bug_id in bug_ids
+            if bug_id not in self.bugs or not self.is_fresh(self.bugs[bug_id])
+        ]
+        if self.offline or not stale_ids:
+            return
+
+        def fetch_chunk(chunk_ids):
+            # a reader by thread, the bugzilla connection is not thread safe
+            options = dict(reader_options or {})
+            options['credentials'] = dict(options.get('credentials') or {})
+            try:
+                return chunk_ids, BZReader(**options).get_bug_data_in_bulk(
+                    chunk_ids)
+            except Exception as err:
+                LOGGER.warning(
+                    'not able to fetch bugs {0}: {1}'.format(chunk_ids, err))
+                return chunk_ids, None
+
+        chunks = list(_chunks(stale_ids, CHUNK_SIZE))
+        pool = ThreadPool(processes=max(1, min(threads, len(chunks))))
+        try:
+            results = pool.map(fetch_chunk, chunks)
+        finally:
+            pool.close()
+            pool.join()
+        fetched = time.time()
+        for chunk_ids, chunk_data in results:
+            if chunk_data is None:
+                # keep the stale data, fetched again at next run
+                continue
+            for bug_id in chunk_ids:
+                # not returned bugs, private ones when not authenticated, are
+                # cached too to not fetch them at each run
+                self.bugs[bug_id] = dict(
+                    fetched=fetched, bug_data=chunk_data.get(bug_id))
+            self.fetched_bugs += len(chunk_ids)
+
+    def get_decorated_bugs(self, files_provider, reader_options=None,
+                           threads=DEFAULT_FETCH_THREADS):
+        """Return the decorated bugs like
+        :meth:`robozilla.parser.Parser.parse` does, from the cache as much as
+        possible"""
+        bug_objects = self.get_locations(files_provider)
+        self.fetch(list(bug_objects), reader_options=reader_options,
+                   threads=threads)
+        for bug_id, bug_object in bug_objects.items():
+            entry = self.bugs.get(bug_id)
+            if entry is not None and entry['bug_data'] is not None:
+                bug_object['bug_data'] = entry['bug_data']
+        return bug_objects
+
+    def load_runtime_bugs(self, runtime_cache):
+        """Load the fresh bugs fetched at runtime by a previous session in
+        the robozilla decorators cache
+
+        :param runtime_cache: the robozilla decorators bugs cache dict
+        """
+        for entry in self.runtime_bugs.values():
+            if self.is_fresh(entry) and entry['bug_id'] not in runtime_cache:
+                runtime_cache[entry['bug_id']] = entry['bug_data']
+
+    def update_runtime_bugs(self, runtime_cache):
+        """Record the bugs fetched at runtime in the robozilla decorators
+        cache"""
+        fetched = time.time()
+        for bug_id, bug_data in runtime_cache.items():
+            entry = self.runtime_bugs.get(str(bug_id))
+            if entry is None or entry['bug_data'] != bug_data:
+                self.runtime_bugs[str(bug_id)] = dict(
+                    bug_id=bug_id, fetched=fetched, bug_data=bug_data)
+
+    def save(self):
+        """Write the cache file, merged with the newer bugs entries written
+        meanwhile by other processes"""
+        stored = self._read()
+        for name in ('bugs', 'runtime_bugs'):
+            entries = getattr(self, name)
+            for key, entry in stored[name].items():
+                if key not in entries or (
+                        entries[key]['fetched'] < entry['fetched']):
+                    entries[key] = entry
+        content = dict(
+            version=CACHE_VERSION,
+            files=self.files,
+            bugs=self.bugs,
+            runtime_bugs=self.runtime_bugs,
+        )
+        dir_name = os.path.dirname(os.path.abspath(self.file_path))
+        try:
+            file_descriptor, temp_path = tempfile.mkstemp(dir=dir_name)
+            with os.fdopen(file_descriptor, 'w') as file_handler:
+                json.dump(content, file_handler, default=str)
+            os.rename(temp_path, self.file_path)
+        except (IOError, OSError) as err:
+            LOGGER.warning('not able to write bugzilla cache {0}: {1}'.format(
+                self.file_path, err))
@@ -3,9 +3,12 @@ import logging
 import os
 from collections import defaultdict
 
+from robottelo.bz_cache import CACHE_FILE_NAME, BugzillaCache
 from robottelo.config import settings
 from robottelo.config.base import get_project_root
-from robottelo.decorators import setting_is_set
+from robottelo.decorators import get_skip_reason, setting_is_set
+from robottelo.helpers import get_func_name
+from robozilla import decorators as robozilla_decorators
 from robozilla.filters import BZDecorator
 from robozilla.parser import Parser
 
@@ -40,12 +43,56 @@ def get_decorated_bugs():  # pragma: no cover
         bz_credentials = settings.bugzilla.get_credentials()
 
     bz_reader_options['credentials'] = bz_credentials
-    parser = Parser(BASE_PATH, filters=[BZDecorator],
-                    reader_options=bz_reader_options)
-    bugs = parser.parse()
+    bz_cache = get_bugzilla_cache()
+    if bz_cache is None:
+        parser = Parser(BASE_PATH, filters=[BZDecorator],
+                        reader_options=bz_reader_options)
+        return parser.parse()
+    bugs = bz_cache.get_decorated_bugs(
+        BASE_PATH,
+        reader_options=bz_reader_options,
+        threads=settings.bugzilla.fetch_threads
+    )
+    bz_cache.save()
+    LOGGER.debug(
+        'Bugzilla cache: parsed {0} files, fetched {1} bugs'.format(
+            bz_cache.parsed_files, bz_cache.fetched_bugs))
     return bugs
 
 
+def get_bugzilla_cache():
+    """Return the persistent Bugzilla lookups cache, or None when disabled
+    in settings"""
+    if not settings.configured:
+        settings.configure()
+    if not settings.bugzilla.cache:
+        return None
+    return BugzillaCache(
+        settings.bugzilla.cache_file or os.path.join(
+            settings.tmp_dir, CACHE_FILE_NAME),
+        ttl=settings.bugzilla.cache_ttl,
+        offline=settings.bugzilla.cache_offline
+    )
+
+
+def load_runtime_bugs():
+    """Load the bugs fetched at runtime by the previous sessions in the
+    ``bz_bug_is_open`` cache"""
+    bz_cache = get_bugzilla_cache()
+    if bz_cache is not None:
+        bz_cache.load_runtime_bugs(robozilla_decorators._bugzilla)
+
+
+def save_runtime_bugs():
+    """Save the bugs fetched at runtime by ``bz_bug_is_open``"""
+    if not robozilla_decorators._bugzilla:
+        return
+    bz_cache = get_bugzilla_cache()
+    if bz_cache is not None:
+        bz_cache.update_runtime_bugs(robozilla_decorators._bugzilla)
+        bz_cache.save()
+
+
 def get_deselect_bug_ids(bugs=None, log=None, lookup=None):  # pragma: no cover
     """returns the IDs of bugs to be deselected from test collection"""
 
@@ -97,3 +144,63 @@ def group_by_key(data):
     for k, v in data:
         res[k].append(v)
     return dict(res)
+
+
+def _get_bug_reason(bug_ids):
+    return 'BZ {0}'.format(', '.join(sorted(bug_ids)))
+
+
+def get_deselected_items(items, removal_ids=(), decorated_functions=(),
+                         unconfigured=False, log=None):
+    """Return the selected and the deselected test items, in a single pass
+    over the items.
+
+    :param items: the collected pytest items
+    :param removal_ids: the IDs of bugs whose tests are deselected
+    :param decorated_functions: a list of function names and bug IDs tuples
+    :param unconfigured: whether to deselect the tests that would skip because
+        of a not fully configured feature section or another project mode
+    :param log: a callable that receive a message, defaults to debug logging
+    :return: the tuple of selected and deselected items lists
+    """
+    if log is None:
+        log = log_debug
+    removal_ids = frozenset(removal_ids)
+    # the names of the functions decorated with bugs to remove and their
+    # deselection reason
+    removed_names = {}
+    for name, bug_ids in group_by_key(decorated_functions).items():
+        bug_ids = removal_ids.intersection(bug_ids)
+        if bug_ids:
+            removed_names[name] = _get_bug_reason(bug_ids)
+    # the deselection reason of each test class, or None
+    class_reasons = {}
+    selected = []
+    deselected = []
+    for item in items:
+        test_class = getattr(item, 'cls', None)
+        if test_class in class_reasons:
+            class_reason = class_reasons[test_class]
+        else:
+            class_reason = None
+            setup_class_method = getattr(test_class, 'setUpClass', None)
+            bug_ids = removal_ids.intersection(
+                getattr(setup_class_method, 'bugzilla_ids', ()))
+            if bug_ids:
+                class_reason = _get_bug_reason(bug_ids)
+            elif unconfigured:
+                class_reason = get_skip_reason(
+                    setup_class_method, getattr(test_class, 'setUp', None))
+            class_reasons[test_class] = class_reason
+        reason = class_reason
+        if reason is None and removed_names:
+            reason = removed_names.get(
+                get_func_name(item.function, test_item=item))
+        if reason is None and unconfigured:
+            reason = get_skip_reason(getattr(item, 'function', None))
+        if reason is None:
+            selected.append(item)
+        else:
+            deselected.append(item)
+            log('Deselected test {0}: {1}'.format(item.nodeid, reason))
+    return selected, deselected
@@ -0,0 +1,63 @@
+# coding: utf-8
+"""
+This module contains commands to maintain the shared functions storage
+
+Commands included:
+
+Cleanup
+-------
+
+Delete the expired shared functions values, the values that cannot be
+decoded and the locks abandoned by dead processes of the configured storage
+and the function locks::
+
+    $ manage shared cleanup
+
+Stop scanning after 60 seconds::
+
+    $ manage shared cleanup --time-budget 60
+
+Migrate
+-------
+
+Import the shared functions values of the file storage in the sqlite
+storage::
+
+    $ manage shared migrate --remove
+
+"""
+import click
+
+from robottelo.config import settings
+from robottelo.decorators.func_shared import sqlite_storage, storage_gc
+from robottelo.decorators.func_shared.file_storage import _get_root_dir
+
+
+@click.command()
+@click.option('--time-budget', required=False, default=None, type=int,
+              help='the maximum number of seconds to scan the storage')
+def cleanup(time_budget):
+    """Delete the expired values and the abandoned locks"""
+    settings.configure()
+    deleted = storage_gc.collect(time_budget=time_budget)
+    click.echo(
+        'deleted values: {values}, deleted locks: {locks}, deleted function '
+        'locks: {function_locks}'.format(**deleted)
+    )
+
+
+@click.command()
+@click.option('--database', required=False, default=None,
+              help='the sqlite database path, by default the configured one')
+@click.option('--root-dir', required=False, default=None,
+              help='the file storage directory, by default the configured one')
+@click.option('--remove', is_flag=True, default=False,
+              help='remove the imported files')
+def migrate(database, root_dir, remove):
+    """Import the file storage values in the sqlite storage"""
+    settings.configure()
+    if root_dir is None:
+        root_dir = _get_root_dir(create=False)
+    count = sqlite_storage.migrate_file_storage(
+        root_dir, database_path=database, remove=remove)
+    click.echo('imported values: {0}'.format(count))
@@ -4,12 +4,16 @@ import logging
 
 import os
 import sys
+import tempfile
+import time
 
 from functools import partial
 from logging import config
 from nailgun import entities, entity_mixins
 from nailgun.config import ServerConfig
+from robottelo.api.session import install_pooled_session
 from robottelo.config import casts
+from six.moves import cPickle as pickle
 from six.moves.urllib.parse import urlunsplit, urljoin
 from six.moves.configparser import (
     NoOptionError,
@@ -19,6 +23,14 @@ from six.moves.configparser import (
 
 LOGGER = logging.getLogger(__name__)
 SETTINGS_FILE_NAME = 'robottelo.properties'
+# the path of a settings snapshot written by :meth:`Settings.write_snapshot`
+SETTINGS_SNAPSHOT_ENV = 'ROBOTTELO_SETTINGS_SNAPSHOT'
+# read and validate the feature settings only when accessed
+SETTINGS_LAZY_ENV = 'ROBOTTELO_SETTINGS_LAZY'
+# the datapoint seed drawn once by the pytest master process when not set in
+# the settings file, inherited by the xdist workers
+DATAPOINT_SEED_ENV = 'ROBOTTELO_DATAPOINT_SEED'
+SETTINGS_SNAPSHOT_VERSION = 1
 
 
 class ImproperlyConfigured(Exception):
@@ -29,6 +41,16 @@ class ImproperlyConfigured(Exception):
     """
 
 
+class ImproperlyConfiguredFeature(ImproperlyConfigured, AttributeError):
+    """Indicates that a lazy feature settings failed its validation when
+    first accessed.
+
+    Raised by attribute access, it is an ``AttributeError`` as expected by
+    ``getattr`` with a default, ``hasattr`` and the attribute lookup
+    protocols.
+    """
+
+
 def get_project_root():
     """Return the path to the Robottelo project root directory.
 
@@ -55,12 +77,11 @@ class INIReader(object):
     def __init__(self, path):
         self.config_parser = ConfigParser()
         with open(path) as handler:
-            self.config_parser.readfp(handler)
             if sys.version_info[0] < 3:
-                # ConfigParser.readfp is deprecated on Python3, read_file
-                # replaces it
                 self.config_parser.readfp(handler)
             else:
+                # ConfigParser.readfp is deprecated on Python3, read_file
+                # replaces it
                 self.config_parser.read_file(handler)
 
     def get(self, section, option, default=None, cast=None):
@@ -127,6 +148,8 @@ class ServerSettings(FeatureSettings):
         super(ServerSettings, self).__init__(*args, **kwargs)
         self.admin_password = None
         self.admin_username = None
+        self.facts_cache = None
+        self.facts_cache_ttl = None
         self.hostname = None
         self.port = None
         self.scheme = None
@@ -140,6 +163,9 @@ class ServerSettings(FeatureSettings):
             'server', 'admin_password', 'changeme')
         self.admin_username = reader.get(
             'server', 'admin_username', 'admin')
+        self.facts_cache = reader.get('server', 'facts_cache', False, bool)
+        self.facts_cache_ttl = reader.get(
+            'server', 'facts_cache_ttl', 600, int)
         self.hostname = reader.get('server', 'hostname')
         self.port = reader.get('server', 'port', cast=int)
         self.scheme = reader.get('server', 'scheme', 'https')
@@ -226,6 +252,11 @@ class BugzillaSettings(FeatureSettings):
     """Bugzilla server settings definitions."""
     def __init__(self, *args, **kwargs):
         super(BugzillaSettings, self).__init__(*args, **kwargs)
+        self.cache = None
+        self.cache_file = None
+        self.cache_offline = None
+        self.cache_ttl = None
+        self.fetch_threads = None
         self.password = None
         self.username = None
         self.wontfix_lookup = None
@@ -237,6 +268,12 @@ class BugzillaSettings(FeatureSettings):
         self.username = get_bz('bz_username', None)
         self.wontfix_lookup = reader.get(
             'bugzilla', 'wontfix_lookup', True, bool)
+        self.cache = reader.get('bugzilla', 'cache', True, bool)
+        self.cache_file = get_bz('cache_file', None)
+        self.cache_offline = reader.get(
+            'bugzilla', 'cache_offline', False, bool)
+        self.cache_ttl = reader.get('bugzilla', 'cache_ttl', 3600, int)
+        self.fetch_threads = reader.get('bugzilla', 'fetch_threads', 4, int)
 
     def get_credentials(self):
         """Return credentials for interacting with a Bugzilla API.
@@ -862,6 +899,29 @@ class SSHClientSettings(FeatureSettings):
         return []
 
 
+class HTTPClientSettings(FeatureSettings):
+    """NailGun HTTP client settings definitions."""
+    def __init__(self, *args, **kwargs):
+        super(HTTPClientSettings, self).__init__(*args, **kwargs)
+        self.pooled = None
+        self.pool_size = None
+        self.max_retries = None
+
+    def read(self, reader):
+        """Read NailGun HTTP client settings."""
+        self.pooled = reader.get('http_client', 'pooled', False, bool)
+        self.pool_size = reader.get('http_client', 'pool_size', 10, int)
+        self.max_retries = reader.get('http_client', 'max_retries', 0, int)
+
+    def validate(self):
+        """Validate NailGun HTTP client settings."""
+        validation_errors = []
+        if self.pool_size < 1:
+            validation_errors.append(
+                '[http_client] pool_size must be greater than 0.')
+        return validation_errors
+
+
 class TransitionSettings(FeatureSettings):
     """Transition settings definitions."""
     def __init__(self, *args, **kwargs):
@@ -934,13 +994,22 @@ class SharedFunctionSettings(FeatureSettings):
         self.storage = None
         self.scope = None
         self.enabled = None
+        self.lock_storage = None
         self.lock_timeout = None
         self.share_timeout = None
         self.redis_host = None
         self.redis_port = None
         self.redis_db = None
         self.redis_password = None
+        self.redis_lock_lease = None
+        self.sqlite_path = None
+        self.sqlite_lock_lease = None
         self.call_retries = None
+        self.serializer = None
+        self.compression = None
+        self.compression_threshold = None
+        self.gc_on_start = None
+        self.gc_time_budget = None
 
     def read(self, reader):
         """Read shared settings."""
@@ -948,6 +1017,8 @@ class SharedFunctionSettings(FeatureSettings):
         self.scope = reader.get('shared_function', 'scope', None)
         self.enabled = reader.get(
             'shared_function', 'enabled', False, bool)
+        self.lock_storage = reader.get(
+            'shared_function', 'lock_storage', None)
         self.lock_timeout = reader.get(
             'shared_function', 'lock_timeout', 7200, int)
         self.share_timeout = reader.get(
@@ -960,25 +1031,73 @@ class SharedFunctionSettings(FeatureSettings):
             'shared_function', 'redis_db', 0, int)
         self.redis_password = reader.get(
             'shared_function', 'redis_password', None)
+        self.redis_lock_lease = reader.get(
+            'shared_function', 'redis_lock_lease', 60, int)
+        self.sqlite_path = reader.get(
+            'shared_function', 'sqlite_path', None)
+        self.sqlite_lock_lease = reader.get(
+            'shared_function', 'sqlite_lock_lease', 60, int)
         self.call_retries = reader.get(
             'shared_function', 'call_retries', 2, int)
+        self.serializer = reader.get(
+            'shared_function', 'serializer', 'json')
+        self.compression = reader.get(
+            'shared_function', 'compression', None)
+        self.compression_threshold = reader.get(
+            'shared_function', 'compression_threshold', 4096, int)
+        self.gc_on_start = reader.get(
+            'shared_function', 'gc_on_start', False, bool)
+        self.gc_time_budget = reader.get(
+            'shared_function', 'gc_time_budget', 10, int)
 
     def validate(self):
         """Validate the shared settings"""
         validation_errors = []
-        supported_storage_handlers = ['file', 'redis']
+        supported_storage_handlers = ['file', 'redis', 'sqlite']
         if self.storage not in supported_storage_handlers:
             validation_errors.append(
                 '[shared] storage must be one of {}'
                 .format(supported_storage_handlers)
             )
-        if self.storage == 'redis':
+        if self.lock_storage and (
+                self.lock_storage not in supported_storage_handlers):
+            validation_errors.append(
+                '[shared] lock_storage must be one of {}'
+                .format(supported_storage_handlers)
+            )
+        if 'redis' in (self.storage, self.lock_storage):
             try:
                 importlib.import_module('redis')
             except ImportError:
                 validation_errors.append(
                     '[shared] python redis package not installed')
 
+        supported_serializers = ['json', 'msgpack']
+        if self.serializer not in supported_serializers:
+            validation_errors.append(
+                '[shared] serializer must be one of {}'
+                .format(supported_serializers)
+            )
+        if self.serializer == 'msgpack':
+            try:
+                importlib.import_module('msgpack')
+            except ImportError:
+                validation_errors.append(
+                    '[shared] python msgpack package not installed')
+        supported_compressions = ['zlib', 'lz4']
+        if (self.compression is not None and
+                self.compression not in supported_compressions):
+            validation_errors.append(
+                '[shared] compression must be one of {}'
+                .format(supported_compressions)
+            )
+        if self.compression == 'lz4':
+            try:
+                importlib.import_module('lz4.frame')
+            except ImportError:
+                validation_errors.append(
+                    '[shared] python lz4 package not installed')
+
         if self.share_timeout > self.MAX_SHARE_TIMEOUT:
             validation_errors.append(
                 '[shared] share time out cannot be more than 86400'
@@ -994,9 +1113,19 @@ class Settings(object):
     def __init__(self):
         self._all_features = None
         self._configured = False
+        self._pending_features = {}
+        self._settings_path = None
         self._validation_errors = []
+        self.configure_time = None
         self.browser = None
         self.cdn = None
+        self.datapoint_budget = None
+        self.datapoint_cover = None
+        self.datapoint_pool = None
+        self.datapoint_seed = None
+        self.deselect_unconfigured = None
+        self.duration_scheduling = None
+        self.durations_file = None
         self.locale = None
         self.project = None
         self.reader = None
@@ -1030,6 +1159,7 @@ class Settings(object):
         self.ec2 = EC2Settings()
         self.fake_capsules = FakeCapsuleSettings()
         self.fake_manifest = FakeManifestSettings()
+        self.http_client = HTTPClientSettings()
         self.ldap = LDAPSettings()
         self.ipa = LDAPIPASettings()
         self.oscap = OscapSettings()
@@ -1044,9 +1174,34 @@ class Settings(object):
         self.upgrade = UpgradeSettings()
         self.vmware = VmWareSettings()
 
-    def configure(self):
+    def __getattr__(self, name):
+        """Read and validate the lazy feature settings when first accessed"""
+        pending_features = self.__dict__.get('_pending_features')
+        if not pending_features or name not in pending_features:
+            raise AttributeError(name)
+        feature_settings, load = pending_features[name]
+        validation_errors = load(feature_settings)
+        if validation_errors:
+            raise ImproperlyConfiguredFeature(
+                'Failed to validate the configuration, check the message(s):\n'
+                '{}'.format('\n'.join(validation_errors))
+            )
+        del pending_features[name]
+        setattr(self, name, feature_settings)
+        return feature_settings
+
+    def configure(self, settings_path=None, lazy=None):
         """Read the settings file and parse the configuration.
 
+        When the ``ROBOTTELO_SETTINGS_SNAPSHOT`` environment variable is the
+        path of a snapshot of the same settings file, the already validated
+        settings are loaded from it.
+
+        :param settings_path: the settings file path, by default
+            robottelo.properties in the project root
+        :param lazy: whether to read and validate the feature settings only
+            when accessed, by default the ``ROBOTTELO_SETTINGS_LAZY``
+            environment variable
         :raises: ImproperlyConfigured if any issue is found during the parsing
             or validation of the configuration.
         """
@@ -1054,29 +1209,24 @@ class Settings(object):
             # TODO: what to do here, raise and exception, just skip or ...?
             return
 
-        # Expect the settings file to be on the robottelo project root.
-        settings_path = os.path.join(get_project_root(), SETTINGS_FILE_NAME)
+        start = time.time()
+        if settings_path is None:
+            # Expect the settings file to be on the robottelo project root.
+            settings_path = os.path.join(
+                get_project_root(), SETTINGS_FILE_NAME)
         if not os.path.isfile(settings_path):
             raise ImproperlyConfigured(
                 'Not able to find settings file at {}'.format(settings_path))
-
-        self.reader = INIReader(settings_path)
-        self._read_robottelo_settings()
-        self._validation_errors.extend(
-            self._validate_robottelo_settings())
-
-        attrs = map(
-            lambda attr_name: (attr_name, getattr(self, attr_name)),
-            dir(self)
-        )
-        feature_settings = filter(
-            lambda tpl: isinstance(tpl[1], FeatureSettings),
-            attrs
-        )
-        for name, settings in feature_settings:
-            if self.reader.has_section(name) or name == 'server':
-                settings.read(self.reader)
-                self._validation_errors.extend(settings.validate())
+        if lazy is None:
+            lazy = os.environ.get(SETTINGS_LAZY_ENV, '').lower() in (
+                '1', 'true', 'yes')
+        self._settings_path = settings_path
+
+        snapshot = self._read_snapshot(settings_path)
+        if snapshot is not None:
+            self._load_snapshot(snapshot, lazy)
+        else:
+            self._read_settings_file(settings_path, lazy)
 
         if self._validation_errors:
             raise ImproperlyConfigured(
@@ -1088,6 +1238,123 @@ class Settings(object):
         self._configure_third_party_logging()
         self._configure_entities()
         self._configured = True
+        self.configure_time = time.time() - start
+
+    def _get_feature_settings(self):
+        """Return the list of the feature settings names and instances"""
+        return [
+            (name, value) for name, value in vars(self).items()
+            if isinstance(value, FeatureSettings)
+        ]
+
+    def _defer_feature(self, name, feature_settings, load):
+        """Remove the feature settings attribute, the feature settings is
+        loaded by load when first accessed"""
+        self._pending_features[name] = (feature_settings, load)
+        delattr(self, name)
+
+    def _read_feature(self, feature_settings):
+        feature_settings.read(self.reader)
+        return feature_settings.validate()
+
+    def _read_settings_file(self, settings_path, lazy):
+        """Read and validate the settings file"""
+        self.reader = INIReader(settings_path)
+        self._read_robottelo_settings()
+        self._validation_errors.extend(
+            self._validate_robottelo_settings())
+
+        for name, settings in self._get_feature_settings():
+            if not (self.reader.has_section(name) or name == 'server'):
+                continue
+            if lazy and name != 'server':
+                self._defer_feature(name, settings, self._read_feature)
+            else:
+                self._validation_errors.extend(self._read_feature(settings))
+
+    def _get_robottelo_settings(self):
+        """Return the dict of the general settings values"""
+        return {
+            name: value for name, value in vars(self).items()
+            if not name.startswith('_') and name not in (
+                'reader', 'configure_time') and
+            not isinstance(value, FeatureSettings)
+        }
+
+    def write_snapshot(self, path):
+        """Write the validated settings to a snapshot file.
+
+        The processes that have the ``ROBOTTELO_SETTINGS_SNAPSHOT``
+        environment variable set to path load the settings from the snapshot
+        instead of reading and validating the settings file, as long as the
+        settings file is not modified.
+        """
+        if not self.configured:
+            self.configure()
+        # the snapshot contains all the read feature settings
+        for name in list(self._pending_features):
+            getattr(self, name)
+        settings_stat = os.stat(self._settings_path)
+        snapshot = dict(
+            version=SETTINGS_SNAPSHOT_VERSION,
+            source=os.path.realpath(self._settings_path),
+            mtime=settings_stat.st_mtime,
+            size=settings_stat.st_size,
+            robottelo=self._get_robottelo_settings(),
+            features={
+                name: pickle.dumps(vars(settings), 2)
+                for name, settings in self._get_feature_settings()
+                if self.reader is None or name == 'server' or
+                self.reader.has_section(name)
+            },
+        )
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(file_descriptor, 'wb') as handler:
+            pickle.dump(snapshot, handler, 2)
+        os.rename(temp_path, path)
+
+    def _read_snapshot(self, settings_path):
+        """Return the snapshot of the settings file or None if there is no
+        snapshot or it is outdated"""
+        snapshot_path = os.environ.get(SETTINGS_SNAPSHOT_ENV)
+        if not snapshot_path:
+            return None
+        try:
+            with open(snapshot_path, 'rb') as handler:
+                snapshot = pickle.load(handler)
+            settings_stat = os.stat(settings_path)
+        except Exception as err:
+            LOGGER.warning(
+                'not able to read settings snapshot {0}: {1}'
+                .format(snapshot_path, err)
+            )
+            return None
+        if (snapshot.get('version') != SETTINGS_SNAPSHOT_VERSION or
+                snapshot['source'] != os.path.realpath(settings_path) or
+                snapshot['mtime'] != settings_stat.st_mtime or
+                snapshot['size'] != settings_stat.st_size):
+            LOGGER.warning(
+                'settings snapshot {0} is outdated'.format(snapshot_path))
+            return None
+        return snapshot
+
+    def _load_snapshot(self, snapshot, lazy):
+        """Load the already validated settings of the snapshot"""
+        for name, value in snapshot['robottelo'].items():
+            setattr(self, name, value)
+
+        def load(feature_settings, state):
+            vars(feature_settings).update(pickle.loads(state))
+            return []
+
+        for name, state in snapshot['features'].items():
+            settings = getattr(self, name)
+            if lazy and name != 'server':
+                self._defer_feature(
+                    name, settings, partial(load, state=state))
+            else:
+                load(settings, state)
 
     def _read_robottelo_settings(self):
         """Read Robottelo's general settings."""
@@ -1120,7 +1387,23 @@ class Settings(object):
         self.tmp_dir = self.reader.get('robottelo', 'tmp_dir', '/var/tmp')
         self.run_one_datapoint = self.reader.get(
             'robottelo', 'run_one_datapoint', False, bool)
+        self.datapoint_budget = self.reader.get(
+            'robottelo', 'datapoint_budget', 0, int)
+        self.datapoint_cover = self.reader.get(
+            'robottelo', 'datapoint_cover', False, bool)
+        self.datapoint_pool = self.reader.get(
+            'robottelo', 'datapoint_pool', False, bool)
+        self.datapoint_seed = self.reader.get(
+            'robottelo', 'datapoint_seed', None, int)
+        if self.datapoint_seed is None and os.environ.get(DATAPOINT_SEED_ENV):
+            self.datapoint_seed = int(os.environ[DATAPOINT_SEED_ENV])
         self.cleanup = self.reader.get('robottelo', 'cleanup', False, bool)
+        self.deselect_unconfigured = self.reader.get(
+            'robottelo', 'deselect_unconfigured', False, bool)
+        self.duration_scheduling = self.reader.get(
+            'robottelo', 'duration_scheduling', False, bool)
+        self.durations_file = self.reader.get(
+            'robottelo', 'durations_file', None)
         self.upstream = self.reader.get('robottelo', 'upstream', True, bool)
         self.verbosity = self.reader.get(
             'robottelo',
@@ -1183,9 +1466,8 @@ class Settings(object):
         """List all expected feature settings sections."""
         if self._all_features is None:
             self._all_features = [
-                name for name, value in vars(self).items()
-                if isinstance(value, FeatureSettings)
-            ]
+                name for name, _ in self._get_feature_settings()
+            ] + list(self._pending_features)
         return self._all_features
 
     def _configure_entities(self):
@@ -1200,6 +1482,8 @@ class Settings(object):
         returned by :meth:`robottelo.helpers.get_nailgun_config`. See
         ``robottelo.entity_mixins.Entity`` for more information on the effects
         of this.
+        * Send all NailGun requests through a shared keep-alive session if
+        ``http_client.pooled`` is set, see :mod:`robottelo.api.session`.
         * Set a default value for ``nailgun.entities.GPGKey.content``.
         * Set the default value for
           ``nailgun.entities.DockerComputeResource.url``
@@ -1212,6 +1496,11 @@ class Settings(object):
             self.server.get_credentials(),
             verify=False,
         )
+        if self.http_client.pooled:
+            install_pooled_session(
+                pool_size=self.http_client.pool_size,
+                max_retries=self.http_client.max_retries,
+            )
 
         gpgkey_init = entities.GPGKey.__init__
 
@@ -1,26 +1,275 @@
 # -*- encoding: utf-8 -*-
 """Data Factory for all entities"""
+import itertools
+import logging
 import random
 import string
+from collections import OrderedDict
 from functools import wraps
 
-from fauxfactory import gen_string, gen_integer, gen_alpha
+import six
+from fauxfactory import gen_alpha
 from six.moves.urllib.parse import quote_plus
 
 from robottelo.config import settings
 from robottelo.constants import STRING_TYPES
+from robottelo.datapool import (
+    choice,
+    fixed_pool,
+    gen_integer,
+    gen_string,
+    randint,
+)
 from robottelo.decorators import bz_bug_is_open
 
 
+LOGGER = logging.getLogger(__name__)
+
+# the lower bounds of the datapoints length classes, the edge lengths of the
+# entities attributes
+DATAPOINT_LENGTH_CLASSES = (
+    (0, 'empty'),
+    (1, 'single'),
+    (2, 'short'),
+    (10, 'medium'),
+    (85, 'long'),
+    (255, 'max'),
+)
+
+# the datapoints selection coverage of the datafactory functions
+_datapoint_coverage = OrderedDict()
+
+# the datapoints features of the datafactory functions by arguments
+_generator_features = {}
+
+
 class InvalidArgumentError(Exception):
     """Indicates an error when an invalid argument is received."""
 
 
+def get_datapoint_type(value):
+    """Return the string type of a datapoint, one of the
+    :data:`robottelo.constants.STRING_TYPES`, ``empty`` or ``whitespace``, or
+    the type name of the non string values"""
+    if not isinstance(value, six.string_types):
+        return type(value).__name__
+    if not value:
+        return 'empty'
+    if not value.strip():
+        return 'whitespace'
+    if '<' in value and '>' in value:
+        return 'html'
+    if all(ord(char) < 128 for char in value):
+        if value.isdigit():
+            return 'numeric'
+        if value.isalpha():
+            return 'alpha'
+        if value.isalnum():
+            return 'alphanumeric'
+        return 'ascii'
+    if any(u'\u4e00' <= char <= u'\u9fff' for char in value):
+        return 'cjk'
+    if all(ord(char) < 256 for char in value):
+        return 'latin1'
+    return 'utf8'
+
+
+def get_datapoint_length_class(value):
+    """Return the length class of a datapoint, None for the values without
+    length"""
+    try:
+        length = len(value)
+    except TypeError:
+        return None
+    return [name for bound, name in DATAPOINT_LENGTH_CLASSES
+            if length >= bound][-1]
+
+
+def get_datapoint_features(value):
+    """Return the set of the features of a datapoint: its string type and its
+    length class"""
+    return {
+        ('type', get_datapoint_type(value)),
+        ('length', get_datapoint_length_class(value)),
+    }
+
+
+def get_generator_features(func, args=(), kwargs=None):
+    """Return the features of each datapoint generated by a datafactory
+    function for the arguments.
+
+    The features are computed once, from the values generated in a
+    :func:`robottelo.datapool.fixed_pool`: they depend on the function and
+    its arguments only, the same in all the processes, whatever the random
+    values of the run.
+    """
+    kwargs = kwargs or {}
+    key = (func.__name__, repr(args), repr(sorted(kwargs.items())))
+    if key not in _generator_features:
+        with fixed_pool(key[0]):
+            _generator_features[key] = [
+                get_datapoint_features(value)
+                for value in func(*args, **kwargs)
+            ]
+    return _generator_features[key]
+
+
+def _record_coverage(name, selected, total, covered, features):
+    entry = _datapoint_coverage.setdefault(name, [0, 0, 0, 0, 0])
+    for index, value in enumerate(
+            (1, selected, total, covered, features)):
+        entry[index] += value
+
+
+def get_datapoint_coverage():
+    """Return the datapoints selection coverage of the datafactory functions,
+    a list of dicts sorted by name"""
+    return [
+        dict(name=name, calls=calls, selected=selected, total=total,
+             covered=covered, features=features)
+        for name, (calls, selected, total, covered, features)
+        in sorted(_datapoint_coverage.items())
+    ]
+
+
+def log_datapoint_coverage(log=None):
+    """Log the datapoints selection coverage of each datafactory function
+
+    :param log: a callable that receive a message, defaults to info logging
+    """
+    if log is None:
+        log = LOGGER.info
+    for entry in get_datapoint_coverage():
+        log('{name}: {selected}/{total} datapoints, {covered}/{features} '
+            'features covered'.format(**entry))
+
+
+def _get_random(seed, name):
+    """Return the random generator of a selection, each function has its own
+    sequence for a seed"""
+    return random.Random('{0}:{1}'.format(seed, name))
+
+
+def select_datapoints(dataset, budget=0, cover=False, seed=0, name=None,
+                      features=None):
+    """Select a subset of the datapoints covering all their string types and
+    length classes.
+
+    The datapoints covering the most features not covered yet are selected
+    first (greedy set cover), the ties broken by the seeded random order, the
+    other datapoints follow in the seeded random order. The selection keeps
+    the dataset order.
+
+    :param list dataset: the datapoints
+    :param int budget: the maximum number of datapoints, 0 for no limit
+    :param bool cover: select only the smallest covering subset
+    :param seed: the selection seed, the same seed selects the same indexes
+    :param str name: the dataset name, for the random sequence and the
+        coverage report
+    :param list features: the features of each datapoint, by default
+        computed from the datapoints values
+    :return: the list of the selected datapoints
+    """
+    indexes = list(range(len(dataset)))
+    _get_random(seed, name).shuffle(indexes)
+    if features is None:
+        features = [get_datapoint_features(value) for value in dataset]
+    all_features = set().union(*features)
+    uncovered = set(all_features)
+    selected = []
+    while uncovered and indexes:
+        best = max(indexes, key=lambda index: len(features[index] & uncovered))
+        indexes.remove(best)
+        selected.append(best)
+        uncovered -= features[best]
+    if not cover:
+        selected.extend(indexes)
+    if budget:
+        selected = selected[:budget]
+    selected.sort()
+    if name is not None:
+        _record_coverage(
+            name, len(selected), len(dataset),
+            len(set().union(*(features[index] for index in selected))),
+            len(all_features)
+        )
+    return [dataset[index] for index in selected]
+
+
+def pairwise_datapoints(*factors, **kwargs):
+    """Return the combinations of the datapoints lists covering every pair of
+    values of two lists, instead of their full product.
+
+    Usage::
+
+        for name, value, interface in pairwise_datapoints(
+                valid_data_list(), invalid_values_list(), ['api', 'cli']):
+            ...
+
+    :param factors: the datapoints lists
+    :param seed: the combinations seed, defaults to the settings seed
+    :param str name: the name of the coverage report entry
+    :return: a list of tuples, one value of each list
+    """
+    seed = kwargs.get('seed', settings.datapoint_seed)
+    name = kwargs.get('name')
+    rand = _get_random(seed, name)
+    sizes = [len(factor) for factor in factors]
+    if len(factors) < 2 or not all(sizes):
+        return list(itertools.product(*factors))
+
+    def row_pairs(row):
+        return {
+            (first, row[first], second, row[second])
+            for first, second in itertools.combinations(range(len(row)), 2)
+            if row[first] is not None and row[second] is not None
+        }
+
+    uncovered = {
+        (first, first_value, second, second_value)
+        for first, second in itertools.combinations(range(len(factors)), 2)
+        for first_value in range(sizes[first])
+        for second_value in range(sizes[second])
+    }
+    total = len(uncovered)
+    rows = []
+    while uncovered:
+        first, first_value, second, second_value = min(uncovered)
+        row = [None] * len(factors)
+        row[first] = first_value
+        row[second] = second_value
+        others = [index for index in range(len(factors))
+                  if row[index] is None]
+        rand.shuffle(others)
+        for factor_index in others:
+            values = list(range(sizes[factor_index]))
+            rand.shuffle(values)
+
+            def gain(value):
+                row[factor_index] = value
+                return len(row_pairs(row) & uncovered)
+            row[factor_index] = max(values, key=gain)
+        rows.append(row)
+        uncovered -= row_pairs(row)
+    if name is not None:
+        _record_coverage(
+            name, len(rows), six.moves.reduce(lambda x, y: x * y, sizes),
+            total, total)
+    return [
+        tuple(factor[value] for factor, value in zip(factors, row))
+        for row in rows
+    ]
+
+
 def filtered_datapoint(func):
     """Overrides the data creator functions in this class to return 1 value
 
     If run_one_datapoint=false, return the entire data set. (default: False)
     If run_one_datapoint=true, return a random data.
+    If datapoint_budget or datapoint_cover is set, return the datapoints
+    selected by :func:`select_datapoints` from the function features, see
+    :func:`get_generator_features`: the same indexes are selected in all the
+    processes for a seed.
 
     """
     @wraps(func)
@@ -28,7 +277,20 @@ def filtered_datapoint(func):
         """Perform smoke test attribute check"""
         dataset = func(*args, **kwargs)
         if settings.run_one_datapoint:
-            dataset = [random.choice(dataset)]
+            dataset = [choice(dataset)]
+        elif settings.datapoint_budget or settings.datapoint_cover:
+            features = get_generator_features(func, args, kwargs)
+            if len(features) != len(dataset):
+                # the function generates a variable number of datapoints
+                features = None
+            dataset = select_datapoints(
+                dataset,
+                budget=settings.datapoint_budget,
+                cover=settings.datapoint_cover,
+                seed=settings.datapoint_seed,
+                name=func.__name__,
+                features=features
+            )
         return dataset
     return func_wrapper
 
@@ -79,7 +341,7 @@ def add_uppercase_char_into_string(text=None, length=10):
     if text is None:
         text = gen_string('alpha', length)
     st_chars = list(text)
-    st_chars[random.randint(0, len(st_chars)-1)] = random.choice(
+    st_chars[randint(0, len(st_chars)-1)] = choice(
         string.ascii_uppercase)
     return ''.join(st_chars)
 
@@ -135,6 +397,9 @@ def xdist_adapter(argvalues):
     Since every run has the same number of values, ids is going to be the same
     on different workers.
 
+    Not needed when the ``[robottelo]`` ``datapoint_pool`` option is set, the
+    values are the same on all the workers, see :mod:`robottelo.datapool`.
+
         :Ex:
 
         dct = xdist_adapter(invalid_boolean_strings())
@@ -212,28 +477,28 @@ def valid_data_list():
 
     """
     return [
-        gen_string('alphanumeric', random.randint(1, 255)),
-        gen_string('alpha', random.randint(1, 255)),
-        gen_string('cjk', random.randint(1, 85)),
-        gen_string('latin1', random.randint(1, 255)),
-        gen_string('numeric', random.randint(1, 255)),
-        gen_string('utf8', random.randint(1, 85)),
-        gen_string('html', random.randint(1, 85)),
+        gen_string('alphanumeric', randint(1, 255)),
+        gen_string('alpha', randint(1, 255)),
+        gen_string('cjk', randint(1, 85)),
+        gen_string('latin1', randint(1, 255)),
+        gen_string('numeric', randint(1, 255)),
+        gen_string('utf8', randint(1, 85)),
+        gen_string('html', randint(1, 85)),
     ]
 
 
 @filtered_datapoint
 def valid_docker_repository_names():
     """Generates a list of valid names for Docker repository."""
-    names = [gen_string('alphanumeric', random.randint(1, 255)),
-             gen_string('alpha', random.randint(1, 255)),
-             gen_string('cjk', random.randint(1, 85)),
-             gen_string('latin1', random.randint(1, 255)),
-             gen_string('numeric', random.randint(1, 255)),
-             gen_string('utf8', random.randint(1, 85)),
+    names = [gen_string('alphanumeric', randint(1, 255)),
+             gen_string('alpha', randint(1, 255)),
+             gen_string('cjk', randint(1, 85)),
+             gen_string('latin1', randint(1, 255)),
+             gen_string('numeric', randint(1, 255)),
+             gen_string('utf8', randint(1, 85)),
              ]
     if not bz_bug_is_open(1483622):
-        names.append(gen_string('html', random.randint(1, 85)))
+        names.append(gen_string('html', randint(1, 85)))
     return names
 
 
@@ -284,11 +549,11 @@ def valid_hosts_list(domain_length=10):
     """
     return [
         gen_string(
-            'alphanumeric', random.randint(1, (255 - 6 - domain_length))
+            'alphanumeric', randint(1, (255 - 6 - domain_length))
         ).lower(),
         gen_string(
-            'alpha', random.randint(1, (255 - 6 - domain_length))).lower(),
-        gen_string('numeric', random.randint(1, (255 - 6 - domain_length))),
+            'alpha', randint(1, (255 - 6 - domain_length))).lower(),
+        gen_string('numeric', randint(1, (255 - 6 - domain_length))),
     ]
 
 
@@ -304,13 +569,13 @@ def valid_hostgroups_list():
     :return: Returns the valid host group names list
     """
     return [
-        gen_string('alphanumeric', random.randint(1, 245)),
-        gen_string('alpha', random.randint(1, 245)),
-        gen_string('cjk', random.randint(1, 245)),
-        gen_string('latin1', random.randint(1, 245)),
-        gen_string('numeric', random.randint(1, 245)),
-        gen_string('utf8', random.randint(1, 245)),
-        gen_string('html', random.randint(1, 220)),
+        gen_string('alphanumeric', randint(1, 245)),
+        gen_string('alpha', randint(1, 245)),
+        gen_string('cjk', randint(1, 245)),
+        gen_string('latin1', randint(1, 245)),
+        gen_string('numeric', randint(1, 245)),
+        gen_string('utf8', randint(1, 245)),
+        gen_string('html', randint(1, 220)),
     ]
 
 
@@ -318,8 +583,8 @@ def valid_hostgroups_list():
 def valid_labels_list():
     """Generates a list of valid labels."""
     return [
-        gen_string('alphanumeric', random.randint(1, 128)),
-        gen_string('alpha', random.randint(1, 128)),
+        gen_string('alphanumeric', randint(1, 128)),
+        gen_string('alpha', randint(1, 128)),
     ]
 
 
@@ -357,13 +622,13 @@ def valid_org_names_list():
     :return: Returns the valid organization names list
     """
     return [
-        gen_string('alphanumeric', random.randint(1, 242)),
-        gen_string('alpha', random.randint(1, 242)),
-        gen_string('cjk', random.randint(1, 242)),
-        gen_string('latin1', random.randint(1, 242)),
-        gen_string('numeric', random.randint(1, 242)),
-        gen_string('utf8', random.randint(1, 80)),
-        gen_string('html', random.randint(1, 217)),
+        gen_string('alphanumeric', randint(1, 242)),
+        gen_string('alpha', randint(1, 242)),
+        gen_string('cjk', randint(1, 242)),
+        gen_string('latin1', randint(1, 242)),
+        gen_string('numeric', randint(1, 242)),
+        gen_string('utf8', randint(1, 80)),
+        gen_string('html', randint(1, 217)),
     ]
 
 
@@ -381,9 +646,9 @@ def valid_usernames_list():
 def valid_interfaces_list():
     """Generates a list of valid host interface names."""
     return [
-        gen_string('alpha', random.randint(1, 255)).lower(),
-        gen_string('alphanumeric', random.randint(1, 255)).lower(),
-        gen_string('numeric', random.randint(1, 255)),
+        gen_string('alpha', randint(1, 255)).lower(),
+        gen_string('alphanumeric', randint(1, 255)).lower(),
+        gen_string('numeric', randint(1, 255)),
     ]
 
 
@@ -565,16 +830,16 @@ def invalid_docker_upstream_names():
         ),
         # not allowed non alphanumeric character
         u'{0}+{1}_{2}/{2}-{1}_{0}.{3}'.format(
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
         ),
         u'{0}-{1}_{2}/{2}+{1}_{0}.{3}'.format(
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
         ),
         u'{}-_-_/-_.'.format(gen_string('alphanumeric', 1).lower()),
         u'-_-_/{}-_.'.format(gen_string('alphanumeric', 1).lower()),
@@ -599,10 +864,10 @@ def valid_docker_upstream_names():
         ),
         # allowed non alphanumeric character
         u'{0}-{1}_{2}/{2}-{1}_{0}.{3}'.format(
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
-            gen_string('alphanumeric', random.randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
+            gen_string('alphanumeric', randint(3, 6)).lower(),
         ),
         u'{0}-_-_/{0}-_.'.format(gen_string('alphanumeric', 1).lower()),
     ]
@@ -0,0 +1,225 @@
+# -*- encoding: utf-8 -*-
+"""Seeded bulk generation of the datafactory values.
+
+fauxfactory seeds again the global random generator from the system at each
+call, its values cannot be reproduced, and the values generated at import
+time for ``@pytest.mark.parametrize`` differ between the xdist workers, that
+need :func:`robottelo.datafactory.xdist_adapter` to agree on the tests ids.
+
+A :class:`DataPool` generates the characters of each string type in bulk,
+chunks of random characters drawn from a seeded random generator, and the
+strings are slices of the generated chunks. The current pool of the process
+is seeded by a key and the ``[robottelo]`` ``datapoint_seed``:
+
+    - the module path while a test module is collected, the values of the
+      module parametrize decorators are the same on all the workers
+    - the test id while a test runs, the values generated in a test are the
+      same whatever the worker and the order of the tests
+
+The datafactory functions draw from the current pool when the
+``[robottelo]`` ``datapoint_pool`` option is set, else from fauxfactory.
+Inside :func:`fixed_pool` they draw from a pool seeded by a key only, the
+same in all the processes and runs, whether the pools are enabled or not.
+
+Usage::
+
+    from robottelo.datapool import use_pool
+
+    pool = use_pool('tests/foreman/api/test_organization.py')
+    pool.gen_string('alpha', 10)
+    pool.generate('cjk', 85, count=100)
+"""
+import hashlib
+import random
+import string
+import sys
+import unicodedata
+from contextlib import contextmanager
+
+import fauxfactory
+import six
+
+from fauxfactory.constants import HTML_TAGS
+
+from robottelo.config import settings
+
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_STRING_LENGTH = 10
+
+_LATIN1_CODEPOINTS = (
+    list(range(0x00C0, 0x00D6)) +
+    list(range(0x00D8, 0x00F6)) +
+    list(range(0x00F8, 0x00FF))
+)
+
+# the characters of each string type, the same as the fauxfactory ones
+_CHARACTERS = {
+    'alpha': string.ascii_letters,
+    'alphanumeric': string.ascii_letters + string.digits,
+    'numeric': string.digits,
+    'cjk': [six.unichr(code) for code in range(0x4E00, 0x9FCD)],
+    'cyrillic': [six.unichr(code) for code in range(0x0400, 0x0500)],
+    'latin1': [six.unichr(code) for code in _LATIN1_CODEPOINTS],
+    'punctuation': string.punctuation,
+}
+
+# the current pool of the process
+_current_pool = []
+
+# the pools set by fixed_pool, used whether the pools are enabled or not
+_fixed_pools = []
+
+
+def _get_unicode_letters():
+    """Return the unicode letters, computed at the first utf8 generation"""
+    if 'utf8' not in _CHARACTERS:
+        _CHARACTERS['utf8'] = [
+            six.unichr(code) for code in range(min(sys.maxunicode, 0x10FFFF))
+            if unicodedata.category(six.unichr(code)).startswith('L')
+        ]
+    return _CHARACTERS['utf8']
+
+
+def get_seed(key, base_seed=None):
+    """Return the stable integer seed of a key for the base seed, the same in
+    all the processes"""
+    if base_seed is None:
+        base_seed = settings.datapoint_seed
+    digest = hashlib.md5(
+        u'{0}:{1}'.format(base_seed, key).encode('utf-8')).hexdigest()
+    return int(digest[:16], 16)
+
+
+class DataPool(object):
+    """Strings generated in bulk from a seeded random generator
+
+    :param seed: the random generator seed
+    :param int chunk_size: the number of characters generated at once for a
+        string type
+    """
+
+    def __init__(self, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self._chunks = {}
+
+    def _take(self, str_type, length):
+        """Return the next length characters of the string type"""
+        chunk, position = self._chunks.get(str_type, (u'', 0))
+        if position + length > len(chunk):
+            if str_type == 'utf8':
+                characters = _get_unicode_letters()
+            else:
+                characters = _CHARACTERS[str_type]
+            count = len(characters)
+            rand = self.random.random
+            chunk = chunk[position:] + u''.join([
+                characters[int(rand() * count)]
+                for _ in range(max(self.chunk_size, length))
+            ])
+            position = 0
+        self._chunks[str_type] = (chunk, position + length)
+        return chunk[position:position + length]
+
+    def gen_string(self, str_type, length=None):
+        """Return a string of the fauxfactory string type and length
+
+        :raises: ``ValueError`` if an invalid ``str_type`` is specified.
+        """
+        str_type = str_type.lower()
+        if length is None:
+            length = DEFAULT_STRING_LENGTH
+        if length <= 0:
+            raise ValueError('{0} is an invalid \'length\'.'.format(length))
+        if str_type == 'html':
+            html_tag = self.choice(HTML_TAGS)
+            return u'<{0}>{1}</{0}>'.format(
+                html_tag, self._take('alpha', length))
+        if str_type != 'utf8' and str_type not in _CHARACTERS:
+            raise ValueError(
+                '{0} is not a supported string type.'.format(str_type))
+        return self._take(str_type, length)
+
+    def generate(self, str_type, length, count):
+        """Return a list of count strings of the string type and length"""
+        return [self.gen_string(str_type, length) for _ in range(count)]
+
+    def randint(self, min_value, max_value):
+        return self.random.randint(min_value, max_value)
+
+    def choice(self, values):
+        return values[int(self.random.random() * len(values))]
+
+
+def is_enabled():
+    """Return whether the datafactory values are drawn from the pools"""
+    if _fixed_pools:
+        return True
+    return bool(settings.configured and settings.datapoint_pool)
+
+
+@contextmanager
+def fixed_pool(key):
+    """Draw the datafactory values from a pool seeded by the key only, not
+    by the settings seed, until the context exits
+
+    :return: the fixed :class:`DataPool`
+    """
+    _fixed_pools.append(DataPool(get_seed(key, base_seed='fixed')))
+    try:
+        yield _fixed_pools[-1]
+    finally:
+        _fixed_pools.pop()
+
+
+def use_pool(key):
+    """Set the current pool of the process to a new pool seeded by the key
+
+    :return: the new :class:`DataPool`
+    """
+    pool = DataPool(get_seed(key))
+    _current_pool[:] = [pool]
+    return pool
+
+
+def get_pool():
+    """Return the current pool, a pool seeded by the settings seed when no
+    pool was set"""
+    if _fixed_pools:
+        return _fixed_pools[-1]
+    if not _current_pool:
+        use_pool('')
+    return _current_pool[0]
+
+
+def gen_string(str_type, length=None):
+    """Return a string drawn from the current pool, or generated by
+    fauxfactory when the pools are disabled"""
+    if not is_enabled():
+        return fauxfactory.gen_string(str_type, length)
+    return get_pool().gen_string(str_type, length)
+
+
+def gen_integer(min_value=None, max_value=None):
+    """Return an integer drawn from the current pool, or generated by
+    fauxfactory when the pools are disabled"""
+    if min_value is None or max_value is None or not is_enabled():
+        return fauxfactory.gen_integer(min_value, max_value)
+    return get_pool().randint(min_value, max_value)
+
+
+def randint(min_value, max_value):
+    """Return an integer in the range, drawn from the current pool when
+    enabled"""
+    if not is_enabled():
+        return random.randint(min_value, max_value)
+    return get_pool().randint(min_value, max_value)
+
+
+def choice(values):
+    """Return a random element of the sequence, drawn from the current pool
+    when enabled"""
+    if not is_enabled():
+        return random.choice(values)
+    return get_pool().choice(values)
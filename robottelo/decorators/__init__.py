@@ -20,6 +20,7 @@ from robottelo.host_info import get_host_sat_version
 
 LOGGER = logging.getLogger(__name__)
 OBJECT_CACHE = {}
+ALLOWED_PROJECT_MODES = ('sat', 'sam')
 
 # Test Tier Decorators
 # CRUD tests
@@ -37,18 +38,137 @@ upgrade = pytest.mark.upgrade
 
 # Tests to be executed in 1 thread
 run_in_one_thread = pytest.mark.run_in_one_thread
+# Tests sharing an expensive setup, scheduled on as few workers as possible
+affinity = pytest.mark.affinity
+# Tests conflicting on a lock, not scheduled at the same time
+lock_group = pytest.mark.lock_group
+
+
+class FeatureMatrix(object):
+    """The availability of the robottelo.properties features, the project mode
+    and the upstream flag of a settings object.
+
+    Each feature section is validated only once, the first time its
+    availability is requested or when the matrix is built at session start,
+    then the skip decorators read the availability in constant time.
+    """
+
+    def __init__(self, settings_obj):
+        if not settings_obj.configured:
+            settings_obj.configure()
+        self.settings = settings_obj
+        if settings_obj.project:
+            self.project = settings_obj.project.lower()
+        else:
+            self.project = 'sat'
+        self.upstream = settings_obj.upstream
+        self._validation_errors = {}
+
+    def build(self, features=None):
+        """Validate the feature sections, all of them by default
+
+        :param features: the feature sections to validate, with lazy settings
+            only the sections required by the collected tests are read
+        """
+        if features is None:
+            features = self.settings.all_features
+        for feature in features:
+            self.get_validation_errors(feature)
+        return self
+
+    def get_validation_errors(self, feature):
+        """Return the validation errors of the feature section, the fields
+        missing from a not fully configured section"""
+        errors = self._validation_errors.get(feature)
+        if errors is None:
+            # Example: `settings.clients`
+            errors = self._validation_errors[feature] = getattr(
+                self.settings, feature).validate()
+        return errors
+
+    def is_set(self, feature):
+        """Return whether the feature section is fully configured"""
+        return not self.get_validation_errors(feature)
+
+    def get_missing(self, features):
+        """Return the features that are not fully configured"""
+        return [feature for feature in features if not self.is_set(feature)]
+
+    def as_dict(self):
+        """Return the matrix as a dict of feature and validation errors,
+        with the project mode and the upstream flag"""
+        return dict(
+            project=self.project,
+            upstream=self.upstream,
+            features={
+                feature: list(errors)
+                for feature, errors in self._validation_errors.items()
+            },
+        )
+
+
+_feature_matrix = None
+
+
+def get_feature_matrix():
+    """Return the feature matrix of the robottelo settings"""
+    global _feature_matrix
+    matrix = _feature_matrix
+    if matrix is None or matrix.settings is not settings:
+        matrix = _feature_matrix = FeatureMatrix(settings)
+    return matrix
 
 
 def setting_is_set(option):
     """Return either ``True`` or ``False`` if a Robottelo section setting is
     set or not respectively.
     """
-    if not settings.configured:
-        settings.configure()
-    # Example: `settings.clients`
-    if getattr(settings, option).validate():
-        return False
-    return True
+    return get_feature_matrix().is_set(option)
+
+
+def get_required_features(items):
+    """Return the feature sections required by the :func:`skip_if_not_set`
+    decorated functions of the collected test items, their setUp and
+    setUpClass methods included
+    """
+    features = set()
+    for item in items:
+        test_class = getattr(item, 'cls', None)
+        for func in (getattr(item, 'function', None),
+                     getattr(test_class, 'setUpClass', None),
+                     getattr(test_class, 'setUp', None)):
+            features.update(getattr(func, 'required_features', ()))
+    return features
+
+
+def get_skip_reason(*functions):
+    """Return the reason why the :func:`skip_if_not_set` or
+    :func:`run_only_on` decorated functions would skip their test, or
+    ``None`` if the test would run.
+
+    Allow to deselect the tests at collection time instead of starting them
+    only to skip them.
+
+    :param functions: the test function and the setUp and setUpClass methods
+        of its class, the ``None`` values are ignored
+    """
+    matrix = get_feature_matrix()
+    for func in functions:
+        if func is None:
+            continue
+        missing = matrix.get_missing(getattr(func, 'required_features', ()))
+        if missing:
+            return 'Missing configuration for: {0}.'.format(
+                ', '.join(missing))
+        project = getattr(func, 'run_only_on', None)
+        if (project in ALLOWED_PROJECT_MODES and
+                matrix.project in ALLOWED_PROJECT_MODES and
+                project != matrix.project):
+            return (
+                'Server runs in "{0}" mode and this test will run only on '
+                '"{1}" mode.'.format(matrix.project, project)
+            )
+    return None
 
 
 def skip_if(cond, reason=None):
@@ -137,17 +257,16 @@ def skip_if_not_set(*options):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            missing = []
-            for option in options:
-                # Example: `settings.clients`
-                if not setting_is_set(option):
-                    # List of all sections that are not fully configured
-                    missing.append(option)
+            # List of all sections that are not fully configured
+            missing = get_feature_matrix().get_missing(options)
             if not missing:
                 return func(*args, **kwargs)
             raise unittest2.SkipTest(
                 'Missing configuration for: {0}.'.format(', '.join(missing)))
 
+        # introspected by get_skip_reason at collection time
+        wrapper.required_features = tuple(
+            getattr(func, 'required_features', ())) + options
         return wrapper
 
     return decorator
@@ -224,7 +343,6 @@ def run_only_on(project):
         mode is specified in ``robottelo.properties`` file
 
     """
-    allowed_project_modes = ('sat', 'sam')
     project = project.lower()
 
     def decorator(func):
@@ -237,25 +355,22 @@ def run_only_on(project):
             """Wrapper that will skip the test if the test method project does
             not match with the settings project.
             """
-            # Validate project value
-            if settings.project:
-                settings_project = settings.project.lower()
-            else:
-                settings_project = 'sat'
+            # If robottelo.properties not present or does not specify a project
+            # use sat
+            settings_project = get_feature_matrix().project
 
-            if project not in allowed_project_modes:
+            # Validate project value
+            if project not in ALLOWED_PROJECT_MODES:
                 raise ProjectModeError(
                     '"{0}" is not a project mode. The allowed project modes '
-                    'are: {1}'.format(project, allowed_project_modes)
+                    'are: {1}'.format(project, ALLOWED_PROJECT_MODES)
                 )
 
-            # If robottelo.properties not present or does not specify a project
-            # use sat
-            if settings_project not in allowed_project_modes:
+            if settings_project not in ALLOWED_PROJECT_MODES:
                 raise ProjectModeError(
                     '"{0}" is not an acceptable "[robottelo] project" value '
                     'in robottelo.properties file. The allowed project modes '
-                    'are: {1}'.format(settings_project, allowed_project_modes)
+                    'are: {1}'.format(settings_project, ALLOWED_PROJECT_MODES)
                 )
 
             # Preconditions PASS.  Now skip the test if modes does not match
@@ -267,6 +382,8 @@ def run_only_on(project):
             else:
                 return func(*args, **kwargs)
 
+        # introspected by get_skip_reason at collection time
+        wrapper.run_only_on = project
         return wrapper
 
     return decorator
@@ -1,5 +1,7 @@
 # -*- encoding: utf-8 -*-
-"""Implements test function locking, using pytest_services file locking
+"""Implements test function locking, using pytest_services file locking or
+the sqlite or redis storage locks when sqlite or redis is the shared function
+storage
 
 Usage::
 
@@ -39,18 +41,46 @@ Usage::
        def test_that_conflict_with_test_to_lock(self)
             with locking_function(self.test_to_lock):
                 # do some operations that conflict with test_to_lock
+
+    # at most 3 repositories synchronizations at the same time
+    @semaphore_function(limit=3)
+    def sync_repository(repo):
+        repo.sync()
+
+    # many tests read a setting, one test at a time change it
+    class SomeTestCase(TestCase):
+
+       @rw_lock_function(write=True)
+       def test_change_setting(self):
+          pass
+
+       def test_that_read_setting(self)
+            with read_locking_function(self.test_change_setting):
+                # do some operations that need the setting not changed
 """
+import fcntl
 import functools
-import inspect
 import logging
 import os
+import random
+import socket
 import tempfile
+import time
 
 from contextlib import contextmanager
 
 from pytest_services.locks import file_lock
 
 from robottelo.config import settings
+from robottelo.decorators.func_shared import (
+    contention,
+    redis_storage,
+    sqlite_storage,
+)
+from robottelo.decorators.func_shared.shared import (
+    _check_config,
+    _get_class_name,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +90,14 @@ LOCK_DIR = None
 LOCK_DEFAULT_TIMEOUT = 1800  # 30 minutes
 LOCK_FILE_NAME_EXT = 'lock'
 LOCK_DEFAULT_SCOPE = None
+# the locks storage, file, sqlite or redis, by default the shared function
+# lock_storage setting, else the sqlite or redis storage when it is the storage
+# of the enabled shared functions
+LOCK_STORAGE = None
+# the time in seconds between two tries to acquire a semaphore slot
+LOCK_POLL_INTERVAL = 0.1
+# the number of readers that can hold a reader/writer lock at the same time
+RW_LOCK_MAX_READERS = 32
 
 _DEFAULT_CLASS_NAME_DEPTH = 3
 
@@ -77,6 +115,29 @@ def set_default_scope(value):
     LOCK_DEFAULT_SCOPE = value
 
 
+def set_lock_storage(value):
+    """Set the locks storage, file, sqlite or redis
+
+    :type value: str
+    """
+    global LOCK_STORAGE
+    LOCK_STORAGE = value
+
+
+def _get_lock_storage():
+    if LOCK_STORAGE is not None:
+        return LOCK_STORAGE
+    if not settings.configured:
+        return 'file'
+    shared_settings = settings.shared_function
+    if shared_settings.lock_storage:
+        return shared_settings.lock_storage
+    if (shared_settings.enabled and
+            shared_settings.storage in ('sqlite', 'redis')):
+        return shared_settings.storage
+    return 'file'
+
+
 def _get_default_scope():
     # this is the default locking scope
     if LOCK_DEFAULT_SCOPE is None:
@@ -157,11 +218,11 @@ def _get_function_name(function, class_name=None):
 
 
 def _get_function_name_lock_path(function_name, scope=None, scope_kwargs=None,
-                                 scope_context=None):
+                                 scope_context=None, create=True):
     """Return the path of the file to lock"""
     return os.path.join(
         _get_scope_path(scope, scope_kwargs=scope_kwargs,
-                        scope_context=scope_context),
+                        scope_context=scope_context, create=create),
         '{0}.{1}'.format(function_name, LOCK_FILE_NAME_EXT)
     )
 
@@ -200,6 +261,116 @@ def _write_content(handler, content):
     handler.flush()
 
 
+def _get_lock_key(lock_file_path):
+    """Return the lock file path relative to the locks directory, the lock key
+    of the sqlite and redis storages"""
+    return os.path.relpath(
+        lock_file_path, _get_temp_lock_function_dir(create=False))
+
+
+def _get_redis_client():
+    """Return a client of the configured redis storage"""
+    _check_config()
+    return redis_storage.RedisStorageHandler().client
+
+
+def _get_redis_owner(process_id):
+    return '{0}:{1}'.format(socket.gethostname(), process_id)
+
+
+@contextmanager
+def _sqlite_lock(lock_file_path, process_id, timeout):
+    """Lock a row of the sqlite storage locks table, the lock key is the lock
+    file path relative to the locks directory.
+    """
+    lock_key = _get_lock_key(lock_file_path)
+    # to prevent dead lock when recursively calling this function
+    # check if the same process is trying to acquire the lock
+    if str(sqlite_storage.get_lock_pid(lock_key)) == process_id:
+        raise FunctionLockerError(
+            'recursion detected: the function already locked by the same '
+            'process'
+        )
+    with sqlite_storage.lock(lock_key, timeout=timeout) as owner:
+        logger.info(
+            'process id: {0} lock function using sqlite key: {1}'
+            .format(process_id, lock_key)
+        )
+        yield owner
+
+
+@contextmanager
+def _redis_lock(lock_file_path, process_id, timeout):
+    """Lock a key of the redis storage, the lock key is the lock file path
+    relative to the locks directory prefixed with the locks directory name.
+    """
+    lock_key = os.path.join(
+        TEMP_FUNC_LOCK_DIR, _get_lock_key(lock_file_path))
+    owner = _get_redis_owner(process_id)
+    lock = redis_storage.RedisLock(
+        _get_redis_client(), lock_key, timeout=timeout, owner=owner)
+    # to prevent dead lock when recursively calling this function
+    # check if the same process is trying to acquire the lock
+    if lock.get_owner() == owner:
+        raise FunctionLockerError(
+            'recursion detected: the function already locked by the same '
+            'process'
+        )
+    with lock:
+        logger.info(
+            'process id: {0} lock function using redis key: {1}'
+            .format(process_id, lock_key)
+        )
+        yield lock
+
+
+@contextmanager
+def _file_lock(lock_file_path, process_id, timeout):
+    """Lock the file lock_file_path and write the process id to it"""
+    # to prevent dead lock when recursively calling this function
+    # check if the same process is trying to acquire the lock
+    _check_deadlock(lock_file_path, process_id)
+
+    with file_lock(lock_file_path, remove=False, timeout=timeout) as handler:
+        logger.info(
+            'process id: {0} lock function using file path: {1}'
+            .format(process_id, lock_file_path)
+        )
+        # write the process id that locked this function
+        _write_content(handler, process_id)
+        # let the locked code run
+        try:
+            yield handler
+        finally:
+            # clear the file
+            _write_content(handler, None)
+
+
+def _lock(function_name, scope=None, scope_kwargs=None, scope_context=None,
+          timeout=LOCK_DEFAULT_TIMEOUT):
+    """Return the lock context manager of function_name in the configured
+    locks storage
+    """
+    lock_storage = _get_lock_storage()
+    lock_file_path = _get_function_name_lock_path(
+        function_name,
+        scope=scope,
+        scope_kwargs=scope_kwargs,
+        scope_context=scope_context,
+        create=lock_storage == 'file'
+    )
+    process_id = str(os.getpid())
+    if lock_storage == 'sqlite':
+        lock_context = _sqlite_lock(lock_file_path, process_id, timeout)
+    elif lock_storage == 'redis':
+        lock_context = _redis_lock(lock_file_path, process_id, timeout)
+    else:
+        lock_context = _file_lock(lock_file_path, process_id, timeout)
+    return contention.measure(
+        contention.KIND_LOCK_FUNCTION, _get_lock_key(lock_file_path),
+        lock_context)
+
+
 def lock_function(function=None, scope=_get_default_scope, scope_context=None,
                   scope_kwargs=None, timeout=LOCK_DEFAULT_TIMEOUT):
     """Generic function locker, lock any decorated function. Any parallel
@@ -218,53 +389,25 @@ def lock_function(function=None, scope=_get_default_scope, scope_context=None,
     :param scope_kwargs: kwargs to be passed to scope if is a callable
     :param timeout: the time in seconds to wait for acquiring the lock
     """
-    class_names = []
-    class_name = None
-    index = 1
-    while class_name != '<module>' and index <= _DEFAULT_CLASS_NAME_DEPTH:
-        if class_name:
-            class_names.append(class_name)
-        class_name = inspect.getouterframes(inspect.currentframe())[index][3]
-        index += 1
-
-    class_names.reverse()
-    class_name = '.'.join(class_names)
+    class_name = _get_class_name(depth=_DEFAULT_CLASS_NAME_DEPTH)
 
     def main_wrapper(func):
 
         setattr(func, '__class_name__', class_name)
         setattr(func, '__function_locked__', True)
+        setattr(func, '__lock_key__',
+                _get_function_name(func, class_name=class_name))
 
         @functools.wraps(func)
         def function_wrapper(*args, **kwargs):
             function_name = _get_function_name(func, class_name=class_name)
-            lock_file_path = _get_function_name_lock_path(
-                function_name,
-                scope=scope,
-                scope_kwargs=scope_kwargs,
-                scope_context=scope_context
-                )
-            process_id = str(os.getpid())
-            # to prevent dead lock when recursively calling this function
-            # check if the same process is trying to acquire the lock
-            _check_deadlock(lock_file_path, process_id)
-
-            with file_lock(lock_file_path, remove=False,
-                           timeout=timeout) as handler:
-                logger.info(
-                    'process id: {0} lock function using file path: {1}'
-                    .format(process_id, lock_file_path)
-                )
-                # write the process id that locked this function
-                _write_content(handler, process_id)
+            with _lock(function_name,
+                       scope=scope,
+                       scope_kwargs=scope_kwargs,
+                       scope_context=scope_context,
+                       timeout=timeout):
                 # call the locked function
-                try:
-                    res = func(*args, **kwargs)
-                finally:
-                    # clear the file
-                    _write_content(handler, None)
-
-            return res
+                return func(*args, **kwargs)
 
         return function_wrapper
 
@@ -301,27 +444,402 @@ def locking_function(function, scope=_get_default_scope, scope_context=None,
             'Cannot ensure locking when using a non locked function')
     class_name = getattr(function, '__class_name__', None)
     function_name = _get_function_name(function, class_name=class_name)
-    lock_file_path = _get_function_name_lock_path(
-        function_name,
-        scope=scope,
-        scope_kwargs=scope_kwargs,
-        scope_context=scope_context
-    )
-    process_id = str(os.getpid())
-    # to prevent dead lock when recursively calling this function
-    # check if the same process is trying to acquire the lock
-    _check_deadlock(lock_file_path, process_id)
+    with _lock(function_name,
+               scope=scope,
+               scope_kwargs=scope_kwargs,
+               scope_context=scope_context,
+               timeout=timeout) as handler:
+        # let the locked code run
+        yield handler
 
-    with file_lock(lock_file_path, remove=False, timeout=timeout) as handler:
-        logger.info(
-            'process id: {0} - lock function name:{1}  - using file path: {2}'
-            .format(process_id, function_name, lock_file_path)
+
+class _FileSlots(object):
+    """Non blocking locks of files in the locks directory"""
+
+    def __init__(self, lock_dir):
+        self._lock_dir = lock_dir
+
+    def try_acquire(self, key, process_id):
+        """Return the locked file handler or None if locked by an other
+        process"""
+        handler = os.fdopen(
+            os.open(os.path.join(self._lock_dir, key),
+                    os.O_RDWR | os.O_CREAT, 0o666),
+            'r+'
         )
-        # write the process id that locked this function
-        _write_content(handler, process_id)
-        # let the locked code run
         try:
-            yield handler
-        finally:
-            # clear the file
-            _write_content(handler, None)
+            fcntl.flock(handler, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            handler.close()
+            return None
+        _write_content(handler, process_id)
+        return handler
+
+    def release(self, handler):
+        _write_content(handler, None)
+        fcntl.flock(handler, fcntl.LOCK_UN)
+        handler.close()
+
+
+class _SQLiteSlots(object):
+    """Non blocking locks of the sqlite storage"""
+
+    def try_acquire(self, key, process_id):
+        """Return the lock key and owner or None if locked by an other
+        process"""
+        owner = sqlite_storage.claim_lock(key)
+        if owner is None:
+            return None
+        return key, owner
+
+    def release(self, handle):
+        sqlite_storage.release_lock(*handle)
+
+
+class _RedisSlots(object):
+    """Non blocking locks of the redis storage"""
+
+    def __init__(self):
+        self._client = _get_redis_client()
+
+    def try_acquire(self, key, process_id):
+        """Return the acquired lock or None if locked by an other process"""
+        lock = redis_storage.RedisLock(
+            self._client, os.path.join(TEMP_FUNC_LOCK_DIR, key), timeout=0,
+            owner=_get_redis_owner(process_id)
+        )
+        if lock.acquire():
+            return lock
+        return None
+
+    def release(self, lock):
+        lock.release()
+
+
+def _get_slots(lock_storage):
+    if lock_storage == 'sqlite':
+        return _SQLiteSlots()
+    if lock_storage == 'redis':
+        return _RedisSlots()
+    return _FileSlots(_get_temp_lock_function_dir())
+
+
+def _acquire_slot(slots, keys, process_id, deadline, start_index=0):
+    """Try to acquire one of the keys until deadline
+
+    :return: the acquired slot handle
+    """
+    while True:
+        for index in range(len(keys)):
+            handle = slots.try_acquire(
+                keys[(start_index + index) % len(keys)], process_id)
+            if handle is not None:
+                return handle
+        if time.time() >= deadline:
+            raise FunctionLockerError(
+                'Not able to acquire any of the locks {0} in time'
+                .format(', '.join(keys))
+            )
+        time.sleep(LOCK_POLL_INTERVAL)
+
+
+class _Slots(object):
+    """The slots and the turnstile keys of a semaphore or a reader/writer lock
+    """
+
+    def __init__(self, function_name, count, scope=None, scope_kwargs=None,
+                 scope_context=None):
+        lock_storage = _get_lock_storage()
+        lock_file_path = _get_function_name_lock_path(
+            function_name,
+            scope=scope,
+            scope_kwargs=scope_kwargs,
+            scope_context=scope_context,
+            create=lock_storage == 'file'
+        )
+        self.key = _get_lock_key(lock_file_path)
+        base_key = self.key[:-len(LOCK_FILE_NAME_EXT) - 1]
+        self.keys = [
+            '{0}.slot{1}.{2}'.format(base_key, index, LOCK_FILE_NAME_EXT)
+            for index in range(count)
+        ]
+        self.turnstile_key = '{0}.turnstile.{1}'.format(
+            base_key, LOCK_FILE_NAME_EXT)
+        self.slots = _get_slots(lock_storage)
+        self.process_id = str(os.getpid())
+
+    def acquire(self, keys, deadline, start_index=0):
+        return _acquire_slot(self.slots, keys, self.process_id, deadline,
+                             start_index=start_index)
+
+    def release(self, handle):
+        self.slots.release(handle)
+
+
+@contextmanager
+def _semaphore(slots, timeout, fair):
+    """Hold one of the semaphore slots"""
+    deadline = time.time() + timeout
+    turnstile = None
+    if fair:
+        # the waiters try to acquire the free slots one at a time, the new
+        # ones cannot take a slot before the older waiters
+        turnstile = slots.acquire([slots.turnstile_key], deadline)
+    try:
+        handle = slots.acquire(slots.keys, deadline)
+    finally:
+        if turnstile is not None:
+            slots.release(turnstile)
+    logger.info('process id: {0} acquired semaphore {1}'.format(
+        slots.process_id, slots.key))
+    try:
+        yield handle
+    finally:
+        slots.release(handle)
+
+
+@contextmanager
+def _read_lock(slots, timeout, fair):
+    """Hold one of the reader/writer lock slots"""
+    deadline = time.time() + timeout
+    if fair:
+        # a waiting writer holds the turnstile, the new readers wait it
+        slots.release(slots.acquire([slots.turnstile_key], deadline))
+    handle = slots.acquire(slots.keys, deadline,
+                           start_index=random.randrange(len(slots.keys)))
+    try:
+        yield handle
+    finally:
+        slots.release(handle)
+
+
+@contextmanager
+def _write_lock(slots, timeout):
+    """Hold the turnstile and all the reader/writer lock slots"""
+    deadline = time.time() + timeout
+    handles = [slots.acquire([slots.turnstile_key], deadline)]
+    try:
+        for key in slots.keys:
+            handles.append(slots.acquire([key], deadline))
+        logger.info('process id: {0} acquired write lock {1}'.format(
+            slots.process_id, slots.key))
+        yield handles
+    finally:
+        for handle in reversed(handles):
+            slots.release(handle)
+
+
+def _semaphore_lock(function_name, limit, scope=None, scope_kwargs=None,
+                    scope_context=None, timeout=LOCK_DEFAULT_TIMEOUT,
+                    fair=False):
+    slots = _Slots(function_name, limit, scope=scope,
+                   scope_kwargs=scope_kwargs, scope_context=scope_context)
+    return contention.measure(
+        contention.KIND_LOCK_FUNCTION, slots.key,
+        _semaphore(slots, timeout, fair)
+    )
+
+
+def _rw_lock(function_name, write, scope=None, scope_kwargs=None,
+             scope_context=None, timeout=LOCK_DEFAULT_TIMEOUT, fair=False,
+             max_readers=RW_LOCK_MAX_READERS):
+    slots = _Slots(function_name, max_readers, scope=scope,
+                   scope_kwargs=scope_kwargs, scope_context=scope_context)
+    if write:
+        lock_context = _write_lock(slots, timeout)
+    else:
+        lock_context = _read_lock(slots, timeout, fair)
+    return contention.measure(
+        contention.KIND_LOCK_FUNCTION, slots.key, lock_context)
+
+
+def semaphore_function(function=None, limit=1, scope=_get_default_scope,
+                       scope_context=None, scope_kwargs=None,
+                       timeout=LOCK_DEFAULT_TIMEOUT, fair=False):
+    """Generic function semaphore, at most limit calls of the decorated
+    function run at the same time. Any other parallel pytest xdist worker
+    will wait for one of them to finish
+
+    :type function: callable
+    :type limit: int
+    :type scope: str or callable
+    :type scope_kwargs: dict
+    :type scope_context: str
+    :type timeout: int
+    :type fair: bool
+
+    :param function: the function that is intended to be limited
+    :param limit: the number of calls that can run at the same time
+    :param scope: this parameter will define the namespace of locking
+    :param scope_context: an added context string if applicable, of a concrete
+           lock in combination with scope and function.
+    :param scope_kwargs: kwargs to be passed to scope if is a callable
+    :param timeout: the time in seconds to wait for acquiring the semaphore
+    :param fair: whether the waiters acquire the semaphore one at a time,
+        a new waiter cannot overtake the older ones
+    """
+    class_name = _get_class_name(depth=_DEFAULT_CLASS_NAME_DEPTH)
+
+    def main_wrapper(func):
+
+        setattr(func, '__class_name__', class_name)
+        setattr(func, '__semaphore_limit__', limit)
+
+        @functools.wraps(func)
+        def function_wrapper(*args, **kwargs):
+            function_name = _get_function_name(func, class_name=class_name)
+            with _semaphore_lock(function_name, limit,
+                                 scope=scope,
+                                 scope_kwargs=scope_kwargs,
+                                 scope_context=scope_context,
+                                 timeout=timeout,
+                                 fair=fair):
+                return func(*args, **kwargs)
+
+        return function_wrapper
+
+    if function:
+        return main_wrapper(function)
+    return main_wrapper
+
+
+@contextmanager
+def semaphore_locking_function(function, scope=_get_default_scope,
+                               scope_context=None, scope_kwargs=None,
+                               timeout=LOCK_DEFAULT_TIMEOUT, fair=False):
+    """Acquire the semaphore of a function decorated with semaphore_function,
+    the code run in this context counts as one of the limited calls.
+
+    :param function: the function decorated with semaphore_function
+    :param scope: this parameter will define the namespace of locking
+    :param scope_context: an added context string if applicable, of a concrete
+           lock in combination with scope and function.
+    :param scope_kwargs: kwargs to be passed to scope if is a callable
+    :param timeout: the time in seconds to wait for acquiring the semaphore
+    :param fair: whether the waiters acquire the semaphore one at a time
+    """
+    limit = getattr(function, '__semaphore_limit__', None)
+    if limit is None:
+        raise FunctionLockerError(
+            'Cannot ensure the semaphore when using a non semaphore function')
+    class_name = getattr(function, '__class_name__', None)
+    function_name = _get_function_name(function, class_name=class_name)
+    with _semaphore_lock(function_name, limit,
+                         scope=scope,
+                         scope_kwargs=scope_kwargs,
+                         scope_context=scope_context,
+                         timeout=timeout,
+                         fair=fair) as handler:
+        yield handler
+
+
+def rw_lock_function(function=None, write=False, scope=_get_default_scope,
+                     scope_context=None, scope_kwargs=None,
+                     timeout=LOCK_DEFAULT_TIMEOUT, fair=False,
+                     max_readers=RW_LOCK_MAX_READERS):
+    """Generic function reader/writer locker, many readers of the decorated
+    function can run at the same time, a writer runs alone. Any other
+    parallel pytest xdist worker will wait for the writer to finish
+
+    :type function: callable
+    :type write: bool
+    :type scope: str or callable
+    :type scope_kwargs: dict
+    :type scope_context: str
+    :type timeout: int
+    :type fair: bool
+    :type max_readers: int
+
+    :param function: the function that is intended to be locked
+    :param write: whether the decorated function is a writer
+    :param scope: this parameter will define the namespace of locking
+    :param scope_context: an added context string if applicable, of a concrete
+           lock in combination with scope and function.
+    :param scope_kwargs: kwargs to be passed to scope if is a callable
+    :param timeout: the time in seconds to wait for acquiring the lock
+    :param fair: whether the new readers wait the waiting writer, without
+        fairness a writer may wait while readers keep holding the lock
+    :param max_readers: the number of readers that can hold the lock at the
+        same time, must be the same for all the users of the lock
+    """
+    class_name = _get_class_name(depth=_DEFAULT_CLASS_NAME_DEPTH)
+
+    def main_wrapper(func):
+
+        setattr(func, '__class_name__', class_name)
+        setattr(func, '__rw_locked__', True)
+        setattr(func, '__rw_lock_max_readers__', max_readers)
+
+        @functools.wraps(func)
+        def function_wrapper(*args, **kwargs):
+            function_name = _get_function_name(func, class_name=class_name)
+            with _rw_lock(function_name, write,
+                          scope=scope,
+                          scope_kwargs=scope_kwargs,
+                          scope_context=scope_context,
+                          timeout=timeout,
+                          fair=fair,
+                          max_readers=max_readers):
+                return func(*args, **kwargs)
+
+        return function_wrapper
+
+    if function:
+        return main_wrapper(function)
+    return main_wrapper
+
+
+@contextmanager
+def _rw_locking_function(function, write, scope=_get_default_scope,
+                         scope_context=None, scope_kwargs=None,
+                         timeout=LOCK_DEFAULT_TIMEOUT, fair=False):
+    if not getattr(function, '__rw_locked__', False):
+        raise FunctionLockerError(
+            'Cannot ensure locking when using a non reader/writer locked '
+            'function'
+        )
+    class_name = getattr(function, '__class_name__', None)
+    function_name = _get_function_name(function, class_name=class_name)
+    with _rw_lock(function_name, write,
+                  scope=scope,
+                  scope_kwargs=scope_kwargs,
+                  scope_context=scope_context,
+                  timeout=timeout,
+                  fair=fair,
+                  max_readers=function.__rw_lock_max_readers__) as handler:
+        yield handler
+
+
+def read_locking_function(function, scope=_get_default_scope,
+                          scope_context=None, scope_kwargs=None,
+                          timeout=LOCK_DEFAULT_TIMEOUT, fair=False):
+    """Hold the reader lock of a function decorated with rw_lock_function
+
+    :param function: the function decorated with rw_lock_function
+    :param scope: this parameter will define the namespace of locking
+    :param scope_context: an added context string if applicable, of a concrete
+           lock in combination with scope and function.
+    :param scope_kwargs: kwargs to be passed to scope if is a callable
+    :param timeout: the time in seconds to wait for acquiring the lock
+    :param fair: whether to wait the waiting writer
+    """
+    return _rw_locking_function(
+        function, False, scope=scope, scope_context=scope_context,
+        scope_kwargs=scope_kwargs, timeout=timeout, fair=fair)
+
+
+def write_locking_function(function, scope=_get_default_scope,
+                           scope_context=None, scope_kwargs=None,
+                           timeout=LOCK_DEFAULT_TIMEOUT):
+    """Hold the writer lock of a function decorated with rw_lock_function
+
+    :param function: the function decorated with rw_lock_function
+    :param scope: this parameter will define the namespace of locking
+    :param scope_context: an added context string if applicable, of a concrete
+           lock in combination with scope and function.
+    :param scope_kwargs: kwargs to be passed to scope if is a callable
+    :param timeout: the time in seconds to wait for acquiring the lock
+    """
+    return _rw_locking_function(
+        function, True, scope=scope, scope_context=scope_context,
+        scope_kwargs=scope_kwargs, timeout=timeout)
@@ -1,19 +1,71 @@
 # -*- encoding: utf-8 -*-
-import json
+import logging
+import threading
+import time
+
+from robottelo.decorators.func_shared.codec import get_default_codec
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renew a lock lease until stopped or lost
+
+    :param name: the lock name, logged when the lease is lost
+    :param lease: the lock lease in seconds, renewed every third of it
+    :param renew: a callable renewing the lease, return whether the lock is
+        still owned
+    """
+
+    def __init__(self, name, lease, renew):
+        super(LeaseHeartbeat, self).__init__(
+            name='lock-heartbeat-{0}'.format(name))
+        self.daemon = True
+        self._lock_name = name
+        self._lease = lease
+        self._renew = renew
+        self._stopped = threading.Event()
+
+    def run(self):
+        interval = self._lease / 3.0
+        while not self._stopped.wait(interval):
+            try:
+                renewed = self._renew()
+            except Exception as err:
+                logger.exception(err)
+                renewed = False
+            if not renewed:
+                logger.warning('{0} lease lost'.format(self._lock_name))
+                break
+
+    def stop(self):
+        self._stopped.set()
 
 
 class BaseStorageHandler(object):
 
-    @staticmethod
-    def encode(data):
-        return json.dumps(data)
+    _codec = None
+    # whether the storage contains only shared function values, if not the
+    # values that cannot be decoded are not deleted by the garbage collection
+    _exclusive = True
+
+    @property
+    def codec(self):
+        """Return the codec of the stored values, the configured one if not
+        supplied to the storage handler"""
+        if self._codec is None:
+            self._codec = get_default_codec()
+        return self._codec
 
-    @staticmethod
-    def decode(data):
-        return json.loads(data)
+    def encode(self, data):
+        return self.codec.encode(data)
 
-    def lock(self, lock_key):
-        """Return the storage locker context manager"""
+    def decode(self, data):
+        return self.codec.decode(data)
+
+    def lock(self, key, timeout=None):
+        """Return the storage locker context manager of key, waiting at most
+        timeout seconds to acquire it, by default the storage lock timeout"""
         raise NotImplementedError
 
     def when_lock_acquired(self, data):
@@ -27,3 +79,54 @@ class BaseStorageHandler(object):
     def set(self, key, value):
         """Write the value of key to storage"""
         raise NotImplementedError
+
+    def keys(self):
+        """Return an iterable of the stored values keys"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Delete the key value from storage"""
+        raise NotImplementedError
+
+    def collect_locks(self, deadline=None):
+        """Delete the abandoned locks, return the number of deleted locks"""
+        return 0
+
+    def _is_collectable(self, key, is_expired):
+        """Return whether the value of key has expired or cannot be
+        decoded"""
+        try:
+            value = self.get(key)
+            return value is not None and is_expired(value)
+        except Exception:
+            # an orphaned value, not written by this version or corrupted
+            return self._exclusive
+
+    def collect(self, is_expired, deadline=None):
+        """Delete the expired values, the values that cannot be decoded and
+        the abandoned locks.
+
+        :param is_expired: a callable that receive a decoded value and return
+            whether it has expired
+        :param deadline: a time.time() value after which the scan stops
+        :return: a dict with the number of deleted ``values`` and ``locks``
+        """
+        values_count = 0
+        for key in self.keys():
+            if deadline is not None and time.time() >= deadline:
+                break
+            if not self._is_collectable(key, is_expired):
+                continue
+            try:
+                # a value is rewritten while its lock is held, check again
+                # under the lock to not delete the value just written
+                with self.lock(key, timeout=0) as data:
+                    self.when_lock_acquired(data)
+                    if self._is_collectable(key, is_expired):
+                        self.delete(key)
+                        values_count += 1
+            except Exception:
+                # the lock is held, the value is being computed again
+                continue
+        return dict(values=values_count,
+                    locks=self.collect_locks(deadline=deadline))
@@ -0,0 +1,152 @@
+# -*- encoding: utf-8 -*-
+"""Encoding of the shared functions values.
+
+A codec serializes the values with json or msgpack and compresses them with
+zlib or lz4 when the serialized value size reach a threshold.
+
+The json serialized and not compressed values are stored as plain json text,
+as the values stored before codecs were available. Any other value is tagged
+with the serializer and compression used to encode it, so the values can
+always be decoded whatever the codec of the storage handler::
+
+    b'\\x00' + b'msgpack+zlib' + b'\\x00' + payload
+
+Note: msgpack and lz4 are optional packages.
+"""
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# the defaults, configured in [shared_function] section
+SERIALIZER = 'json'
+COMPRESSION = None
+COMPRESSION_THRESHOLD = 4096
+
+# json text never starts with a null character
+_TAG_MARK = b'\x00'
+
+
+class CodecError(Exception):
+    """Raised when a codec is not supported or not available"""
+
+
+def _json_dumps(data):
+    return json.dumps(data).encode('utf-8')
+
+
+def _json_loads(payload):
+    return json.loads(payload.decode('utf-8'))
+
+
+def _msgpack_dumps(data):
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def _msgpack_loads(payload):
+    return msgpack.unpackb(payload, raw=False)
+
+
+def _lz4_compress(payload):
+    return lz4.frame.compress(payload)
+
+
+def _lz4_decompress(payload):
+    return lz4.frame.decompress(payload)
+
+
+_serializers = {
+    'json': (_json_dumps, _json_loads, lambda: True),
+    'msgpack': (_msgpack_dumps, _msgpack_loads, lambda: msgpack is not None),
+}
+
+_compressions = {
+    'zlib': (zlib.compress, zlib.decompress, lambda: True),
+    'lz4': (_lz4_compress, _lz4_decompress, lambda: lz4 is not None),
+}
+
+
+def _get_serializer(name):
+    if name not in _serializers:
+        raise CodecError('serializer: "{0}" not supported'.format(name))
+    dumps, loads, is_available = _serializers[name]
+    if not is_available():
+        raise CodecError(
+            'serializer: "{0}" python package not installed'.format(name))
+    return dumps, loads
+
+
+def _get_compression(name):
+    if name not in _compressions:
+        raise CodecError('compression: "{0}" not supported'.format(name))
+    compress, decompress, is_available = _compressions[name]
+    if not is_available():
+        raise CodecError(
+            'compression: "{0}" python package not installed'.format(name))
+    return compress, decompress
+
+
+class Codec(object):
+    """Encode and decode the shared functions values
+
+    :param serializer: json or msgpack
+    :param compression: None, zlib or lz4
+    :param threshold: the minimum size in bytes of the serialized value to
+        compress
+    """
+
+    def __init__(self, serializer='json', compression=None,
+                 threshold=COMPRESSION_THRESHOLD):
+        self._dumps = _get_serializer(serializer)[0]
+        self._compress = None
+        if compression:
+            self._compress = _get_compression(compression)[0]
+        self.serializer = serializer
+        self.compression = compression
+        self.threshold = threshold
+
+    def encode(self, data):
+        """Return the encoded data bytes"""
+        payload = self._dumps(data)
+        compression = None
+        if self._compress and len(payload) >= self.threshold:
+            payload = self._compress(payload)
+            compression = self.compression
+        if self.serializer == 'json' and compression is None:
+            return payload
+        tag = self.serializer
+        if compression:
+            tag = '{0}+{1}'.format(tag, compression)
+        return b''.join([_TAG_MARK, tag.encode('ascii'), _TAG_MARK, payload])
+
+    @staticmethod
+    def decode(value):
+        """Return the data of an encoded value, whatever the codec that
+        encoded it
+        """
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+        if not value.startswith(_TAG_MARK):
+            return _json_loads(value)
+        tag, payload = value[len(_TAG_MARK):].split(_TAG_MARK, 1)
+        serializer, _, compression = tag.decode('ascii').partition('+')
+        if compression:
+            payload = _get_compression(compression)[1](payload)
+        return _get_serializer(serializer)[1](payload)
+
+
+def get_default_codec():
+    """Return the configured codec"""
+    return Codec(
+        serializer=SERIALIZER,
+        compression=COMPRESSION,
+        threshold=COMPRESSION_THRESHOLD
+    )
@@ -0,0 +1,205 @@
+# -*- encoding: utf-8 -*-
+"""Contention telemetry of the shared functions and function locks.
+
+The workers running in parallel wait each other on the shared functions
+storage locks and on the function locks. For each lock key this module
+records, in the current process:
+
+    - the number of acquisitions and the acquisitions that timed out
+    - the total and the maximum time waited to acquire the lock
+    - the total time the lock was held
+    - the shared function calls, their duration, their retries and the
+      worker that called them
+
+At session end the xdist workers send their records to the master, that
+merges them in a report of the keys sorted by total wait time, written as
+json and shown in the terminal summary.
+
+Usage::
+
+    from robottelo.decorators.func_shared import contention
+
+    with contention.measure('shared', key, storage.lock(key)) as data:
+        ...
+
+    contention.get_report(contention.get_stats())
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_FILE = 'contention_report.json'
+DEFAULT_TOP_KEYS = 10
+
+KIND_SHARED = 'shared'
+KIND_LOCK_FUNCTION = 'lock_function'
+
+
+def get_worker_id():
+    """Return the xdist worker id of this process, master when not running
+    with xdist"""
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+
+def _new_entry(kind):
+    return dict(
+        kind=kind,
+        acquisitions=0,
+        timeouts=0,
+        wait_time=0.0,
+        max_wait_time=0.0,
+        hold_time=0.0,
+        calls=0,
+        call_time=0.0,
+        retries=0,
+        workers=[],
+    )
+
+
+class ContentionRecorder(object):
+    """Thread safe, per lock key, wait and hold time records"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _get_entry(self, kind, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _new_entry(kind)
+        return entry
+
+    def record_lock(self, kind, key, wait_time, hold_time=None):
+        """Record a lock acquisition, hold_time is None if the lock was not
+        acquired"""
+        with self._lock:
+            entry = self._get_entry(kind, key)
+            entry['wait_time'] += wait_time
+            entry['max_wait_time'] = max(entry['max_wait_time'], wait_time)
+            if hold_time is None:
+                entry['timeouts'] += 1
+            else:
+                entry['acquisitions'] += 1
+                entry['hold_time'] += hold_time
+
+    def record_call(self, kind, key, call_time, retries=0):
+        """Record a function call computed by this worker"""
+        worker_id = get_worker_id()
+        with self._lock:
+            entry = self._get_entry(kind, key)
+            entry['calls'] += 1
+            entry['call_time'] += call_time
+            entry['retries'] += retries
+            if worker_id not in entry['workers']:
+                entry['workers'].append(worker_id)
+
+    def get_stats(self):
+        """Return a copy of the records as a dict of key and entry"""
+        with self._lock:
+            return {
+                key: dict(entry, workers=list(entry['workers']))
+                for key, entry in self._entries.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_recorder = ContentionRecorder()
+
+
+def get_stats():
+    """Return the contention records of this process"""
+    return _recorder.get_stats()
+
+
+def clear_stats():
+    """Clear the contention records of this process"""
+    _recorder.clear()
+
+
+def record_call(kind, key, call_time, retries=0):
+    """Record a function call computed by this worker"""
+    _recorder.record_call(kind, key, call_time, retries=retries)
+
+
+@contextmanager
+def measure(kind, key, lock_context):
+    """Enter the lock context manager and record the time waited to acquire
+    the lock and the time it was held
+
+    :param kind: the lock kind, shared or lock_function
+    :param key: the lock key
+    :param lock_context: the lock context manager
+    """
+    start = time.time()
+    acquired = None
+    try:
+        with lock_context as data:
+            acquired = time.time()
+            yield data
+    finally:
+        end = time.time()
+        if acquired is None:
+            _recorder.record_lock(kind, key, end - start)
+        else:
+            _recorder.record_lock(
+                kind, key, acquired - start, hold_time=end - acquired)
+
+
+def merge_stats(*stats_list):
+    """Merge the contention records of many workers"""
+    merged = {}
+    for stats in stats_list:
+        for key, entry in stats.items():
+            merged_entry = merged.get(key)
+            if merged_entry is None:
+                merged[key] = dict(entry, workers=list(entry['workers']))
+                continue
+            for name in ('acquisitions', 'timeouts', 'wait_time',
+                         'hold_time', 'calls', 'call_time', 'retries'):
+                merged_entry[name] += entry[name]
+            merged_entry['max_wait_time'] = max(
+                merged_entry['max_wait_time'], entry['max_wait_time'])
+            for worker_id in entry['workers']:
+                if worker_id not in merged_entry['workers']:
+                    merged_entry['workers'].append(worker_id)
+    return merged
+
+
+def get_report(stats):
+    """Return the list of the records with their key, sorted by total wait
+    time"""
+    return sorted(
+        (dict(entry, key=key) for key, entry in stats.items()),
+        key=lambda entry: entry['wait_time'],
+        reverse=True
+    )
+
+
+def write_report(stats, file_path=DEFAULT_REPORT_FILE):
+    """Write the contention report as json"""
+    with open(file_path, 'w') as file_handler:
+        json.dump(get_report(stats), file_handler, indent=2, sort_keys=True)
+
+
+def log_report(stats, log=None, top=DEFAULT_TOP_KEYS):
+    """Log the top keys by total wait time
+
+    :param log: a callable that receive a message, defaults to info logging
+    """
+    if log is None:
+        log = logger.info
+    for entry in get_report(stats)[:top]:
+        log('{kind} {key}: waited {wait_time:.3f}s (max {max_wait_time:.3f}s)'
+            ' held {hold_time:.3f}s acquisitions {acquisitions} timeouts '
+            '{timeouts} calls {calls} retries {retries} computed by '
+            '{computed_by}'.format(
+                computed_by=','.join(entry['workers']) or '-', **entry))
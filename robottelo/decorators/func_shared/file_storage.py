@@ -1,7 +1,10 @@
 # -*- encoding: utf-8 -*-
+import errno
+import fcntl
 import logging
 import os
 import tempfile
+import time
 
 from pytest_services.locks import file_lock
 
@@ -15,6 +18,12 @@ SHARED_DIR = None
 logger = logging.getLogger(__name__)
 
 LOCK_TIMEOUT = 7200
+# the lock and temporary files not modified since this number of seconds can
+# be removed by the garbage collection
+ORPHAN_MIN_AGE = 3600
+
+_LOCK_FILE_SUFFIX = '.lock'
+_TEMP_FILE_SUFFIX = '.tmp'
 
 
 def get_temp_dir():
@@ -45,10 +54,52 @@ def _get_root_dir(create=True):
     return SHARED_DIR
 
 
+def _is_process_dead(pid):
+    """Return whether the local process pid is known to be dead"""
+    try:
+        os.kill(pid, 0)
+    except OSError as err:
+        return err.errno == errno.ESRCH
+    return False
+
+
+def remove_abandoned_lock_file(file_path, min_age=ORPHAN_MIN_AGE):
+    """Remove the lock file if it is not locked, has not been modified since
+    min_age seconds and the process id it contains, if any, is dead.
+
+    Only the lock files written by :mod:`robottelo.decorators.func_locker`
+    and the storage locks contain a process id, the other lock files created
+    by pytest_services ``file_lock`` are empty and are removed by age only.
+
+    Note: a process waiting the lock since before the removal would lock the
+        removed file, the min_age makes this case very unlikely.
+
+    :return: whether the file was removed
+    """
+    try:
+        if time.time() - os.path.getmtime(file_path) < min_age:
+            return False
+        with open(file_path, 'r+') as handler:
+            try:
+                fcntl.flock(handler, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                # locked by a living process
+                return False
+            content = handler.read().strip()
+            if content.isdigit() and not _is_process_dead(int(content)):
+                return False
+            os.remove(file_path)
+    except (IOError, OSError):
+        # already removed by an other process
+        return False
+    return True
+
+
 class FileStorageHandler(BaseStorageHandler):
     """Key value file storage handler."""
 
-    def __init__(self, root_dir=None, create=True, lock_timeout=LOCK_TIMEOUT):
+    def __init__(self, root_dir=None, create=True, lock_timeout=LOCK_TIMEOUT,
+                 codec=None):
 
         if root_dir is None:
             root_dir = _get_root_dir()
@@ -58,19 +109,28 @@ class FileStorageHandler(BaseStorageHandler):
 
         self._lock_timeout = lock_timeout
         self._root_dir = root_dir
+        self._codec = codec
 
     @property
     def root_dir(self):
-        return self.root_dir()
+        return self._root_dir
 
     def get_key_file_path(self, key):
         return os.path.join(self._root_dir, key)
 
-    def lock(self, key):
-        """Return the storage locker context manager"""
+    def lock(self, key, timeout=None):
+        """Return the storage locker context manager, waiting the lock
+        release, or at most timeout seconds if supplied"""
+        operation = fcntl.LOCK_EX
+        if timeout is None:
+            timeout = self._lock_timeout
+        else:
+            # file_lock tries again every 0.5 second only if not blocked
+            operation |= fcntl.LOCK_NB
+            timeout = int(timeout * 2)
         lock_key = '{}.lock'.format(key)
         return file_lock(self.get_key_file_path(lock_key), remove=False,
-                         timeout=self._lock_timeout)
+                         timeout=timeout, operation=operation)
 
     def when_lock_acquired(self, handler):
         """Write the process id to file handler"""
@@ -86,7 +146,7 @@ class FileStorageHandler(BaseStorageHandler):
         value = None
         key_file_path = self.get_key_file_path(key)
         if os.path.exists(key_file_path):
-            with open(key_file_path, 'r') as file_handler:
+            with open(key_file_path, 'rb') as file_handler:
                 value = file_handler.read()
 
         if value is not None:
@@ -101,5 +161,56 @@ class FileStorageHandler(BaseStorageHandler):
         """
         value = self.encode(value)
         key_file_path = self.get_key_file_path(key)
-        with open(key_file_path, 'w') as file_handler:
-            file_handler.write(value)
+        # write to a temporary file and rename it, as the values are read
+        # without lock, readers must never see a partially written file
+        file_descriptor, temp_file_path = tempfile.mkstemp(
+            prefix='.{0}.'.format(key), suffix='.tmp', dir=self._root_dir)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file_handler:
+                file_handler.write(value)
+            os.rename(temp_file_path, key_file_path)
+        except Exception:
+            os.remove(temp_file_path)
+            raise
+
+    def keys(self):
+        """Return the stored values keys"""
+        if not os.path.exists(self._root_dir):
+            return []
+        return [
+            name for name in os.listdir(self._root_dir)
+            if not name.startswith('.') and
+            not name.endswith(_LOCK_FILE_SUFFIX)
+        ]
+
+    def delete(self, key):
+        """Delete the key value file"""
+        try:
+            os.remove(self.get_key_file_path(key))
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
+    def collect_locks(self, deadline=None, min_age=ORPHAN_MIN_AGE):
+        """Remove the abandoned lock files of the not stored values and the
+        temporary files of the interrupted writes"""
+        if not os.path.exists(self._root_dir):
+            return 0
+        count = 0
+        for name in os.listdir(self._root_dir):
+            if deadline is not None and time.time() >= deadline:
+                break
+            file_path = self.get_key_file_path(name)
+            if name.endswith(_LOCK_FILE_SUFFIX):
+                key_file_path = file_path[:-len(_LOCK_FILE_SUFFIX)]
+                if (not os.path.exists(key_file_path) and
+                        remove_abandoned_lock_file(file_path, min_age)):
+                    count += 1
+            elif name.startswith('.') and name.endswith(_TEMP_FILE_SUFFIX):
+                try:
+                    if time.time() - os.path.getmtime(file_path) >= min_age:
+                        os.remove(file_path)
+                        count += 1
+                except OSError:
+                    pass
+        return count
@@ -1,27 +1,265 @@
 # -*- encoding: utf-8 -*-
+"""Redis storage handler.
+
+The storage lock is a redis key set with a lease that a heartbeat thread
+renews while the lock is held, a lock abandoned by a killed process expires
+after the lease instead of the lock timeout. The lock release publishes a
+message, the processes waiting the lock are subscribed to it and try to
+acquire the lock as soon as it is released, instead of polling it.
+
+The storage lock of a key reads the key value in the same round trip as the
+lock acquisition: a waiter woken by the release gets the value stored by the
+previous holder with the lock. The value written while the lock is held is
+sent in the same round trip as the lock release.
+"""
+import logging
+import time
+import uuid
+
 try:
     import redis
+    from redis.exceptions import LockError
 except ImportError:
     redis = None
+    LockError = None
 
-from robottelo.decorators.func_shared.base import BaseStorageHandler
+from robottelo.decorators.func_shared.base import (
+    BaseStorageHandler,
+    LeaseHeartbeat,
+)
+
+logger = logging.getLogger(__name__)
 
 REDIS_HOST = 'localhost'
 REDIS_PORT = 6379
 REDIS_DB = 0
 REDIS_PASSWORD = None
 LOCK_TIMEOUT = 7200
+# the lock expire after this number of seconds if not renewed by the process
+# that hold it
+LOCK_LEASE = 60
+SHARE_TIMEOUT = 86400
+# the number of keys read or deleted in one round trip
+PIPELINE_SIZE = 100
+
+_LOCK_KEY_SUFFIX = '.lock'
+# the value of the locked key was not read with the lock or already returned
+_NOT_READ = object()
+_RELEASED_CHANNEL_SUFFIX = '.released'
+
+# delete the lock if owned by token and notify the waiters
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('del', KEYS[1])
+    redis.call('publish', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# renew the lock lease if owned by token
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# delete the values not rewritten since read and whose lock is not held, the
+# keys are the pairs of value and lock keys, the args the values read
+_COLLECT_SCRIPT = """
+local count = 0
+for index = 1, #ARGV do
+    local key = KEYS[index * 2 - 1]
+    if redis.call('exists', KEYS[index * 2]) == 0 and
+            redis.call('get', key) == ARGV[index] then
+        redis.call('del', key)
+        count = count + 1
+    end
+end
+return count
+"""
+
+
+class RedisLock(object):
+    """A redis lock with a renewed lease, the waiters are notified when the
+    lock is released.
+
+    :param client: the redis client
+    :param name: the lock key
+    :param timeout: the time in seconds to wait for acquiring the lock
+    :param lease: the time in seconds after which the lock expires if not
+        renewed
+    :param owner: a text identifying the lock owner, stored with the lock
+    :param value_key: the key of the value the lock protects, read when the
+        lock is acquired, see :meth:`pop_value` and :meth:`write_value`
+    """
+
+    def __init__(self, client, name, timeout=LOCK_TIMEOUT, lease=None,
+                 owner=None, value_key=None):
+        if lease is None:
+            lease = LOCK_LEASE
+        self._client = client
+        self._owner = owner
+        self._name = name
+        self._channel = '{0}{1}'.format(name, _RELEASED_CHANNEL_SUFFIX)
+        self._timeout = timeout
+        self._lease = lease
+        self._token = None
+        self._heartbeat = None
+        self._value_key = value_key
+        self._value = _NOT_READ
+        self._pending_write = None
+        self._release_script = client.register_script(_RELEASE_SCRIPT)
+        self._renew_script = client.register_script(_RENEW_SCRIPT)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def lease(self):
+        return self._lease
+
+    @property
+    def value_key(self):
+        return self._value_key
+
+    @property
+    def held(self):
+        """Whether the lock is held by this object"""
+        return self._token is not None
+
+    def pop_value(self):
+        """Return the raw value of value_key read when the lock was acquired,
+        ``_NOT_READ`` when not read or already returned"""
+        value, self._value = self._value, _NOT_READ
+        return value
+
+    def write_value(self, value, ex=None):
+        """Write the raw value of value_key when the lock is released, in the
+        same round trip"""
+        self._pending_write = (value, ex)
+
+    def forget_value(self):
+        """Forget the value read and the value to write"""
+        self._value = _NOT_READ
+        self._pending_write = None
+
+    def get_owner(self):
+        """Return the owner of the lock holder, None if not held or acquired
+        without owner"""
+        token = self._client.get(self._name)
+        if token is None:
+            return None
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        owner, _, _ = token.rpartition(' ')
+        return owner or None
+
+    def _try_acquire(self, token):
+        if self._value_key is None:
+            return bool(self._client.set(
+                self._name, token, nx=True, px=int(self._lease * 1000)))
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.set(self._name, token, nx=True, px=int(self._lease * 1000))
+        pipeline.get(self._value_key)
+        acquired, self._value = pipeline.execute()
+        return bool(acquired)
+
+    def acquire(self):
+        """Acquire the lock, waiting the release notifications until the
+        timeout
+
+        :return: whether the lock was acquired
+        """
+        token = uuid.uuid4().hex
+        if self._owner:
+            token = '{0} {1}'.format(self._owner, token)
+        deadline = time.time() + self._timeout
+        if not self._try_acquire(token):
+            if self._timeout <= 0:
+                return False
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            # subscribe before trying again, to not miss a release between
+            # the try and the subscription
+            pubsub.subscribe(self._channel)
+            try:
+                while not self._try_acquire(token):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    # an expired lease is not notified, try again at least
+                    # once per lease
+                    pubsub.get_message(timeout=min(remaining, self._lease))
+            finally:
+                pubsub.close()
+        self._token = token
+        self._heartbeat = LeaseHeartbeat(
+            'redis lock {0}'.format(self._name), self._lease, self.renew)
+        self._heartbeat.start()
+        return True
+
+    def renew(self):
+        """Renew the lock lease, return whether the lock is still owned"""
+        return bool(self._renew_script(
+            keys=[self._name], args=[self._token, int(self._lease * 1000)]))
+
+    def release(self):
+        """Release the lock and notify the waiters"""
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+        token, self._token = self._token, None
+        pending_write = self._pending_write
+        self.forget_value()
+        if token is None:
+            return
+        if pending_write is None:
+            self._release_script(
+                keys=[self._name, self._channel], args=[token])
+            return
+        value, ex = pending_write
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.set(self._value_key, value, ex=ex)
+        self._release_script(
+            keys=[self._name, self._channel], args=[token], client=pipeline)
+        pipeline.execute()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise LockError(
+                'Unable to acquire lock {0} within {1} seconds'.format(
+                    self._name, self._timeout))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
 
 
 class RedisStorageHandler(BaseStorageHandler):
     """Redis Key value storage handler"""
 
+    # the redis database can be shared with other applications
+    _exclusive = False
+
     def __init__(self, host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB,
-                 password=REDIS_PASSWORD, lock_timeout=LOCK_TIMEOUT):
+                 password=REDIS_PASSWORD, lock_timeout=LOCK_TIMEOUT,
+                 codec=None, lock_lease=None, share_timeout=None):
 
+        if lock_lease is None:
+            lock_lease = LOCK_LEASE
+        if share_timeout is None:
+            share_timeout = SHARE_TIMEOUT
         self._lock_timeout = lock_timeout
+        self._lock_lease = lock_lease
+        self._share_timeout = share_timeout
+        self._codec = codec
         self._client = redis.StrictRedis(
             host=host, port=port, db=db, password=password)
+        # the acquired storage locks by key
+        self._locks = {}
+        self._collect_script = self._client.register_script(_COLLECT_SCRIPT)
 
     @property
     def client(self):
@@ -32,30 +270,137 @@ class RedisStorageHandler(BaseStorageHandler):
         if timeout is None:
             timeout = self._lock_timeout
 
-        lock_key = '{}.lock'.format(key)
-        # If acquired the lock will be acquired until release
-        return self.client.lock(
-            lock_key, timeout=None, blocking_timeout=timeout)
+        lock_key = '{0}{1}'.format(key, _LOCK_KEY_SUFFIX)
+        # If acquired the lock lease is renewed until release
+        return RedisLock(
+            self.client, lock_key, timeout=timeout, lease=self._lock_lease,
+            value_key=key)
 
     def when_lock_acquired(self, lock_object):
-        # do nothing
-        pass
+        """Read and write the value of the locked key with the lock round
+        trips"""
+        self._locks[lock_object.value_key] = lock_object
+
+    def _get_held_lock(self, key):
+        lock = self._locks.get(key)
+        if lock is not None and not lock.held:
+            del self._locks[key]
+            lock = None
+        return lock
 
     def get(self, key):
-        """Return the key value
+        """Return the key value, read when the storage lock was acquired if
+        held
 
         :type key: str
         """
-        value = self.client.get(key)
+        lock = self._get_held_lock(key)
+        value = lock.pop_value() if lock is not None else _NOT_READ
+        if value is _NOT_READ:
+            value = self.client.get(key)
         if value is not None:
             value = self.decode(value)
         return value
 
     def set(self, key, value):
-        """Write the value of key
+        """Write the value of key, when the storage lock is released if held
 
         :type key: str
         :type value: object
         """
         value = self.encode(value)
-        self.client.set(key, value)
+        lock = self._get_held_lock(key)
+        # the expired values are deleted by redis
+        if lock is not None:
+            lock.write_value(value, ex=self._share_timeout)
+        else:
+            self.client.set(key, value, ex=self._share_timeout)
+
+    def _scan(self, deadline=None):
+        """Iterate over the database keys as text until deadline"""
+        for key in self.client.scan_iter(count=PIPELINE_SIZE):
+            if deadline is not None and time.time() >= deadline:
+                break
+            if isinstance(key, bytes):
+                key = key.decode('utf-8')
+            yield key
+
+    def keys(self):
+        """Return an iterator over the stored values keys"""
+        return (key for key in self._scan()
+                if not key.endswith(_LOCK_KEY_SUFFIX))
+
+    def delete(self, key):
+        """Delete the key value"""
+        lock = self._get_held_lock(key)
+        if lock is not None:
+            lock.forget_value()
+        self.client.delete(key)
+
+    def _batches(self, keys):
+        """Iterate over lists of PIPELINE_SIZE keys"""
+        batch = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= PIPELINE_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def collect(self, is_expired, deadline=None):
+        """Delete the expired values and the abandoned locks, the values are
+        read and deleted by batches in one round trip.
+
+        A value is deleted only if its storage lock is not held and it was not
+        rewritten since read, as if deleted under the storage lock.
+        """
+        values_count = 0
+        keys = (key for key in self._scan(deadline=deadline)
+                if not key.endswith(_LOCK_KEY_SUFFIX))
+        for batch in self._batches(keys):
+            expired_keys = []
+            expired_values = []
+            for key, value in zip(batch, self.client.mget(batch)):
+                if value is None:
+                    continue
+                try:
+                    if is_expired(self.decode(value)):
+                        expired_keys.extend(
+                            [key, '{0}{1}'.format(key, _LOCK_KEY_SUFFIX)])
+                        expired_values.append(value)
+                except Exception:
+                    # not a shared function value
+                    continue
+            if expired_values:
+                values_count += self._collect_script(
+                    keys=expired_keys, args=expired_values)
+        return dict(values=values_count,
+                    locks=self.collect_locks(deadline=deadline))
+
+    def collect_locks(self, deadline=None):
+        """Delete the locks not released since the lock timeout.
+
+        The locks of dead processes expire with their lease, the locks without
+        lease, created by the previous versions, that no waiter can acquire
+        anymore were abandoned by a dead process.
+        """
+        count = 0
+        keys = (key for key in self._scan(deadline=deadline)
+                if key.endswith(_LOCK_KEY_SUFFIX))
+        for batch in self._batches(keys):
+            pipeline = self.client.pipeline(transaction=False)
+            for key in batch:
+                pipeline.ttl(key)
+                pipeline.object('idletime', key)
+            results = pipeline.execute()
+            abandoned_keys = [
+                key for key, ttl, idle_time in zip(
+                    batch, results[::2], results[1::2])
+                # a negative ttl: the lock has no lease
+                if ttl is not None and ttl < 0 and
+                idle_time is not None and idle_time > self._lock_timeout
+            ]
+            if abandoned_keys:
+                count += self.client.delete(*abandoned_keys)
+        return count
@@ -3,8 +3,12 @@
 the results to storage, any ulterior call from the same or other processes will
 return the stored results, which make the shared function results persistent.
 
-Note: Shared function store it's data as json. The results of the decorated
-    function must be json compatible.
+Note: Shared function store it's data as json, or msgpack if configured. The
+    results of the decorated function must be json compatible.
+
+Note: Once a shared function result is ready, the next calls from the same
+    process return a copy of it from an in process cache, until the result
+    expires, see :func:`get_stats` for the cache statistics.
 
 Usage::
 
@@ -85,14 +89,16 @@ Usage::
 
             return dict(org=cls.org, repo=cls.repo}
 """
+import copy
 import datetime
 import functools
 import hashlib
 import import_string
-import inspect
 import logging
 import os
 import sys
+import threading
+import time
 import traceback
 import uuid
 
@@ -100,16 +106,23 @@ from nailgun.entities import Entity
 
 from robottelo.config import settings
 from robottelo.decorators import setting_is_set
+from robottelo.decorators.func_shared import codec
+from robottelo.decorators.func_shared import contention
 from robottelo.decorators.func_shared import file_storage
 from robottelo.decorators.func_shared import redis_storage
+from robottelo.decorators.func_shared import sqlite_storage
 from robottelo.decorators.func_shared.file_storage import FileStorageHandler
 from robottelo.decorators.func_shared.redis_storage import RedisStorageHandler
+from robottelo.decorators.func_shared.sqlite_storage import (
+    SQLiteStorageHandler,
+)
 
 logger = logging.getLogger(__name__)
 
 _storage_handlers = {
     'file': FileStorageHandler,
-    'redis': RedisStorageHandler
+    'redis': RedisStorageHandler,
+    'sqlite': SQLiteStorageHandler,
 }
 
 DEFAULT_STORAGE_HANDLER = 'file'
@@ -121,6 +134,9 @@ SHARE_DEFAULT_TIMEOUT = 86400
 DEFAULT_CALL_RETRIES = 2
 
 _configured = False
+# the settings forced by enable_shared_function and set_default_scope, the
+# configuration read later at call time does not override them
+_forced_settings = set()
 
 _NAMESPACE_SCOPE_KEY_TYPE = 'shared_function'
 _DEFAULT_CLASS_NAME_DEPTH = 3
@@ -132,6 +148,72 @@ _DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
 
 _SERVER_CERT_MD5 = None
 
+# the shared functions declared with warmup=True
+_warmup_functions = []
+
+
+class _L1Cache(object):
+    """In process cache of the terminated shared function values.
+
+    Once a shared function result is ready, the next calls from the same
+    process return it without taking the storage lock and reading the
+    storage, until the value expires. The failed calls are not cached, the
+    next calls read the storage, where the value may have been replaced.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._counters = {}
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            value = self._values.get(key)
+        # the caller may modify the result
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = copy.deepcopy(value)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._counters.update(l1_hits=0, storage_hits=0, executions=0)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._values))
+
+
+_l1_cache = _L1Cache()
+
+
+def get_stats():
+    """Return the shared functions calls statistics of the current process.
+
+    :return: a dict with the number of values returned from the in process
+        cache ``l1_hits``, from the storage ``storage_hits``, the number of
+        function ``executions`` and the number of cached ``entries``.
+    """
+    return _l1_cache.get_stats()
+
+
+def clear_cache():
+    """Clear the in process cache of shared function values and reset the
+    statistics
+    """
+    _l1_cache.clear()
+
 
 def _set_configured(value):
     global _configured
@@ -147,8 +229,10 @@ def _check_config():
     global DEFAULT_CALL_RETRIES
     if not _configured and setting_is_set('shared_function'):
         DEFAULT_STORAGE_HANDLER = settings.shared_function.storage
-        ENABLED = settings.shared_function.enabled
-        NAMESPACE_SCOPE = settings.shared_function.scope
+        if 'ENABLED' not in _forced_settings:
+            ENABLED = settings.shared_function.enabled
+        if 'NAMESPACE_SCOPE' not in _forced_settings:
+            NAMESPACE_SCOPE = settings.shared_function.scope
         SHARE_DEFAULT_TIMEOUT = settings.shared_function.share_timeout
         DEFAULT_CALL_RETRIES = settings.shared_function.call_retries
         file_storage.LOCK_TIMEOUT = settings.shared_function.lock_timeout
@@ -157,15 +241,42 @@ def _check_config():
         redis_storage.REDIS_PORT = settings.shared_function.redis_port
         redis_storage.REDIS_DB = settings.shared_function.redis_db
         redis_storage.REDIS_PASSWORD = settings.shared_function.redis_password
+        redis_storage.LOCK_LEASE = settings.shared_function.redis_lock_lease
+        redis_storage.SHARE_TIMEOUT = settings.shared_function.share_timeout
+        sqlite_storage.LOCK_TIMEOUT = settings.shared_function.lock_timeout
+        sqlite_storage.LOCK_LEASE = settings.shared_function.sqlite_lock_lease
+        sqlite_storage.SHARE_TIMEOUT = settings.shared_function.share_timeout
+        codec.SERIALIZER = settings.shared_function.serializer
+        codec.COMPRESSION = settings.shared_function.compression
+        codec.COMPRESSION_THRESHOLD = (
+            settings.shared_function.compression_threshold)
         _set_configured(True)
 
 
+def is_enabled():
+    """Return whether the shared functions results are shared"""
+    _check_config()
+    return ENABLED
+
+
+def get_share_timeout():
+    """Return the default number of seconds the values are valid"""
+    _check_config()
+    return SHARE_DEFAULT_TIMEOUT
+
+
+def get_warmup_functions():
+    """Return the shared functions declared with warmup=True"""
+    return list(_warmup_functions)
+
+
 def enable_shared_function(value):
     """force and override settings, by setting the global use shared data
     attribute
     """
     global ENABLED
     ENABLED = bool(value)
+    _forced_settings.add('ENABLED')
 
 
 def set_default_scope(value):
@@ -174,6 +285,7 @@ def set_default_scope(value):
     """
     global NAMESPACE_SCOPE
     NAMESPACE_SCOPE = value
+    _forced_settings.add('NAMESPACE_SCOPE')
 
 
 def _get_default_scope():
@@ -269,6 +381,8 @@ class _SharedFunction(object):
         exp = None
         result = None
         traceback_text = None
+        start = time.time()
+        retry_index = 0
         for retry_index in range(retries):
             exp = None
             traceback_text = None
@@ -289,6 +403,9 @@ class _SharedFunction(object):
                 _, _, traceback_ = sys.exc_info()
                 traceback_text = ''.join(traceback.format_tb(traceback_))
 
+        contention.record_call(
+            contention.KIND_SHARED, self._function_key, time.time() - start,
+            retries=retry_index)
         return result, exp, traceback_text
 
     def _has_result_expired(self, creation_datetime):
@@ -300,67 +417,92 @@ class _SharedFunction(object):
 
         return False
 
-    def __call__(self):
+    def _is_value_valid(self, value):
+        """Return whether the stored value is a terminated call that has not
+        expired"""
+        if value is None:
+            return False
+        if value['state'] not in [_STATE_READY, _STATE_FAILED]:
+            return False
+        creation_datetime = datetime.datetime.strptime(
+            value['creation_datetime'], _DATETIME_FORMAT)
+        return not self._has_result_expired(creation_datetime)
+
+    def _get_stored_value(self):
+        """Return the valid stored value or call the function and store its
+        result
+
+        :return: a tuple of the value and the exception raised by the function
+            if it was called in this process
+        """
         # this lock prevent any other process to run the function,
         # and if an other process is running the function, I should wait it
         # to finish
         # note: when results are ready this lock has a very short time
-        with self.storage.lock(self.key) as data:
+        with contention.measure(contention.KIND_SHARED, self.key,
+                                self.storage.lock(self.key)) as data:
             self.storage.when_lock_acquired(data)
-            # first must investigate, call the function or use the results
-            result = None
-            error = None
-            traceback_text = ''
-            error_class_name = None
-            exp = None
-            pid = None
+            # read again, an other process may have stored the value while
+            # this one was waiting for the lock
             value = self.storage.get(self.key)
-            if value is None:
-                call_function = True
+            if self._is_value_valid(value):
+                _l1_cache.count('storage_hits')
+                return value, None
+
+            _l1_cache.count('executions')
+            result, exp, traceback_text = self._call_function()
+            creation_datetime = datetime.datetime.utcnow().strftime(
+                _DATETIME_FORMAT)
+            if exp:
+                error = str(exp) or 'error occurred'
+                error_class_name = '{0}.{1}'.format(
+                    exp.__class__.__module__, exp.__class__.__name__)
+                value = dict(state=_STATE_FAILED,
+                             id=self.transaction,
+                             result=None,
+                             error=error,
+                             error_class_name=error_class_name,
+                             traceback=traceback_text,
+                             pid=os.getpid(),
+                             creation_datetime=creation_datetime
+                             )
             else:
-                state = value['state']
-                result = value['result']
-                error = value['error']
-                traceback_text = value.get('traceback', '')
-                error_class_name = value.get('error_class_name')
-                pid = value['pid']
-                creation_datetime = datetime.datetime.strptime(
-                    value['creation_datetime'], _DATETIME_FORMAT)
-
-                if (state in [_STATE_READY, _STATE_FAILED]
-                        and not self._has_result_expired(creation_datetime)):
-                    call_function = False
-                else:
-                    call_function = True
-
-            if call_function is True:
-                result, exp, traceback_text = self._call_function()
-                creation_datetime = datetime.datetime.utcnow().strftime(
-                    _DATETIME_FORMAT)
-                if exp:
-                    error = str(exp) or 'error occurred'
-                    error_class_name = '{0}.{1}'.format(
-                        exp.__class__.__module__, exp.__class__.__name__)
-                    value = dict(state=_STATE_FAILED,
-                                 id=self.transaction,
-                                 result=None,
-                                 error=error,
-                                 error_class_name=error_class_name,
-                                 traceback=traceback_text,
-                                 pid=os.getpid(),
-                                 creation_datetime=creation_datetime
-                                 )
-                else:
-                    error = None
-                    result = self._encode_result_kwargs(result)
-                    value = dict(state=_STATE_READY,
-                                 id=self.transaction,
-                                 result=result,
-                                 error=error,
-                                 pid=os.getpid(),
-                                 creation_datetime=creation_datetime
-                                 )
-                self.storage.set(self.key, value)
+                result = self._encode_result_kwargs(result)
+                value = dict(state=_STATE_READY,
+                             id=self.transaction,
+                             result=result,
+                             error=None,
+                             pid=os.getpid(),
+                             creation_datetime=creation_datetime
+                             )
+            self.storage.set(self.key, value)
+            return value, exp
+
+    def __call__(self):
+        exp = None
+        value = _l1_cache.get(self.key)
+        if self._is_value_valid(value):
+            _l1_cache.count('l1_hits')
+            call_function = False
+        else:
+            # optimistic read, the storage lock is needed only to call the
+            # function when the stored value is not ready or has expired
+            value = self.storage.get(self.key)
+            if self._is_value_valid(value):
+                _l1_cache.count('storage_hits')
+            else:
+                value, exp = self._get_stored_value()
+            # the function was called by this object if the value has its
+            # transaction id
+            call_function = value['id'] == self.transaction
+            if value['state'] == _STATE_READY:
+                _l1_cache.set(self.key, value)
+
+        result = value['result']
+        error = value['error']
+        traceback_text = value.get('traceback', '')
+        error_class_name = value.get('error_class_name')
+        pid = value['pid']
 
         if call_function and exp:
             # i'am in the first launched process
@@ -454,6 +596,29 @@ def _get_scope_name(scope=None, scope_kwargs=None, scope_context=None):
     return scope_name
 
 
+def _get_class_name(depth=_DEFAULT_CLASS_NAME_DEPTH):
+    """Return the dotted names of the classes where the decorated function is
+    defined, the names of the frames calling the decorator.
+
+    note: the frames are walked with sys._getframe, inspect.getouterframes
+        reads the source context of all the stack frames, for each decorated
+        function at import time.
+
+    :param depth: the decorator frame depth, only depth - 1 names are returned
+    """
+    class_names = []
+    # the frame of the decorator caller
+    frame = sys._getframe(2)
+    while frame is not None and len(class_names) < depth - 1:
+        name = frame.f_code.co_name
+        if name == '<module>':
+            break
+        class_names.append(name)
+        frame = frame.f_back
+    class_names.reverse()
+    return '.'.join(class_names)
+
+
 def _get_function_name(function, class_name=None, kwargs=None):
     """Return a string representation of the function as
     module_path.Class_name.function_name
@@ -486,7 +651,7 @@ def _get_function_name_key(function_name, scope=None, scope_kwargs=None,
 def shared(function_=None, scope=_get_default_scope, scope_context=None,
            scope_kwargs=None, timeout=SHARE_DEFAULT_TIMEOUT,
            retries=DEFAULT_CALL_RETRIES, function_kw=None,
-           inject=False, injected_kw='_injected'):
+           inject=False, injected_kw='_injected', warmup=False):
     """Generic function sharing, share the results of any decorated function.
     Any parallel pytest xdist worker will wait for this function to finish
 
@@ -499,6 +664,7 @@ def shared(function_=None, scope=_get_default_scope, scope_context=None,
     :type function_kw: list
     :type inject: bool
     :type injected_kw: str
+    :type warmup: bool
 
     :param function_: the function that is intended to be shared
     :param scope: this parameter will define the namespace of data sharing
@@ -516,41 +682,41 @@ def shared(function_=None, scope=_get_default_scope, scope_context=None,
         **kwargs
     :param injected_kw: the kw arg to set to True to inform the function that
         the kwargs was injected from a saved storage
+    :param warmup: whether to call the function in background right after the
+        tests collection when used by the collected tests, the function must
+        be callable without arguments, see
+        :mod:`robottelo.decorators.func_shared.warmup`
     """
-    _check_config()
-    class_names = []
-    class_name = None
-    index = 1
-    while class_name != '<module>' and index <= _DEFAULT_CLASS_NAME_DEPTH:
-        if class_name:
-            class_names.append(class_name)
-        class_name = inspect.getouterframes(inspect.currentframe())[index][3]
-        index += 1
-    class_names.reverse()
-    class_name = '.'.join(class_names)
+    class_name = _get_class_name()
     if function_kw is None:
         function_kw = []
 
     def main_wrapper(func):
 
-        @functools.wraps(func)
-        def function_wrapper(*args, **kwargs):
+        def get_function_name_key(kwargs):
             function_kw_scope = {
                 key: kwargs.get(key) for key in function_kw}
             function_name = _get_function_name(
                 func, class_name=class_name, kwargs=function_kw_scope)
-            if not ENABLED:
-                # if disabled call the function immediately
-                return func(*args, **kwargs)
-
-            function_name_key = _get_function_name_key(
+            return _get_function_name_key(
                 function_name,
                 scope=scope,
                 scope_kwargs=scope_kwargs,
                 scope_context=scope_context
             )
+
+        @functools.wraps(func)
+        def function_wrapper(*args, **kwargs):
+            # the configuration is read at call time, modules using shared
+            # functions can be imported before robottelo is configured, the
+            # settings already forced by the tests are kept
+            _check_config()
+            if not ENABLED:
+                # if disabled call the function immediately
+                return func(*args, **kwargs)
+
             shared_object = _SharedFunction(
-                function_name_key,
+                get_function_name_key(kwargs),
                 func,
                 args=args,
                 kwargs=kwargs,
@@ -562,6 +728,26 @@ def shared(function_=None, scope=_get_default_scope, scope_context=None,
 
             return shared_object()
 
+        def invalidate(**kwargs):
+            """Forget the stored value of the call with these kwargs, the
+            next call runs the function again and stores its result"""
+            _check_config()
+            if not ENABLED:
+                return
+            key = get_function_name_key(kwargs)
+            _l1_cache.delete(key)
+            storage = _get_default_storage_handler()
+            with storage.lock(key) as data:
+                storage.when_lock_acquired(data)
+                storage.delete(key)
+
+        setattr(function_wrapper, '__class_name__', class_name)
+        setattr(function_wrapper, '__shared_key__',
+                _get_function_name(func, class_name=class_name))
+        setattr(function_wrapper, 'invalidate', invalidate)
+        if warmup:
+            _warmup_functions.append(function_wrapper)
+
         return function_wrapper
 
     def wait_function(func):
@@ -0,0 +1,378 @@
+# -*- encoding: utf-8 -*-
+"""SQLite storage of the shared functions values and of the function locks.
+
+All the values and locks are rows of a single database in WAL mode, readers
+never wait for writers. A lock is a row of the ``locks`` table claimed in an
+immediate transaction, the claim is granted when the row does not exist, has
+expired or is owned by a dead process of the same host. A lock held with
+:func:`lock` has a short lease that a heartbeat thread renews until the
+release, the lock of a killed process of an other host expires after the
+lease instead of the lock timeout.
+
+The database is created by default in the robottelo temporary directory, the
+``sqlite_path`` option of the ``[shared_function]`` section can be used to put
+it on a local file system, as SQLite WAL mode does not work over NFS.
+"""
+import errno
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+
+from robottelo.config import settings
+from robottelo.decorators.func_shared.base import (
+    BaseStorageHandler,
+    LeaseHeartbeat,
+)
+from robottelo.decorators.func_shared.codec import Codec
+from robottelo.decorators.func_shared.file_storage import (
+    TEMP_ROOT_DIR,
+    get_temp_dir,
+)
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILE_NAME = 'storage.sqlite'
+LOCK_TIMEOUT = 7200
+# the lock held with lock() expire after this number of seconds if not renewed
+# by the process that hold it
+LOCK_LEASE = 60
+SHARE_TIMEOUT = 86400
+# the time in seconds to wait between two lock claims
+LOCK_POLL_INTERVAL = 0.1
+# the time in seconds sqlite wait for an other connection transaction
+_BUSY_TIMEOUT = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_values (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    expire_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shared_values_expire_at
+    ON shared_values (expire_at);
+CREATE TABLE IF NOT EXISTS locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    acquired_at REAL NOT NULL,
+    expire_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS locks_expire_at ON locks (expire_at);
+"""
+
+_connections = threading.local()
+
+
+class SQLiteLockError(Exception):
+    """Raised when a lock can not be acquired in time"""
+
+
+def get_database_path():
+    """Return the configured database path or the default one"""
+    if settings.configured and settings.shared_function.sqlite_path:
+        return settings.shared_function.sqlite_path
+    return os.path.join(get_temp_dir(), TEMP_ROOT_DIR, DATABASE_FILE_NAME)
+
+
+def get_connection(database_path=None):
+    """Return the database connection of the current process and thread, the
+    connections can not be shared between threads and processes.
+    """
+    if database_path is None:
+        database_path = get_database_path()
+    key = (os.getpid(), database_path)
+    connections = getattr(_connections, 'connections', None)
+    if connections is None:
+        connections = _connections.connections = {}
+    connection = connections.get(key)
+    if connection is None:
+        database_dir = os.path.dirname(database_path)
+        if database_dir and not os.path.exists(database_dir):
+            try:
+                os.makedirs(database_dir)
+            except OSError:
+                if not os.path.exists(database_dir):
+                    raise
+        # transactions are explicitly started when needed
+        connection = sqlite3.connect(
+            database_path, timeout=_BUSY_TIMEOUT, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        # the workers may create the schema at the same time
+        with _transaction(connection):
+            for statement in _SCHEMA.split(';'):
+                connection.execute(statement)
+        connections[key] = connection
+    return connection
+
+
+def _is_process_dead(hostname, pid):
+    """Return whether the process pid of hostname is known to be dead"""
+    if hostname != socket.gethostname():
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError as err:
+        return err.errno == errno.ESRCH
+    return False
+
+
+@contextmanager
+def _transaction(connection):
+    """Run an immediate transaction, only one writer at a time"""
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        yield connection
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def claim_lock(key, lease=None, database_path=None):
+    """Try to claim the lock key for the current process.
+
+    :param key: the lock key
+    :param lease: the time in seconds after which the lock is considered
+        abandoned, by default ``LOCK_TIMEOUT``
+    :return: the owner token of the lock or None if the lock is held by an
+        other owner
+    """
+    if lease is None:
+        lease = LOCK_TIMEOUT
+    now = time.time()
+    owner = uuid.uuid4().hex
+    with _transaction(get_connection(database_path)) as connection:
+        row = connection.execute(
+            'SELECT hostname, pid, expire_at FROM locks WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is not None:
+            hostname, pid, expire_at = row
+            if expire_at > now and not _is_process_dead(hostname, pid):
+                return None
+            logger.warning(
+                'reclaiming lock {0} of process {1} on {2}'
+                .format(key, pid, hostname)
+            )
+        connection.execute(
+            'INSERT OR REPLACE INTO locks '
+            '(key, owner, hostname, pid, acquired_at, expire_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, owner, socket.gethostname(), os.getpid(), now, now + lease)
+        )
+    return owner
+
+
+def renew_lock(key, owner, lease, database_path=None):
+    """Renew the lease of the lock key if still owned by owner
+
+    :return: whether the lock is still owned
+    """
+    return get_connection(database_path).execute(
+        'UPDATE locks SET expire_at = ? WHERE key = ? AND owner = ?',
+        (time.time() + lease, key, owner)
+    ).rowcount == 1
+
+
+def release_lock(key, owner, database_path=None):
+    """Release the lock key if still owned by owner"""
+    get_connection(database_path).execute(
+        'DELETE FROM locks WHERE key = ? AND owner = ?', (key, owner))
+
+
+def get_lock_pid(key, database_path=None):
+    """Return the pid of the local process that holds the lock key or None"""
+    row = get_connection(database_path).execute(
+        'SELECT hostname, pid FROM locks WHERE key = ? AND expire_at > ?',
+        (key, time.time())
+    ).fetchone()
+    if row is not None and row[0] == socket.gethostname():
+        return row[1]
+    return None
+
+
+@contextmanager
+def lock(key, timeout=None, lease=None, database_path=None):
+    """Hold the lock key, waiting at most timeout seconds to acquire it, its
+    lease is renewed until released.
+
+    :raise SQLiteLockError: when the lock was not acquired in time
+    """
+    if timeout is None:
+        timeout = LOCK_TIMEOUT
+    if lease is None:
+        lease = LOCK_LEASE
+    deadline = time.time() + timeout
+    owner = claim_lock(key, lease=lease, database_path=database_path)
+    while owner is None:
+        if time.time() > deadline:
+            raise SQLiteLockError(
+                'Not able to acquire lock {0} in {1}'.format(key, timeout))
+        time.sleep(LOCK_POLL_INTERVAL)
+        owner = claim_lock(key, lease=lease, database_path=database_path)
+    heartbeat = LeaseHeartbeat(
+        'sqlite lock {0}'.format(key), lease,
+        lambda: renew_lock(key, owner, lease, database_path=database_path)
+    )
+    heartbeat.start()
+    try:
+        yield owner
+    finally:
+        heartbeat.stop()
+        release_lock(key, owner, database_path=database_path)
+
+
+def cleanup(database_path=None):
+    """Delete the expired values, and the expired locks or the locks of dead
+    processes.
+
+    :return: a dict with the number of deleted ``values`` and ``locks``
+    """
+    now = time.time()
+    with _transaction(get_connection(database_path)) as connection:
+        values_count = connection.execute(
+            'DELETE FROM shared_values WHERE expire_at <= ?', (now,)
+        ).rowcount
+        locks_count = connection.execute(
+            'DELETE FROM locks WHERE expire_at <= ?', (now,)).rowcount
+        dead_locks = [
+            (key, owner) for key, owner, hostname, pid in connection.execute(
+                'SELECT key, owner, hostname, pid FROM locks')
+            if _is_process_dead(hostname, pid)
+        ]
+        connection.executemany(
+            'DELETE FROM locks WHERE key = ? AND owner = ?', dead_locks)
+    return dict(values=values_count, locks=locks_count + len(dead_locks))
+
+
+class SQLiteStorageHandler(BaseStorageHandler):
+    """Key value SQLite storage handler"""
+
+    def __init__(self, database_path=None, lock_timeout=None,
+                 share_timeout=None, codec=None, lock_lease=None):
+        if database_path is None:
+            database_path = get_database_path()
+        if lock_timeout is None:
+            lock_timeout = LOCK_TIMEOUT
+        if lock_lease is None:
+            lock_lease = LOCK_LEASE
+        if share_timeout is None:
+            share_timeout = SHARE_TIMEOUT
+        self._database_path = database_path
+        self._lock_timeout = lock_timeout
+        self._lock_lease = lock_lease
+        self._share_timeout = share_timeout
+        self._codec = codec
+
+    @property
+    def database_path(self):
+        return self._database_path
+
+    def lock(self, key, timeout=None):
+        """Return the storage locker context manager"""
+        if timeout is None:
+            timeout = self._lock_timeout
+        return lock(
+            '{}.lock'.format(key),
+            timeout=timeout,
+            lease=self._lock_lease,
+            database_path=self._database_path
+        )
+
+    def when_lock_acquired(self, owner):
+        # do nothing, the lock row already contains the process id
+        pass
+
+    def get(self, key):
+        """Return the key value
+
+        :type key: str
+        """
+        row = get_connection(self._database_path).execute(
+            'SELECT value FROM shared_values WHERE key = ? AND expire_at > ?',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return self.decode(bytes(row[0]))
+
+    def set(self, key, value):
+        """Write the value of key
+
+        :type key: str
+        :type value: object
+        """
+        now = time.time()
+        get_connection(self._database_path).execute(
+            'INSERT OR REPLACE INTO shared_values '
+            '(key, value, created_at, expire_at) VALUES (?, ?, ?, ?)',
+            (key, sqlite3.Binary(self.encode(value)), now,
+             now + self._share_timeout)
+        )
+
+    def keys(self):
+        """Return the stored values keys"""
+        return [
+            row[0] for row in get_connection(self._database_path).execute(
+                'SELECT key FROM shared_values')
+        ]
+
+    def delete(self, key):
+        """Delete the key value"""
+        get_connection(self._database_path).execute(
+            'DELETE FROM shared_values WHERE key = ?', (key,))
+
+    def cleanup(self):
+        """Delete the expired values and the abandoned locks"""
+        return cleanup(database_path=self._database_path)
+
+    def collect(self, is_expired, deadline=None):
+        """Delete the expired values and the abandoned locks, then scan the
+        remaining values"""
+        deleted = self.cleanup()
+        scanned = super(SQLiteStorageHandler, self).collect(
+            is_expired, deadline=deadline)
+        return dict(values=deleted['values'] + scanned['values'],
+                    locks=deleted['locks'] + scanned['locks'])
+
+
+def migrate_file_storage(root_dir, database_path=None, remove=False):
+    """Import the values of a file storage directory in the database.
+
+    The file values are decoded whatever the codec that encoded them, plain
+    json or tagged msgpack or compressed values, and stored with the database
+    codec.
+
+    :param root_dir: the file storage root directory
+    :param remove: whether to remove the imported value and lock files
+    :return: the number of imported values
+    """
+    storage = SQLiteStorageHandler(database_path=database_path)
+    count = 0
+    for file_name in sorted(os.listdir(root_dir)):
+        file_path = os.path.join(root_dir, file_name)
+        if file_name.startswith('.') or not os.path.isfile(file_path):
+            continue
+        if not file_name.endswith('.lock'):
+            with open(file_path, 'rb') as file_handler:
+                try:
+                    value = Codec.decode(file_handler.read())
+                except Exception:
+                    # not written by the shared functions or corrupted
+                    logger.warning(
+                        'not a shared function value: {0}'.format(file_path))
+                    continue
+            storage.set(file_name, value)
+            count += 1
+        if remove:
+            os.remove(file_path)
+    return count
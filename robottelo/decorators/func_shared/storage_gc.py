@@ -0,0 +1,130 @@
+# -*- encoding: utf-8 -*-
+"""Garbage collection of the shared functions storage and the function locks.
+
+The shared functions values are only replaced when the same function is
+called again, the values of the functions not called anymore, the locks and
+lock files abandoned by killed processes stay in the storage forever. The
+garbage collection scans the storage and deletes:
+
+    - the expired values and the values that cannot be decoded, checked
+      again under their storage lock, the values being computed are kept
+    - the lock files and redis locks abandoned by dead processes; the dead
+      process id check applies only to the lock files that contain one,
+      written by func_locker or the file storage lock, the empty lock files
+      created by pytest_services ``file_lock`` are reclaimed by age only,
+      when not locked and not modified since ``ORPHAN_MIN_AGE`` seconds
+    - the temporary files of the interrupted file storage writes
+    - the function locks not locked and whose process is dead, in the
+      configured locks storage: the lock files, the sqlite locks rows or the
+      redis locks without lease
+
+The storage is scanned by the storage handler ``collect(is_expired,
+deadline)`` method. The default implementation of
+:class:`robottelo.decorators.func_shared.base.BaseStorageHandler` uses only the
+``keys``, ``get``, ``delete`` and ``collect_locks`` methods, so any storage
+handler implementing them is supported; the sqlite and redis handlers
+override it to scan in batches.
+
+Usage::
+
+    from robottelo.decorators.func_shared import storage_gc
+
+    # stop scanning after 10 seconds
+    storage_gc.collect(time_budget=10)
+
+The collection can also run at tests session start, see the shared_function
+``gc_on_start`` and ``gc_time_budget`` settings, and from command line::
+
+    $ manage shared cleanup
+"""
+import datetime
+import logging
+import os
+import time
+
+from robottelo.decorators import func_locker
+from robottelo.decorators.func_shared import redis_storage, sqlite_storage
+from robottelo.decorators.func_shared.file_storage import (
+    ORPHAN_MIN_AGE,
+    remove_abandoned_lock_file,
+)
+from robottelo.decorators.func_shared.shared import (
+    _DATETIME_FORMAT,
+    _check_config,
+    _get_default_storage_handler,
+    get_share_timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_value_expired(value, timeout=None):
+    """Return whether the stored value has expired
+
+    :param value: a decoded shared function value
+    :param timeout: the share timeout, by default the configured one
+    """
+    if timeout is None:
+        timeout = get_share_timeout()
+    creation_datetime = datetime.datetime.strptime(
+        value['creation_datetime'], _DATETIME_FORMAT)
+    expire_datetime = creation_datetime + datetime.timedelta(seconds=timeout)
+    return datetime.datetime.utcnow() >= expire_datetime
+
+
+def collect_function_locks(deadline=None, min_age=ORPHAN_MIN_AGE):
+    """Delete the abandoned function locks of the configured locks storage
+
+    :return: the number of deleted locks
+    """
+    lock_storage = func_locker._get_lock_storage()
+    if lock_storage == 'sqlite':
+        return sqlite_storage.cleanup()['locks']
+    if lock_storage == 'redis':
+        # the locks of dead processes expire with their lease, only the locks
+        # without lease created by the previous versions are left
+        return redis_storage.RedisStorageHandler().collect_locks(
+            deadline=deadline)
+    lock_dir = func_locker._get_temp_lock_function_dir(create=False)
+    if not os.path.exists(lock_dir):
+        return 0
+    count = 0
+    lock_file_suffix = '.{0}'.format(func_locker.LOCK_FILE_NAME_EXT)
+    for dir_path, _, file_names in os.walk(lock_dir):
+        for file_name in file_names:
+            if deadline is not None and time.time() >= deadline:
+                return count
+            if not file_name.endswith(lock_file_suffix):
+                continue
+            if remove_abandoned_lock_file(
+                    os.path.join(dir_path, file_name), min_age=min_age):
+                count += 1
+    return count
+
+
+def collect(storage=None, time_budget=None):
+    """Delete the expired values and the abandoned locks of the storage and
+    the abandoned function locks.
+
+    :param storage: the storage handler, by default the configured one
+    :param time_budget: the maximum number of seconds to scan, the remaining
+        entries are collected the next time, by default no limit
+    :return: a dict with the number of deleted ``values``, ``locks`` and
+        ``function_locks`` and the ``duration`` in seconds
+    """
+    if storage is None:
+        _check_config()
+        storage = _get_default_storage_handler()
+    start = time.time()
+    deadline = None
+    if time_budget is not None:
+        deadline = start + time_budget
+    result = storage.collect(is_value_expired, deadline=deadline)
+    result['function_locks'] = collect_function_locks(deadline=deadline)
+    result['duration'] = time.time() - start
+    logger.info(
+        'shared storage garbage collection: deleted values: {values}, '
+        'locks: {locks}, function locks: {function_locks} in '
+        '{duration:.3f}s'.format(**result)
+    )
+    return result
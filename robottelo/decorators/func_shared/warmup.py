@@ -0,0 +1,205 @@
+# -*- encoding: utf-8 -*-
+"""Warmup of the shared functions at session start.
+
+The shared setup functions run lazily, when the first test that needs them
+starts, and the other workers wait for the result at the same moment. The
+shared functions declared with ``warmup=True`` and used by the collected tests
+are started in background right after the tests collection, so their results
+are, most of the time, ready when the tests need them.
+
+The warmup runs once per session: in the single pytest process, or in the
+first xdist worker only, the xdist master does not collect the tests. The
+tests of the warmup process wait for the warmup of the functions they use
+before starting, see :meth:`SharedWarmup.wait_for_items`; the tests of the
+other workers calling a function being warmed up wait for its result on the
+shared storage lock.
+
+A shared function is used by the collected tests when it is a module
+attribute of a collected test module, or a class method or static method of a
+collected test class. The warmup functions must be callable without
+arguments.
+
+The warmup functions run in threads while the tests run in the main thread,
+the entity tasks they wait are polled by :mod:`robottelo.api.tasks`, see
+:func:`robottelo.api.tasks.install_thread_safe_polling`.
+
+Usage::
+
+    @shared(warmup=True)
+    def upload_manifest():
+        ...
+
+    class SomeTestCase(TestCase):
+
+        @classmethod
+        @shared(warmup=True)
+        def setUpClass(cls):
+            ...
+
+Note: as the results are shared, the warmup is started only when the shared
+    functions are enabled.
+"""
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from robottelo.api.tasks import install_thread_safe_polling
+from robottelo.decorators.func_shared.shared import (
+    _get_function_name,
+    get_warmup_functions,
+    is_enabled,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+# the xdist worker that runs the warmup
+WARMUP_WORKER_ID = 'gw0'
+
+_STATUS_READY = 'ready'
+_STATUS_FAILED = 'failed'
+
+
+def _get_name(function):
+    return _get_function_name(
+        function, class_name=getattr(function, '__class_name__', None))
+
+
+def get_used_warmup_functions(items):
+    """Return the warmup functions used by the collected test items.
+
+    :param items: the collected pytest items
+    :return: an ordered dict of function names and callables
+    """
+    # the registered functions are alive, their ids are unique
+    warmup_functions = {
+        id(function) for function in get_warmup_functions()}
+    used_functions = OrderedDict()
+    if not warmup_functions:
+        return used_functions
+    visited = set()
+    for item in items:
+        module = getattr(item, 'module', None)
+        if module is not None and module not in visited:
+            visited.add(module)
+            for value in vars(module).values():
+                if id(value) in warmup_functions:
+                    used_functions[_get_name(value)] = value
+        cls = getattr(item, 'cls', None)
+        if cls is not None and cls not in visited:
+            visited.add(cls)
+            for klass in cls.__mro__:
+                for name, value in vars(klass).items():
+                    if not isinstance(value, (classmethod, staticmethod)):
+                        continue
+                    if id(value.__func__) in warmup_functions:
+                        used_functions[_get_name(value.__func__)] = getattr(
+                            cls, name)
+    return used_functions
+
+
+class SharedWarmup(object):
+    """Call the warmup functions concurrently in background threads
+
+    :param functions: a dict of function names and callables
+    :param max_workers: the number of functions called at the same time
+    """
+
+    def __init__(self, functions, max_workers=DEFAULT_MAX_WORKERS):
+        self._functions = functions
+        self._max_workers = max_workers
+        self._pool = None
+        self._durations = OrderedDict()
+        self._finished = {name: threading.Event() for name in functions}
+
+    def _call(self, name, function):
+        start = time.time()
+        status = _STATUS_READY
+        try:
+            function()
+        except Exception as err:
+            # the tests that need the function will get the error
+            status = _STATUS_FAILED
+            logger.exception(err)
+        self._durations[name] = (time.time() - start, status)
+        self._finished[name].set()
+
+    def start(self):
+        """Start calling the functions in background"""
+        if self._pool is not None or not self._functions:
+            return
+        # nailgun would interrupt the main thread running the tests when a
+        # task waited by a warmup function times out
+        install_thread_safe_polling()
+        self._pool = ThreadPool(min(self._max_workers, len(self._functions)))
+        for name, function in self._functions.items():
+            logger.info('shared function warmup: {0}'.format(name))
+            self._pool.apply_async(self._call, (name, function))
+        self._pool.close()
+
+    def wait(self):
+        """Wait all the functions to finish"""
+        if self._pool is not None:
+            self._pool.join()
+
+    def wait_for_items(self, items, timeout=None):
+        """Wait the warmup of the functions used by the test items to finish
+
+        :param items: the pytest items about to run
+        :param timeout: the maximum number of seconds to wait for a function
+        """
+        if self._pool is None or all(
+                finished.is_set() for finished in self._finished.values()):
+            return
+        for name in get_used_warmup_functions(items):
+            finished = self._finished.get(name)
+            if finished is not None and not finished.is_set():
+                logger.info('waiting shared function warmup: {0}'.format(
+                    name))
+                finished.wait(timeout)
+
+    def get_report(self):
+        """Return a list of (name, duration in seconds, status) of the
+        finished functions, sorted by duration"""
+        return sorted(
+            ((name, duration, status)
+             for name, (duration, status) in list(self._durations.items())),
+            key=lambda entry: entry[1],
+            reverse=True
+        )
+
+
+def start_warmup(items, max_workers=DEFAULT_MAX_WORKERS, worker_id=None):
+    """Start the warmup of the shared functions used by the collected items
+
+    :param worker_id: the xdist worker id, None in the single pytest process,
+        only the :data:`WARMUP_WORKER_ID` worker starts the warmup
+    :return: the started :class:`SharedWarmup` or None if the shared
+        functions are not enabled or the warmup is run by an other worker
+    """
+    if not is_enabled():
+        return None
+    if worker_id is not None and worker_id != WARMUP_WORKER_ID:
+        return None
+    warmup = SharedWarmup(
+        get_used_warmup_functions(items), max_workers=max_workers)
+    warmup.start()
+    return warmup
+
+
+def log_report(warmup, log=None):
+    """Log the duration of each warmup function
+
+    :param warmup: a :class:`SharedWarmup` or None
+    :param log: a callable that receive a message, defaults to info logging
+    """
+    if warmup is None:
+        return
+    if log is None:
+        log = logger.info
+    for name, duration, status in warmup.get_report():
+        log('shared function warmup {0}: {1} in {2:.3f}s'.format(
+            name, status, duration))
@@ -19,6 +19,7 @@ from robottelo.constants import (
     RHEL_6_MAJOR_VERSION,
     RHEL_7_MAJOR_VERSION,
 )
+from robottelo.host_facts import get_host_facts, is_facts_cache_enabled
 
 # This conditional is here to centralize use of lru_cache and urljoin
 if six.PY3:  # pragma: no cover
@@ -117,7 +118,8 @@ def get_server_version():
 
 
 def get_host_info(hostname=None):
-    """Get remote host's distribution information
+    """Get remote host's distribution information, from the host facts shared
+    by the processes when enabled
 
     :param str hostname: Hostname or IP address of the remote host. If ``None``
         the hostname will be get from ``main.server.hostname`` config.
@@ -125,18 +127,26 @@ def get_host_info(hostname=None):
         ``minor`` are integers. ``minor`` can be ``None`` if not available.
 
     """
-    result = ssh.command('cat /etc/redhat-release', hostname)
-    if result.return_code != 0:
-        raise HostInfoError('Not able to cat /etc/redhat-release "{0}"'.format(
-            result.stderr
-        ))
+    if is_facts_cache_enabled():
+        release = get_host_facts(hostname).get('redhat_release')
+        if not release:
+            raise HostInfoError(
+                'Not able to cat /etc/redhat-release on "{0}"'.format(
+                    hostname or settings.server.hostname))
+    else:
+        result = ssh.command('cat /etc/redhat-release', hostname)
+        if result.return_code != 0:
+            raise HostInfoError(
+                'Not able to cat /etc/redhat-release "{0}"'.format(
+                    result.stderr))
+        release = result.stdout[0]
     match = re.match(
         r'(?P<distro>.+) release (?P<major>\d+)(.(?P<minor>\d+))?',
-        result.stdout[0],
+        release,
     )
     if match is None:
         raise HostInfoError(
-            u'Not able to parse release string "{0}"'.format(result.stdout[0]))
+            u'Not able to parse release string "{0}"'.format(release))
     groups = match.groupdict()
     return (
         groups['distro'],
@@ -0,0 +1,250 @@
+# -*- encoding: utf-8 -*-
+"""Satellite host facts shared by the processes and the sessions.
+
+The Satellite version and the OS release of the server are read through SSH
+by every process that needs them, every xdist worker at tests collection
+time. The host facts are collected by a single command, in one round trip,
+and cached in a json file, keyed by hostname, shared by all the processes:
+
+    - a cached facts entry is used until it is older than the cache ttl,
+      by the processes and in the shared file
+    - a cached facts entry read from the shared file is checked against the
+      host fingerprint, the Satellite package and the boot id, by a cheaper
+      command, at most every ``FINGERPRINT_CHECK_INTERVAL`` seconds. The
+      entry is dropped and the host probed again when the host was upgraded,
+      reinstalled or rebooted
+    - :func:`invalidate_host_facts` forgets the cached facts of a host
+
+The cache is enabled when settings are configured and the ``[server]``
+``facts_cache`` option is set, it is disabled by default.
+
+Usage::
+
+    from robottelo.host_facts import get_host_facts
+
+    get_host_facts()['sat_version']
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from pytest_services.locks import file_lock
+
+from robottelo import ssh
+from robottelo.config import settings
+
+LOGGER = logging.getLogger(__name__)
+
+HOST_FACTS_FILE_NAME = 'robottelo_host_facts.json'
+NOT_AVAILABLE = 'Not Available'
+
+# the facts that identify the host installation
+FINGERPRINT_FACTS = ('satellite_package', 'boot_id')
+# the seconds a shared facts entry is used without checking the fingerprint
+FINGERPRINT_CHECK_INTERVAL = 60
+
+_HOST_FINGERPRINT_COMMAND = u'; '.join((
+    u'echo "satellite_package=$(rpm -q satellite 2>/dev/null)"',
+    u'echo "boot_id=$(cat /proc/sys/kernel/random/boot_id 2>/dev/null)"',
+))
+
+_HOST_FACTS_COMMAND = u'; '.join((
+    u'echo "satellite_package=$(rpm -q satellite 2>/dev/null)"',
+    u'echo "satellite_version=$(grep "VERSION" '
+    u'/usr/share/foreman/lib/satellite/version.rb 2>/dev/null | head -n1)"',
+    u'echo "redhat_release=$(cat /etc/redhat-release 2>/dev/null)"',
+    u'echo "boot_id=$(cat /proc/sys/kernel/random/boot_id 2>/dev/null)"',
+    u'echo "uptime=$(cut -d" " -f1 /proc/uptime 2>/dev/null)"',
+))
+
+_SAT_VERSION_RE = re.compile(r'[^\d]*(?P<version>\d(\.\d){1})')
+_OS_VERSION_RE = re.compile(
+    r'Red Hat Enterprise Linux Server release (?P<version>\d(\.\d)*)')
+
+# the facts already read by this process and the time they were read, by
+# hostname
+_host_facts = {}
+_host_facts_lock = threading.Lock()
+
+
+def parse_sat_version(version_description):
+    """Return the Satellite version found in a package name or in the
+    version.rb content, None if not found"""
+    if version_description:
+        result = _SAT_VERSION_RE.search(version_description)
+        if result:
+            return result.group('version')
+    return None
+
+
+def parse_os_version(release_description):
+    """Return the RHEL version found in the redhat-release content, None if
+    not found"""
+    if release_description:
+        result = _OS_VERSION_RE.search(release_description)
+        if result:
+            return 'RHEL{}'.format(result.group('version'))
+    return None
+
+
+def parse_host_facts(lines):
+    """Return the host facts dict of the probe command output lines"""
+    facts = dict(
+        line.split('=', 1) for line in lines if line and '=' in line)
+    facts['sat_version'] = (
+        parse_sat_version(facts.get('satellite_package')) or
+        parse_sat_version(facts.get('satellite_version')) or
+        NOT_AVAILABLE
+    )
+    facts['os_version'] = (
+        parse_os_version(facts.get('redhat_release')) or NOT_AVAILABLE)
+    try:
+        facts['boot_time'] = int(time.time() - float(facts.get('uptime')))
+    except (TypeError, ValueError):
+        facts['boot_time'] = None
+    return facts
+
+
+def probe_host_facts(hostname=None):
+    """Collect the host facts in a single SSH round trip"""
+    result = ssh.command(_HOST_FACTS_COMMAND, hostname=hostname)
+    facts = parse_host_facts(result.stdout)
+    facts['probed'] = time.time()
+    return facts
+
+
+def probe_host_fingerprint(hostname=None):
+    """Collect the host fingerprint facts in a single SSH round trip"""
+    result = ssh.command(_HOST_FINGERPRINT_COMMAND, hostname=hostname)
+    return dict(
+        line.split('=', 1) for line in result.stdout if line and '=' in line)
+
+
+def is_facts_cache_enabled():
+    """Return whether the host facts are shared by the processes"""
+    return bool(settings.configured and settings.server.facts_cache)
+
+
+def _get_facts_file():
+    return os.path.join(settings.tmp_dir, HOST_FACTS_FILE_NAME)
+
+
+def _read_facts_file(file_path):
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path) as file_handler:
+            return json.load(file_handler)
+    except (IOError, ValueError) as err:
+        LOGGER.warning(
+            'not able to read host facts {0}: {1}'.format(file_path, err))
+        return {}
+
+
+def _write_facts_file(file_path, entries):
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(file_path))
+    with os.fdopen(file_descriptor, 'w') as file_handler:
+        json.dump(entries, file_handler)
+    os.rename(temp_path, file_path)
+
+
+def _get_changes(previous, facts):
+    """Return the host installation changes since the facts were cached"""
+    changed = [
+        name for name in FINGERPRINT_FACTS
+        if previous.get(name) != facts.get(name)
+    ]
+    if (previous.get('boot_time') and facts.get('boot_time') and
+            abs(previous['boot_time'] - facts['boot_time']) > 60):
+        changed.append('boot_time')
+    return sorted(set(changed))
+
+
+def _log_changes(hostname, changed):
+    if changed:
+        LOGGER.info('host {0} facts changed: {1}'.format(
+            hostname, ', '.join(changed)))
+
+
+def _save_facts(file_path, entries):
+    try:
+        _write_facts_file(file_path, entries)
+    except (IOError, OSError) as err:
+        LOGGER.warning(
+            'not able to write host facts {0}: {1}'.format(file_path, err))
+
+
+def _is_expired(read_time):
+    return time.time() - read_time >= settings.server.facts_cache_ttl
+
+
+def _get_shared_facts(hostname, refresh=False):
+    """Return the facts from the shared file, probing the host only when the
+    cached facts are missing, expired or do not match the host fingerprint
+    any more"""
+    file_path = _get_facts_file()
+    with file_lock('{0}.lock'.format(file_path), remove=False):
+        entries = _read_facts_file(file_path)
+        previous = entries.get(hostname)
+        if (not refresh and previous is not None and
+                not _is_expired(previous['probed'])):
+            checked = previous.get('checked', previous['probed'])
+            if time.time() - checked < FINGERPRINT_CHECK_INTERVAL:
+                return previous
+            changed = _get_changes(
+                previous, probe_host_fingerprint(hostname))
+            if not changed:
+                previous['checked'] = time.time()
+                _save_facts(file_path, entries)
+                return previous
+            # the host was upgraded or rebooted, drop the entry
+            _log_changes(hostname, changed)
+            del entries[hostname]
+            previous = None
+        facts = probe_host_facts(hostname)
+        if previous is not None:
+            _log_changes(hostname, _get_changes(previous, facts))
+        entries[hostname] = facts
+        _save_facts(file_path, entries)
+        return facts
+
+
+def get_host_facts(hostname=None, refresh=False):
+    """Return the host facts dict: ``sat_version``, ``os_version``,
+    ``redhat_release``, ``satellite_package``, ``boot_id``, ``boot_time``
+    and the ``probed`` time.
+
+    :param str hostname: the host, defaults to the ``[server]`` hostname
+    :param bool refresh: probe the host even if its facts are cached
+    """
+    hostname = hostname or settings.server.hostname
+    with _host_facts_lock:
+        read_time, facts = _host_facts.get(hostname, (None, None))
+        if facts is None or refresh or _is_expired(read_time):
+            read_time = time.time()
+            if is_facts_cache_enabled():
+                facts = _get_shared_facts(hostname, refresh=refresh)
+            else:
+                facts = probe_host_facts(hostname)
+            _host_facts[hostname] = (read_time, facts)
+        return facts
+
+
+def invalidate_host_facts(hostname=None):
+    """Forget the facts of the host, cached by this process and shared by
+    the other ones"""
+    hostname = hostname or settings.server.hostname
+    with _host_facts_lock:
+        _host_facts.pop(hostname, None)
+        if not is_facts_cache_enabled():
+            return
+        file_path = _get_facts_file()
+        with file_lock('{0}.lock'.format(file_path), remove=False):
+            entries = _read_facts_file(file_path)
+            if entries.pop(hostname, None) is not None:
+                _write_facts_file(file_path, entries)
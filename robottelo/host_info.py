@@ -1,9 +1,14 @@
 """Module that gather several informations about host"""
 import logging
 
-import re
 from robottelo.cli.base import CLIReturnCodeError
 from robottelo.helpers import lru_cache
+from robottelo.host_facts import (
+    get_host_facts,
+    is_facts_cache_enabled,
+    parse_os_version,
+    parse_sat_version,
+)
 
 from robottelo import ssh
 LOGGER = logging.getLogger(__name__)
@@ -11,18 +16,16 @@ LOGGER = logging.getLogger(__name__)
 
 @lru_cache(maxsize=1)
 def get_host_os_version():
-    """Fetches host's OS version through SSH
+    """Fetches host's OS version through SSH, or from the host facts shared
+    by the processes when enabled
     :return: str with version
     """
+    if is_facts_cache_enabled():
+        return get_host_facts()['os_version']
     cmd = ssh.command('cat /etc/redhat-release')
     if cmd.stdout:
-        version_description = cmd.stdout[0]
-        version_re = (
-            r'Red Hat Enterprise Linux Server release (?P<version>\d(\.\d)*)'
-        )
-        result = re.search(version_re, version_description)
-        if result:
-            host_os_version = 'RHEL{}'.format(result.group('version'))
+        host_os_version = parse_os_version(cmd.stdout[0])
+        if host_os_version:
             LOGGER.debug('Host version: {}'.format(host_os_version))
             return host_os_version
 
@@ -39,10 +42,13 @@ _SAT_6_1_VERSION_COMMAND = (
 
 @lru_cache(maxsize=1)
 def get_host_sat_version():
-    """Fetches host's Satellite version through SSH
+    """Fetches host's Satellite version through SSH, or from the host facts
+    shared by the processes when enabled
     :return: Satellite version
     :rtype: version
     """
+    if is_facts_cache_enabled():
+        return get_host_facts()['sat_version']
     commands = (
         _extract_sat_version(c) for c in
         (_SAT_6_2_VERSION_COMMAND, _SAT_6_1_VERSION_COMMAND)
@@ -67,13 +73,8 @@ def _extract_sat_version(ssh_cmd):
     """
     ssh_result = ssh.command(ssh_cmd)
     if ssh_result.stdout:
-        version_description = ssh_result.stdout[0]
-        version_re = (
-            r'[^\d]*(?P<version>\d(\.\d){1})'
-        )
-        result = re.search(version_re, version_description)
-        if result:
-            host_sat_version = result.group('version')
+        host_sat_version = parse_sat_version(ssh_result.stdout[0])
+        if host_sat_version:
             return host_sat_version, ssh_result
 
     return 'Not Available', ssh_result
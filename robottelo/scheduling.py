@@ -0,0 +1,619 @@
+# -*- encoding: utf-8 -*-
+"""Duration aware scheduling of the tests on the pytest-xdist workers.
+
+The default xdist load scheduling sends the tests in collection order, and
+the long tier3 and tier4 tests or the classes with a heavy ``setUpClass``
+often end on the same worker near the end of the run. This scheduler:
+
+    - records the duration of each test and of each test class (the sum of
+      its tests durations, ``setUpClass`` included) in a history file, as a
+      moving average of the runs
+    - keeps the tests of a class, or of a module for the functions, in the
+      same work unit, and estimates each unit duration from the history
+    - sends the longest units first to the idle workers (longest processing
+      time first list scheduling)
+    - runs all the classes having a ``run_in_one_thread`` test as a single
+      unit, in sequence on one worker
+    - merges the classes sharing an expensive setup, the same ``@shared``
+      function or ``affinity`` marker key, in as few units as needed to keep
+      the workers balanced, the setup is computed once and the other classes
+      do not wait for it on other workers
+    - does not send a unit to a worker while another worker runs a unit
+      holding the same ``@lock_function`` function or ``lock_group`` marker
+      key, when another unit is available
+    - reports the makespan predicted from the history and the actual one
+
+The workers send the ``run_in_one_thread`` test ids and the shared setup and
+lock keys of the test classes to the master through a collection info file,
+as the master does not collect the tests.
+
+The keys of a test class are the ones of the shared and locked functions
+defined in the class (or its parents) and in the test module, and the
+arguments of the markers::
+
+    @affinity('upload_manifest')
+    class SubscriptionTestCase(APITestCase):
+        ...
+
+    @lock_group('default_location')
+    class LocationTestCase(APITestCase):
+        ...
+
+Usage, in the ``[robottelo]`` settings section::
+
+    duration_scheduling=true
+"""
+import heapq
+import json
+import logging
+import os
+import tempfile
+import time
+
+from collections import OrderedDict
+
+from robottelo.config import settings
+
+try:
+    from xdist.report import report_collection_diff
+    from xdist.slavemanage import parse_spec_config
+except ImportError:
+    # Optional requirement, the scheduler is used by the xdist master only
+    report_collection_diff = parse_spec_config = None
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TEST_DURATION = 1.0
+HISTORY_FILE_NAME = 'robottelo_durations.json'
+HISTORY_VERSION = 1
+# the weight of the last run in the durations moving average
+HISTORY_WEIGHT = 0.5
+SERIAL_MARKER = 'run_in_one_thread'
+SERIAL_SCOPE = '<{0}>'.format(SERIAL_MARKER)
+AFFINITY_MARKER = 'affinity'
+LOCK_GROUP_MARKER = 'lock_group'
+
+# the durations of the tests run in this session, by test id
+_session_durations = {}
+
+
+def split_scope(nodeid):
+    """Return the scope of the test id: its class, or its module for the
+    module functions"""
+    return nodeid.rsplit('::', 1)[0]
+
+
+def _write_json(file_path, content):
+    """Write atomically the json content"""
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_path)))
+    with os.fdopen(file_descriptor, 'w') as file_handler:
+        json.dump(content, file_handler)
+    os.rename(temp_path, file_path)
+
+
+def _read_json(file_path, default):
+    if not os.path.exists(file_path):
+        return default
+    try:
+        with open(file_path) as file_handler:
+            return json.load(file_handler)
+    except (IOError, ValueError) as err:
+        LOGGER.warning('not able to read {0}: {1}'.format(file_path, err))
+        return default
+
+
+def is_duration_scheduling_enabled():
+    """Return whether the tests are scheduled by their durations"""
+    return bool(settings.configured and settings.duration_scheduling)
+
+
+def get_durations_file():
+    return settings.durations_file or os.path.join(
+        settings.tmp_dir, HISTORY_FILE_NAME)
+
+
+def record_report(report):
+    """Add the duration of a test phase report to the session durations"""
+    _session_durations[report.nodeid] = (
+        _session_durations.get(report.nodeid, 0.0) + report.duration)
+
+
+def get_session_durations():
+    """Return the durations of the tests run in this session"""
+    return dict(_session_durations)
+
+
+def save_session_durations():
+    """Record the durations of the tests run in this session in the
+    durations history"""
+    durations = get_session_durations()
+    if not durations:
+        return
+    history = DurationHistory(get_durations_file())
+    history.record(durations)
+    history.save()
+
+
+def _get_function_keys(value):
+    """Return the shared setup key and the lock key of a class or module
+    attribute"""
+    if isinstance(value, (classmethod, staticmethod)):
+        value = value.__func__
+    return (getattr(value, '__shared_key__', None),
+            getattr(value, '__lock_key__', None))
+
+
+def _get_namespace_keys(namespaces):
+    affinity_keys = set()
+    lock_keys = set()
+    for namespace in namespaces:
+        for value in list(vars(namespace).values()):
+            affinity_key, lock_key = _get_function_keys(value)
+            if affinity_key:
+                affinity_keys.add(affinity_key)
+            if lock_key:
+                lock_keys.add(lock_key)
+    return affinity_keys, lock_keys
+
+
+def get_scope_keys(items):
+    """Return the shared setup keys and the lock keys of the collected test
+    items scopes
+
+    :return: two dicts of scope and sorted list of keys
+    """
+    affinity = {}
+    locks = {}
+    namespaces_keys = {}
+    for item in items:
+        scope = split_scope(item.nodeid)
+        namespaces = [getattr(item, 'module', None)]
+        cls = getattr(item, 'cls', None)
+        if cls is not None:
+            namespaces.extend(cls.__mro__)
+        for namespace in namespaces:
+            if namespace is None or namespace is object:
+                continue
+            if namespace not in namespaces_keys:
+                namespaces_keys[namespace] = _get_namespace_keys([namespace])
+            affinity_keys, lock_keys = namespaces_keys[namespace]
+            affinity.setdefault(scope, set()).update(affinity_keys)
+            locks.setdefault(scope, set()).update(lock_keys)
+        for marker_name, scope_keys in ((AFFINITY_MARKER, affinity),
+                                        (LOCK_GROUP_MARKER, locks)):
+            marker = item.get_marker(marker_name)
+            if marker is not None:
+                scope_keys.setdefault(scope, set()).update(marker.args)
+    return tuple(
+        {scope: sorted(keys) for scope, keys in scope_keys.items() if keys}
+        for scope_keys in (affinity, locks)
+    )
+
+
+def write_collection_info(file_path, items):
+    """Write the ids of the collected ``run_in_one_thread`` tests and the
+    shared setup and lock keys of the tests scopes"""
+    affinity, locks = get_scope_keys(items)
+    _write_json(file_path, dict(
+        serial=[
+            item.nodeid for item in items
+            if item.get_marker(SERIAL_MARKER) is not None
+        ],
+        affinity=affinity,
+        locks=locks,
+    ))
+
+
+def read_collection_info(file_path):
+    """Return the collection info dict: the set of the ``run_in_one_thread``
+    tests ids, and the dicts of the scopes shared setup and lock keys"""
+    content = _read_json(file_path, {})
+    return dict(
+        serial=set(content.get('serial', [])),
+        affinity=content.get('affinity', {}),
+        locks=content.get('locks', {}),
+    )
+
+
+def group_by_affinity(scopes_keys):
+    """Return the groups of the scopes sharing a key, directly or through
+    other scopes
+
+    :param scopes_keys: a dict of scope and keys
+    :return: a list of groups, sorted lists of scopes
+    """
+    parents = {}
+
+    def find(scope):
+        while parents[scope] != scope:
+            parents[scope] = parents[parents[scope]]
+            scope = parents[scope]
+        return scope
+
+    key_scopes = {}
+    for scope in sorted(scopes_keys):
+        parents.setdefault(scope, scope)
+        for key in scopes_keys[scope]:
+            other_scope = key_scopes.setdefault(key, scope)
+            parents[find(scope)] = find(other_scope)
+    groups = {}
+    for scope in parents:
+        groups.setdefault(find(scope), []).append(scope)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def pack_group(estimates, capacity):
+    """Return the scopes of an affinity group packed in as few bins of the
+    capacity as needed, the longest first (first fit decreasing), a scope
+    longer than the capacity is a bin of its own
+
+    :param estimates: a dict of scope and estimated duration
+    :return: a list of bins, lists of scopes
+    """
+    bins = []
+    for scope in sorted(estimates, key=lambda name: (-estimates[name], name)):
+        for bin_ in bins:
+            if bin_[0] + estimates[scope] <= capacity:
+                bin_[0] += estimates[scope]
+                bin_[1].append(scope)
+                break
+        else:
+            bins.append([estimates[scope], [scope]])
+    return [scopes for _, scopes in bins]
+
+
+def predict_makespan(estimates, workers_count):
+    """Return the makespan of the longest processing time first schedule of
+    the work units estimated durations on the workers"""
+    if not workers_count:
+        return 0.0
+    loads = [0.0] * workers_count
+    for estimate in sorted(estimates, reverse=True):
+        heapq.heapreplace(loads, loads[0] + estimate)
+    return max(loads)
+
+
+class DurationHistory(object):
+    """The tests and test classes durations moving averages of the previous
+    runs"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        content = _read_json(file_path, {})
+        if content.get('version') != HISTORY_VERSION:
+            content = {}
+        self.tests = content.get('tests', {})
+        self.classes = content.get('classes', {})
+
+    @staticmethod
+    def _average(previous, duration):
+        if previous is None:
+            return duration
+        return HISTORY_WEIGHT * duration + (1 - HISTORY_WEIGHT) * previous
+
+    def record(self, durations):
+        """Record the tests durations of a run
+
+        :param durations: a dict of test id and duration
+        """
+        classes = {}
+        for nodeid, duration in durations.items():
+            self.tests[nodeid] = self._average(
+                self.tests.get(nodeid), duration)
+            scope = split_scope(nodeid)
+            classes[scope] = classes.get(scope, 0.0) + duration
+        for scope, duration in classes.items():
+            self.classes[scope] = self._average(
+                self.classes.get(scope), duration)
+
+    def get_default_duration(self):
+        """Return the estimated duration of a test without history, the
+        median of the known tests durations"""
+        if not self.tests:
+            return DEFAULT_TEST_DURATION
+        durations = sorted(self.tests.values())
+        return durations[len(durations) // 2]
+
+    def estimate(self, scope, nodeids, default=None):
+        """Return the estimated duration of the work unit tests"""
+        if default is None:
+            default = self.get_default_duration()
+        known = [self.tests[nodeid] for nodeid in nodeids
+                 if nodeid in self.tests]
+        if not known and scope in self.classes:
+            # renamed tests of a known class
+            return self.classes[scope]
+        return sum(known) + default * (len(nodeids) - len(known))
+
+    def save(self):
+        try:
+            _write_json(self.file_path, dict(
+                version=HISTORY_VERSION,
+                tests=self.tests,
+                classes=self.classes,
+            ))
+        except (IOError, OSError) as err:
+            LOGGER.warning('not able to write durations history {0}: {1}'
+                           .format(self.file_path, err))
+
+
+class DurationScheduling(object):
+    """xdist scheduler sending the longest work units first.
+
+    The work units are the test classes, or the test modules for the module
+    functions, the unit of the ``run_in_one_thread`` classes and the units of
+    the classes sharing a setup. The
+    workqueue is an ordered dict of the units, sorted by decreasing estimated
+    duration, each unit an ordered dict of its tests ids and completion
+    status, like the xdist ``LoadScopeScheduling`` one.
+
+    :param config: the pytest config
+    :param history: the :class:`DurationHistory` of the estimations
+    :param collection_info_file: the file written by the workers with the
+        ``run_in_one_thread`` tests ids
+    :param log: the xdist log producer
+    """
+
+    def __init__(self, config, history, collection_info_file=None, log=None,
+                 numnodes=None):
+        if numnodes is None:
+            numnodes = len(parse_spec_config(config))
+        self.numnodes = numnodes
+        self.config = config
+        self.history = history
+        self.collection_info_file = collection_info_file
+        self.collection = None
+        self.workqueue = OrderedDict()
+        self.assigned_work = OrderedDict()
+        self.registered_collections = OrderedDict()
+        self.estimates = {}
+        self.unit_locks = {}
+        self.predicted_makespan = None
+        self.start_time = None
+        self.end_time = None
+        self._unit_scopes = {}
+        if log is None:
+            self.log = LOGGER.debug
+        else:
+            self.log = log.durationsched
+
+    @property
+    def nodes(self):
+        """A list of all active nodes in the scheduler."""
+        return list(self.assigned_work.keys())
+
+    @property
+    def collection_is_completed(self):
+        return len(self.registered_collections) >= self.numnodes
+
+    @property
+    def tests_finished(self):
+        if not self.collection_is_completed or self.workqueue:
+            return False
+        return all(
+            self._pending_of(workload) < 2
+            for workload in self.assigned_work.values()
+        )
+
+    @property
+    def has_pending(self):
+        if self.workqueue:
+            return True
+        return any(
+            self._pending_of(workload) > 0
+            for workload in self.assigned_work.values()
+        )
+
+    def add_node(self, node):
+        assert node not in self.assigned_work
+        self.assigned_work[node] = OrderedDict()
+
+    def remove_node(self, node):
+        """Remove the node, the pending tests of a crashed node are scheduled
+        again and the crashed test id is returned"""
+        workload = self.assigned_work.pop(node)
+        if not self._pending_of(workload):
+            return None
+        crashitem = next(
+            nodeid
+            for work_unit in workload.values()
+            for nodeid, completed in work_unit.items()
+            if not completed
+        )
+        for scope, work_unit in workload.items():
+            if self._pending_of({scope: work_unit}):
+                self.workqueue[scope] = work_unit
+        self._sort_workqueue()
+        for other_node in self.assigned_work:
+            self._reschedule(other_node)
+        return crashitem
+
+    def add_node_collection(self, node, collection):
+        assert node in self.assigned_work
+        if self.collection_is_completed:
+            assert self.collection
+            if collection != self.collection:
+                other_node = next(iter(self.registered_collections.keys()))
+                self.log(report_collection_diff(
+                    self.collection, collection, other_node.gateway.id,
+                    node.gateway.id
+                ))
+                return
+        self.registered_collections[node] = list(collection)
+
+    def mark_test_complete(self, node, item_index, duration=0):
+        nodeid = self.registered_collections[node][item_index]
+        self.assigned_work[node][self._unit_scopes[nodeid]][nodeid] = True
+        self.end_time = time.time()
+        self._reschedule(node)
+
+    def _pending_of(self, workload):
+        return sum(
+            list(work_unit.values()).count(False)
+            for work_unit in workload.values()
+        )
+
+    def _sort_workqueue(self):
+        self.workqueue = OrderedDict(sorted(
+            self.workqueue.items(),
+            key=lambda scope_unit: self.estimates.get(scope_unit[0], 0.0),
+            reverse=True
+        ))
+
+    def _pop_work_unit(self, node):
+        """Pop the longest unit not holding a lock key of the units run by
+        the other nodes, or the longest unit"""
+        active_locks = set()
+        for other_node, workload in self.assigned_work.items():
+            if other_node is node:
+                continue
+            for scope, work_unit in workload.items():
+                if self._pending_of({scope: work_unit}):
+                    active_locks.update(self.unit_locks.get(scope, ()))
+        if active_locks:
+            for scope in self.workqueue:
+                if active_locks.isdisjoint(self.unit_locks.get(scope, ())):
+                    return scope, self.workqueue.pop(scope)
+        return self.workqueue.popitem(last=False)
+
+    def _assign_work_unit(self, node):
+        scope, work_unit = self._pop_work_unit(node)
+        self.assigned_work[node][scope] = work_unit
+        worker_collection = self.registered_collections[node]
+        node.send_runtest_some([
+            worker_collection.index(nodeid)
+            for nodeid, completed in work_unit.items()
+            if not completed
+        ])
+
+    def _reschedule(self, node):
+        if node.shutting_down or not self.workqueue:
+            return
+        # 2: Heuristic of minimum tests to enqueue more work
+        if self._pending_of(self.assigned_work[node]) > 2:
+            return
+        self._assign_work_unit(node)
+
+    def _get_work_units(self):
+        """Return the ordered dict of the work units scopes and tests ids,
+        the classes having a ``run_in_one_thread`` test are in one unit, the
+        classes sharing a setup are merged"""
+        info = dict(serial=set(), affinity={}, locks={})
+        if self.collection_info_file:
+            info = read_collection_info(self.collection_info_file)
+        serial_scopes = {split_scope(nodeid) for nodeid in info['serial']}
+        work_units = OrderedDict()
+        for nodeid in self.collection:
+            scope = split_scope(nodeid)
+            if scope in serial_scopes:
+                scope = SERIAL_SCOPE
+            self._unit_scopes[nodeid] = scope
+            work_units.setdefault(scope, OrderedDict())[nodeid] = False
+        default = self.history.get_default_duration()
+        self.estimates = {
+            scope: self.history.estimate(scope, list(work_unit), default)
+            for scope, work_unit in work_units.items()
+        }
+        for scope in work_units:
+            if scope == SERIAL_SCOPE:
+                self.unit_locks[scope] = frozenset(
+                    key for serial_scope in serial_scopes
+                    for key in info['locks'].get(serial_scope, ())
+                )
+            else:
+                self.unit_locks[scope] = frozenset(
+                    info['locks'].get(scope, ()))
+        self._merge_affinity_groups(work_units, {
+            scope: keys for scope, keys in info['affinity'].items()
+            if scope in work_units
+        })
+        return work_units
+
+    def _merge_affinity_groups(self, work_units, scopes_keys):
+        """Merge the units of the classes sharing a setup, in as few units as
+        needed for the balance of the workers"""
+        if not scopes_keys:
+            return
+        capacity = sum(self.estimates.values()) / max(len(self.nodes), 1)
+        for group in group_by_affinity(scopes_keys):
+            if len(group) < 2:
+                continue
+            bins = pack_group(
+                {scope: self.estimates[scope] for scope in group}, capacity)
+            for index, bin_scopes in enumerate(bins):
+                if len(bin_scopes) < 2:
+                    continue
+                unit_scope = '<{0}:{1}#{2}>'.format(
+                    AFFINITY_MARKER, scopes_keys[group[0]][0], index)
+                merged = OrderedDict()
+                for scope in bin_scopes:
+                    for nodeid in work_units.pop(scope):
+                        merged[nodeid] = False
+                        self._unit_scopes[nodeid] = unit_scope
+                work_units[unit_scope] = merged
+                self.estimates[unit_scope] = sum(
+                    self.estimates.pop(scope) for scope in bin_scopes)
+                self.unit_locks[unit_scope] = frozenset().union(*(
+                    self.unit_locks.pop(scope) for scope in bin_scopes))
+
+    def schedule(self):
+        assert self.collection_is_completed
+        if self.collection is not None:
+            for node in self.nodes:
+                self._reschedule(node)
+            return
+        first_node, collection = next(
+            iter(self.registered_collections.items()))
+        for node, other_collection in self.registered_collections.items():
+            if other_collection != collection:
+                self.log(report_collection_diff(
+                    collection, other_collection, first_node.gateway.id,
+                    node.gateway.id
+                ))
+                self.log('**Different tests collected, aborting run**')
+                return
+        self.collection = list(collection)
+        if not self.collection:
+            return
+        self.workqueue = self._get_work_units()
+        self._sort_workqueue()
+
+        # Avoid having more workers than work
+        for _ in range(len(self.nodes) - len(self.workqueue)):
+            unused_node, _ = self.assigned_work.popitem(last=True)
+            self.log('Shutting down unused node {0}'.format(unused_node))
+            unused_node.shutdown()
+
+        self.predicted_makespan = predict_makespan(
+            self.estimates.values(), len(self.nodes))
+        self.start_time = time.time()
+        for node in self.nodes:
+            self._assign_work_unit(node)
+        if not self.workqueue:
+            for node in self.nodes:
+                node.shutdown()
+
+    def get_report(self):
+        """Return the dict of the predicted and actual makespan"""
+        actual_makespan = None
+        if self.start_time is not None and self.end_time is not None:
+            actual_makespan = self.end_time - self.start_time
+        return dict(
+            units=len(self.estimates),
+            workers=len(self.registered_collections),
+            predicted_makespan=self.predicted_makespan,
+            actual_makespan=actual_makespan,
+        )
+
+
+def log_report(report, log=LOGGER.info):
+    """Log the predicted and actual makespan of the scheduler report"""
+    log('{units} work units on {workers} workers'.format(**report))
+    for name in ('predicted_makespan', 'actual_makespan'):
+        if report[name] is not None:
+            log('{0} (s): {1:.2f}'.format(
+                name.replace('_', ' '), report[name]))
+    if report['predicted_makespan'] and report['actual_makespan']:
+        log('actual / predicted: {0:.2f}'.format(
+            report['actual_makespan'] / report['predicted_makespan']))
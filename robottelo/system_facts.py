@@ -1,13 +1,42 @@
-"""JSON representation for a RHEL server."""
+"""JSON representation for a RHEL server.
 
-import copy
+:func:`generate_system_facts` returns the facts of a single system.
+:func:`iter_system_facts` yields the facts of many systems lazily, in batches,
+for the scale tests registering thousands of fake content hosts: the random
+fields of a batch are generated at once, in columns, from a seeded random
+generator, or vectorized by numpy when installed, and each system facts only
+hold the fields that vary over the shared :data:`SYSTEM_FACTS` template.
+
+Usage::
+
+    for batch in iter_system_facts(100000, batch_size=1000, seed=42):
+        for facts in batch:
+            register(facts)
+"""
+
+import binascii
 import datetime
+import random
+import uuid
 
 from fauxfactory import (
     gen_alpha, gen_choice, gen_date,
     gen_integer, gen_ipaddr, gen_mac, gen_uuid
 )
 
+from robottelo.datapool import DataPool
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+try:
+    import numpy
+except ImportError:
+    # Optional requirement, used by the vectorized generation only
+    numpy = None
+
 
 def _bios_date():
     """Generate a random date for system's BIOS between
@@ -189,8 +218,8 @@ def generate_system_facts(name=None):
         name = u'{0}.example.net'.format(
             gen_alpha().lower())
 
-    # Make a copy of the system facts 'template'
-    new_facts = copy.deepcopy(SYSTEM_FACTS)
+    # Make a copy of the system facts 'template', the values are immutable
+    new_facts = dict(SYSTEM_FACTS)
     # Select a random RHEL version...
     distro = gen_choice(DISTRO_IDS)
 
@@ -214,3 +243,200 @@ def generate_system_facts(name=None):
     new_facts['virt.uuid'] = new_facts['dmi.system.uuid']
 
     return new_facts
+
+
+DEFAULT_BATCH_SIZE = 1000
+BIOS_DATE_DAYS = 3650
+HOSTNAME_LENGTH = 10
+
+
+class SystemFacts(Mapping):
+    """The facts of a system, its varying fields over the shared template
+
+    It is a read only mapping, not a dict: serialize it with
+    :meth:`to_json_dict`, ``json.dumps(facts.to_json_dict())``.
+
+    :param dict fields: the facts that are not the template ones
+    :param dict template: the shared facts template
+    """
+
+    __slots__ = ('fields', 'template')
+
+    def __init__(self, fields, template=None):
+        self.fields = fields
+        self.template = SYSTEM_FACTS if template is None else template
+
+    def __getitem__(self, key):
+        try:
+            return self.fields[key]
+        except KeyError:
+            return self.template[key]
+
+    def __iter__(self):
+        for key in self.template:
+            yield key
+        for key in self.fields:
+            if key not in self.template:
+                yield key
+
+    def __len__(self):
+        return len(self.template) + sum(
+            1 for key in self.fields if key not in self.template)
+
+    def to_json_dict(self):
+        """Return a plain dict of the facts, serializable to JSON"""
+        facts = dict(self.template)
+        facts.update(self.fields)
+        return facts
+
+
+def _bios_dates():
+    """Return the formatted dates of the last 10 years"""
+    today = datetime.date.today()
+    return [
+        (today - datetime.timedelta(days)).strftime('%m/%d/%Y')
+        for days in range(BIOS_DATE_DAYS + 1)
+    ]
+
+
+def _format_uuid(value):
+    """Return the version 4 uuid string of a 128 bits integer"""
+    return str(uuid.UUID(int=value, version=4))
+
+
+def _format_mac(value):
+    """Return the unicast MAC address string of a 48 bits integer"""
+    digits = u'{0:012x}'.format(value & ~(1 << 40))
+    return u':'.join(digits[index:index + 2] for index in range(0, 12, 2))
+
+
+def _format_ipaddr(value):
+    """Return the IPv4 address string of a 32 bits integer, the first octet
+    in the public unicast range"""
+    return u'{0}.{1}.{2}.{3}'.format(
+        1 + (value >> 24) % 223, (value >> 16) & 0xff, (value >> 8) & 0xff,
+        value & 0xff)
+
+
+def _generate_columns(count, rand):
+    """Return the random fields columns of count systems"""
+    getrandbits = rand.getrandbits
+    return dict(
+        distro=[int(rand.random() * len(DISTRO_IDS)) for _ in range(count)],
+        bios_date=[int(rand.random() * (BIOS_DATE_DAYS + 1))
+                   for _ in range(count)],
+        capacity=[int(rand.random() * len(MEMORY_CAPACITY))
+                  for _ in range(count)],
+        size=[int(rand.random() * len(MEMORY_SIZE)) for _ in range(count)],
+        uuid=[_format_uuid(getrandbits(128)) for _ in range(count)],
+        mac=[_format_mac(getrandbits(48)) for _ in range(count)],
+        ipaddr=[_format_ipaddr(getrandbits(32)) for _ in range(count)],
+    )
+
+
+def _generate_columns_vectorized(count, rand):
+    """Return the random fields columns of count systems, generated by numpy
+    arrays"""
+    state = numpy.random.RandomState(rand.getrandbits(32))
+    octets = state.randint(0, 256, size=(count, 16 + 6 + 4), dtype=numpy.uint8)
+    # uuid version 4 and variant bits
+    octets[:, 6] = (octets[:, 6] & 0x0f) | 0x40
+    octets[:, 8] = (octets[:, 8] & 0x3f) | 0x80
+    # unicast MAC
+    octets[:, 16] &= 0xfe
+    # public unicast first octet
+    octets[:, 22] = 1 + octets[:, 22] % 223
+    # the hexadecimal digits of all the uuids and MACs at once
+    digits = binascii.hexlify(octets[:, :22].tobytes()).decode('ascii')
+    uuids = []
+    macs = []
+    for start in range(0, count * 44, 44):
+        uuids.append(u'-'.join((
+            digits[start:start + 8], digits[start + 8:start + 12],
+            digits[start + 12:start + 16], digits[start + 16:start + 20],
+            digits[start + 20:start + 32]
+        )))
+        macs.append(u':'.join(
+            digits[index:index + 2]
+            for index in range(start + 32, start + 44, 2)
+        ))
+    ipaddrs = [
+        u'{0}.{1}.{2}.{3}'.format(*row) for row in octets[:, 22:].tolist()]
+    return dict(
+        distro=state.randint(0, len(DISTRO_IDS), size=count).tolist(),
+        bios_date=state.randint(0, BIOS_DATE_DAYS + 1, size=count).tolist(),
+        capacity=state.randint(0, len(MEMORY_CAPACITY), size=count).tolist(),
+        size=state.randint(0, len(MEMORY_SIZE), size=count).tolist(),
+        uuid=uuids,
+        mac=macs,
+        ipaddr=ipaddrs,
+    )
+
+
+def iter_system_facts(count, batch_size=DEFAULT_BATCH_SIZE, names=None,
+                      seed=None, overlay=False, vectorized=False):
+    """Yield the random facts of count systems, in lists of batch_size
+    systems facts, generated when the batch is requested.
+
+    :param int count: the number of systems
+    :param int batch_size: the number of systems facts of a batch
+    :param names: an iterable of valid FQDNs of the systems, random names are
+        generated when not provided
+    :param seed: the random generator seed, the same seed generates the same
+        facts
+    :param bool overlay: yield :class:`SystemFacts` mappings sharing the
+        template instead of dicts, see :meth:`SystemFacts.to_json_dict`
+    :param bool vectorized: generate the random fields with numpy
+    :raises: ``ImportError`` when vectorized and numpy is not installed.
+    """
+    if vectorized and numpy is None:
+        raise ImportError('the vectorized generation requires numpy')
+    rand = random.Random(seed)
+    pool = DataPool(rand.getrandbits(64))
+    names = iter(names) if names is not None else None
+    bios_dates = _bios_dates()
+    generate_columns = (
+        _generate_columns_vectorized if vectorized else _generate_columns)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        columns = generate_columns(size, rand)
+        if names is None:
+            batch_names = [
+                u'{0}.example.net'.format(name.lower())
+                for name in pool.generate('alpha', HOSTNAME_LENGTH, size)
+            ]
+        else:
+            batch_names = [next(names) for _ in range(size)]
+        batch = []
+        for index in range(size):
+            distro = DISTRO_IDS[columns['distro'][index]]
+            system_uuid = columns['uuid'][index]
+            ipaddr = columns['ipaddr'][index]
+            name = batch_names[index]
+            fields = {
+                u'distribution.id': distro['id'],
+                u'distribution.version': distro['version'],
+                u'dmi.bios.relase_date': bios_dates[
+                    columns['bios_date'][index]],
+                u'dmi.memory.maximum_capacity': MEMORY_CAPACITY[
+                    columns['capacity'][index]],
+                u'dmi.memory.size': MEMORY_SIZE[columns['size'][index]],
+                u'dmi.system.uuid': system_uuid,
+                u'dmi.system.version': u'RHEL',
+                u'lscpu.architecture': distro['architecture'],
+                u'net.interface.eth1.hwaddr': columns['mac'][index],
+                u'net.interface.eth1.ipaddr': ipaddr,
+                u'network.hostname': name,
+                u'network.ipaddr': ipaddr,
+                u'uname.machine': distro['architecture'],
+                u'uname.nodename': name,
+                u'uname.release': distro['kernel'],
+                u'virt.uuid': system_uuid,
+            }
+            if overlay:
+                batch.append(SystemFacts(fields))
+            else:
+                facts = dict(SYSTEM_FACTS)
+                facts.update(fields)
+                batch.append(facts)
+        yield batch
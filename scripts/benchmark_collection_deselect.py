@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Collection time deselection benchmark
+
+Compare, over a synthetic tree of collected test items, the single indexed
+pass of :func:`robottelo.bz_helpers.get_deselected_items` with the legacy
+``pytest_collection_modifyitems`` implementation, which filtered the items
+with a list membership test.
+
+Usage::
+
+    $ python scripts/benchmark_collection_deselect.py
+    $ python scripts/benchmark_collection_deselect.py --items 10000 \
+        --removed 500
+"""
+from __future__ import print_function
+
+import argparse
+import time
+import types
+
+from collections import namedtuple
+
+from robottelo.bz_helpers import get_deselected_items, group_by_key
+from robottelo.helpers import get_func_name
+
+FakeItem = namedtuple('FakeItem', ['nodeid', 'function', 'cls', 'parent'])
+FakeParent = namedtuple('FakeParent', ['obj'])
+
+TESTS_BY_CLASS = 25
+
+
+def _make_function(name, module):
+    function = types.FunctionType(
+        (lambda: None).__code__, {}, name)
+    function.__module__ = module
+    return function
+
+
+def make_items(items_count, removed_count):
+    """Return the synthetic items, the bug ids to remove and the decorated
+    functions, one test class in two has a decorated setUpClass"""
+    items = []
+    decorated_functions = []
+    removal_ids = set()
+    for index in range(items_count):
+        module = 'tests.foreman.synthetic.test_module{0}'.format(
+            index // (TESTS_BY_CLASS * 4))
+        class_index = index // TESTS_BY_CLASS
+        if index % TESTS_BY_CLASS == 0:
+            test_class = type('TestCase{0}'.format(class_index), (object,), {})
+
+            def setUpClass():
+                pass
+            setUpClass.bugzilla_ids = [str(class_index)]
+            if class_index % 2:
+                test_class.setUpClass = staticmethod(setUpClass)
+        function = _make_function('test_{0}'.format(index), module)
+        item = FakeItem(
+            '{0}::{1}'.format(module, function.__name__),
+            function,
+            test_class,
+            FakeParent(test_class),
+        )
+        items.append(item)
+        bug_id = str(10 ** 6 + index)
+        decorated_functions.append(
+            (get_func_name(function, test_item=item), bug_id))
+    # remove tests by decorated function, and a tenth as many classes by
+    # setUpClass
+    step = max(1, items_count // removed_count)
+    for index in range(0, items_count, step)[:removed_count]:
+        removal_ids.add(str(10 ** 6 + index))
+    classes_count = items_count // TESTS_BY_CLASS
+    step = max(1, classes_count * 10 // removed_count)
+    for class_index in range(1, classes_count, step)[:removed_count // 10]:
+        removal_ids.add(str(class_index | 1))
+    return items, removal_ids, decorated_functions
+
+
+def legacy_deselect(items, removal_ids, decorated_functions):
+    """The legacy pytest_collection_modifyitems deselection"""
+    deselected_items = []
+    decorated_functions = group_by_key(decorated_functions)
+    for item in items:
+        name = get_func_name(item.function, test_item=item)
+        bug_ids = list(decorated_functions.get(name, []))
+        setup_class_method = getattr(item.parent.obj, 'setUpClass', None)
+        bug_ids.extend(getattr(setup_class_method, 'bugzilla_ids', []))
+        if any(bug_id in removal_ids for bug_id in bug_ids):
+            deselected_items.append(item)
+    return [item for item in items if item not in deselected_items]
+
+
+def indexed_deselect(items, removal_ids, decorated_functions):
+    """The single indexed pass"""
+    selected, _ = get_deselected_items(
+        items, removal_ids, decorated_functions, log=lambda message: None)
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--removed', type=int, default=500)
+    args = parser.parse_args()
+    items, removal_ids, decorated_functions = make_items(
+        args.items, args.removed)
+    results = {}
+    for name, deselect in (('indexed', indexed_deselect),
+                           ('legacy', legacy_deselect)):
+        start = time.time()
+        results[name] = deselect(items, removal_ids, decorated_functions)
+        print('{0} deselection of {1} items (s): {2:.2f}, selected {3}'.format(
+            name, len(items), time.time() - start, len(results[name])))
+    assert results['indexed'] == results['legacy']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Shared functions and function locks key derivation benchmark
+
+The ``shared`` and ``lock_function`` decorators derive the class name of the
+decorated function from the frames calling them, at import time. Compare the
+frames walk with the legacy ``inspect.getouterframes`` implementation:
+
+    - decorating functions in a class body
+    - collecting the tests of the tests/foreman tree, that needs a configured
+      robottelo.properties
+
+Usage::
+
+    $ python scripts/benchmark_key_derivation.py
+    $ python scripts/benchmark_key_derivation.py --collect
+"""
+from __future__ import print_function
+
+import importlib
+import inspect
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+from robottelo.decorators import func_locker
+from robottelo.decorators.func_shared.shared import shared
+
+# the func_shared package exports the shared function with the module name
+shared_module = importlib.import_module(
+    'robottelo.decorators.func_shared.shared')
+
+REPEAT = 5
+NUMBER = 200
+
+COLLECT_COMMAND = """
+import sys
+import pytest
+if {legacy}:
+    sys.path.insert(0, 'scripts')
+    from benchmark_key_derivation import use_legacy_class_name
+    use_legacy_class_name()
+sys.exit(pytest.main(['--collect-only', '-q', '-p', 'no:cacheprovider',
+                      'tests/foreman']))
+"""
+
+
+def legacy_get_class_name(depth=3):
+    """The legacy class name derivation, walking the frames with
+    inspect.getouterframes"""
+    class_names = []
+    class_name = None
+    # one more frame than the decorator
+    index = 2
+    while class_name != '<module>' and index <= depth + 1:
+        if class_name:
+            class_names.append(class_name)
+        class_name = inspect.getouterframes(inspect.currentframe())[index][3]
+        index += 1
+    class_names.reverse()
+    return '.'.join(class_names)
+
+
+def use_legacy_class_name():
+    """Use the legacy class name derivation in the decorators"""
+    shared_module._get_class_name = legacy_get_class_name
+    func_locker._get_class_name = legacy_get_class_name
+
+
+def decorate():
+    """Decorate functions in a class body"""
+    class Decorated(object):
+        @shared
+        def shared_function(self):
+            pass
+
+        @func_locker.lock_function
+        def locked_function(self):
+            pass
+
+    return Decorated
+
+
+def benchmark_decoration():
+    """Return the best decoration time in microseconds"""
+    return min(timeit.repeat(decorate, repeat=REPEAT, number=NUMBER)) * (
+        10 ** 6) / NUMBER
+
+
+def benchmark_collection(legacy):
+    """Return the tests/foreman collection time in seconds"""
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        subprocess.call(
+            [sys.executable, '-c', COLLECT_COMMAND.format(legacy=legacy)],
+            stdout=devnull,
+        )
+        return time.time() - start
+
+
+def main():
+    current = shared_module._get_class_name
+    print('decoration (us): frames walk {0:.1f}'.format(
+        benchmark_decoration()))
+    use_legacy_class_name()
+    try:
+        print('decoration (us): getouterframes {0:.1f}'.format(
+            benchmark_decoration()))
+    finally:
+        shared_module._get_class_name = current
+        func_locker._get_class_name = current
+    if '--collect' in sys.argv:
+        for legacy in (False, True):
+            print('tests/foreman collection (s): {0} {1:.2f}'.format(
+                'getouterframes' if legacy else 'frames walk',
+                benchmark_collection(legacy)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Settings configuration benchmark
+
+Each xdist worker configures the settings when it starts. Compare the
+configuration time of:
+
+    - reading and validating the settings file
+    - loading the validated settings snapshot written by the master
+    - loading the snapshot, the features settings being loaded when first
+      accessed
+
+Usage::
+
+    $ python scripts/benchmark_settings.py
+    $ python scripts/benchmark_settings.py robottelo.properties
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+import six
+
+from robottelo.config import base
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+REPEAT = 20
+
+SETTINGS_CONTENT = """
+[server]
+hostname=example.com
+ssh_username=root
+ssh_password=password
+
+[clients]
+provisioning_server=
+
+[http_client]
+pool_size=5
+"""
+
+
+def benchmark_configure(settings_path, snapshot_path=None, lazy=False):
+    """Return the best configuration time in milliseconds"""
+    environ = {}
+    if snapshot_path is not None:
+        environ[base.SETTINGS_SNAPSHOT_ENV] = snapshot_path
+    times = []
+    with mock.patch.dict(os.environ, environ):
+        for _ in range(REPEAT):
+            settings = base.Settings()
+            settings.configure(settings_path=settings_path, lazy=lazy)
+            times.append(settings.configure_time)
+    return min(times) * 1000
+
+
+def main():
+    root_dir = tempfile.mkdtemp()
+    try:
+        if len(sys.argv) > 1:
+            settings_path = os.path.abspath(sys.argv[1])
+        else:
+            settings_path = os.path.join(root_dir, 'robottelo.properties')
+            with open(settings_path, 'w') as handler:
+                handler.write(SETTINGS_CONTENT)
+        snapshot_path = os.path.join(root_dir, 'settings.pickle')
+        settings = base.Settings()
+        settings.configure(settings_path=settings_path)
+        settings.write_snapshot(snapshot_path)
+        print('configure (ms): settings file {0:.2f}'.format(
+            benchmark_configure(settings_path)))
+        print('configure (ms): snapshot {0:.2f}'.format(
+            benchmark_configure(settings_path, snapshot_path)))
+        print('configure (ms): lazy snapshot {0:.2f}'.format(
+            benchmark_configure(settings_path, snapshot_path, lazy=True)))
+    finally:
+        shutil.rmtree(root_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Shared function codecs benchmark
+
+Compare the encode and decode time and the stored size of the shared function
+values encoded with the available codecs, using payloads similar to the
+shared setups results: entities json dicts and lists of repositories and
+hosts.
+
+Usage::
+
+    $ python scripts/benchmark_shared_codecs.py
+"""
+from __future__ import print_function
+
+import random
+import timeit
+
+from robottelo.decorators.func_shared.codec import Codec, CodecError
+
+SERIALIZERS = ('json', 'msgpack')
+COMPRESSIONS = (None, 'zlib', 'lz4')
+REPEAT = 5
+NUMBER = 20
+
+
+def _entity(index, **fields):
+    """Return a dict similar to an entity ``to_json_dict``"""
+    entity = {
+        'id': index,
+        'name': 'entity_{0}_{1}'.format(index, random.randint(0, 10 ** 6)),
+        'description': ' '.join(
+            random.choice(['rhel', 'content', 'view', 'sync', 'host'])
+            for _ in range(10)
+        ),
+        'organization': {'id': 1},
+        'location': [{'id': 2}, {'id': 3}],
+        'created_at': '2018-01-01 10:00:00 UTC',
+    }
+    entity.update(fields)
+    return entity
+
+
+def get_payloads():
+    """Return a dict of payload names and shared function values"""
+    random.seed(0)
+    repos = [
+        _entity(index, url='http://example.com/repo/{0}'.format(index),
+                content_type='yum', product={'id': index % 10})
+        for index in range(200)
+    ]
+    hosts = [
+        _entity(index, ip='10.0.{0}.{1}'.format(index // 256, index % 256),
+                facts={'fact_{0}'.format(fact): fact for fact in range(50)})
+        for index in range(500)
+    ]
+    payloads = {
+        'entity': _entity(1),
+        'repos': {'org': _entity(1), 'repos': repos},
+        'hosts': {'hosts': hosts},
+    }
+    return {
+        name: dict(state='READY', result=result, error=None, pid=1,
+                   creation_datetime='2018-01-01T10:00:00')
+        for name, result in payloads.items()
+    }
+
+
+def benchmark(codec, value):
+    """Return the best encode and decode time in milliseconds and the
+    encoded size in bytes"""
+    encoded = codec.encode(value)
+    encode_time = min(timeit.repeat(
+        lambda: codec.encode(value), repeat=REPEAT, number=NUMBER))
+    decode_time = min(timeit.repeat(
+        lambda: codec.decode(encoded), repeat=REPEAT, number=NUMBER))
+    return (encode_time * 1000 / NUMBER, decode_time * 1000 / NUMBER,
+            len(encoded))
+
+
+def main():
+    print('{0:<8} {1:<16} {2:>12} {3:>12} {4:>12}'.format(
+        'payload', 'codec', 'encode (ms)', 'decode (ms)', 'size (B)'))
+    for name, value in sorted(get_payloads().items()):
+        for serializer in SERIALIZERS:
+            for compression in COMPRESSIONS:
+                codec_name = '+'.join(
+                    part for part in (serializer, compression) if part)
+                try:
+                    codec = Codec(serializer=serializer,
+                                  compression=compression, threshold=0)
+                except CodecError as err:
+                    print('{0:<8} {1:<16} {2}'.format(name, codec_name, err))
+                    continue
+                print('{0:<8} {1:<16} {2:>12.3f} {3:>12.3f} {4:>12}'.format(
+                    name, codec_name, *benchmark(codec, value)))
+
+
+if __name__ == '__main__':
+    main()
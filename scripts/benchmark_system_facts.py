@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Fake system facts generation benchmark
+
+Compare the generation of the facts of many fake content hosts by the legacy
+``generate_system_facts``, that deep copied the template for each system,
+with :func:`robottelo.system_facts.iter_system_facts` yielding dicts, overlay
+mappings and, when numpy is installed, the vectorized generation.
+
+Usage::
+
+    $ python scripts/benchmark_system_facts.py
+    $ python scripts/benchmark_system_facts.py --hosts 10000 --batch-size 500
+"""
+from __future__ import print_function
+
+import argparse
+import copy
+import time
+
+from robottelo import system_facts
+from robottelo.system_facts import (
+    SYSTEM_FACTS,
+    generate_system_facts,
+    iter_system_facts,
+)
+
+
+def legacy_generate(count):
+    """The legacy generation, a deep copy of the template for each system"""
+    for _ in range(count):
+        copy.deepcopy(SYSTEM_FACTS)
+        generate_system_facts()
+
+
+def stream_generate(count, batch_size, **kwargs):
+    for batch in iter_system_facts(
+            count, batch_size=batch_size, seed=42, **kwargs):
+        for _ in batch:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hosts', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    runs = [
+        ('legacy', lambda: legacy_generate(args.hosts)),
+        ('stream dicts',
+         lambda: stream_generate(args.hosts, args.batch_size)),
+        ('stream overlay',
+         lambda: stream_generate(args.hosts, args.batch_size, overlay=True)),
+    ]
+    if system_facts.numpy is not None:
+        runs.append((
+            'stream vectorized',
+            lambda: stream_generate(
+                args.hosts, args.batch_size, overlay=True, vectorized=True)
+        ))
+    else:
+        print('numpy not installed, no vectorized generation')
+    for name, run in runs:
+        start = time.time()
+        run()
+        print('{0} generation of {1} systems facts (s): {2:.2f}'.format(
+            name, args.hosts, time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
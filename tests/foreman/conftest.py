@@ -2,15 +2,34 @@
 """Configurations for py.test runner"""
 import datetime
 import logging
+import os
+import random
+import tempfile
 
 import pytest
 from nailgun import entities
 
+from robottelo import datapool, scheduling
+from robottelo.api.session import log_stats
 from robottelo.cleanup import EntitiesCleaner
 from robottelo.config import settings
-from robottelo.decorators import setting_is_set
-from robottelo.bz_helpers import get_deselect_bug_ids, group_by_key
-from robottelo.helpers import get_func_name
+from robottelo.config.base import DATAPOINT_SEED_ENV, SETTINGS_SNAPSHOT_ENV
+from robottelo.datafactory import (
+    get_datapoint_coverage,
+    log_datapoint_coverage,
+)
+from robottelo.decorators import (
+    get_feature_matrix,
+    get_required_features,
+    setting_is_set,
+)
+from robottelo.decorators.func_shared import contention, storage_gc, warmup
+from robottelo.bz_helpers import (
+    get_deselect_bug_ids,
+    get_deselected_items,
+    load_runtime_bugs,
+    save_runtime_bugs,
+)
 
 
 def log(message, level="DEBUG"):
@@ -47,6 +66,13 @@ def pytest_report_header(config):
         'shared_function enabled - {0} - scope: {1} - storage: {2}'.format(
             shared_function_enabled, scope, storage))
 
+    if settings.configured and (settings.datapoint_budget or
+                                settings.datapoint_cover):
+        messages.append(
+            'datapoint budget: {0} - cover: {1} - seed: {2}'.format(
+                settings.datapoint_budget, settings.datapoint_cover,
+                settings.datapoint_seed))
+
     return messages
 
 
@@ -119,6 +145,207 @@ def log_test_execution(robottelo_logger, request):
     robottelo_logger.debug('Finished Test: {}'.format(test_full_name))
 
 
+def pytest_configure(config):
+    """Draw the datapoint seed when not set in the settings file, once by the
+    master process, the xdist workers inherit it from the environment.
+
+    Write the validated settings snapshot loaded by the xdist workers,
+    that do not read and validate the settings file each.
+
+    With the duration scheduling, set the collection info file written by
+    the xdist workers for the master scheduler.
+    """
+    if hasattr(config, 'slaveinput'):
+        return
+    if not os.environ.get(DATAPOINT_SEED_ENV):
+        os.environ[DATAPOINT_SEED_ENV] = str(random.randint(0, 10 ** 6))
+    if settings.configured and settings.datapoint_seed is None:
+        settings.datapoint_seed = int(os.environ[DATAPOINT_SEED_ENV])
+    if not config.getoption('numprocesses', None):
+        return
+    if not settings.configured:
+        settings.configure()
+    snapshot_path = os.path.join(
+        tempfile.gettempdir(),
+        'robottelo_settings_{0}.pickle'.format(os.getpid())
+    )
+    settings.write_snapshot(snapshot_path)
+    os.environ[SETTINGS_SNAPSHOT_ENV] = snapshot_path
+    config.settings_snapshot = snapshot_path
+    if scheduling.is_duration_scheduling_enabled():
+        config.schedule_info_file = os.path.join(
+            tempfile.gettempdir(),
+            'robottelo_schedule_{0}.json'.format(os.getpid())
+        )
+
+
+def pytest_unconfigure(config):
+    """Remove the settings snapshot and the collection info file written for
+    the xdist workers"""
+    for name in ('settings_snapshot', 'schedule_info_file'):
+        file_path = getattr(config, name, None)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Send the collection info file path to the xdist worker"""
+    schedule_info_file = getattr(node.config, 'schedule_info_file', None)
+    if schedule_info_file:
+        node.slaveinput['schedule_info_file'] = schedule_info_file
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    """Schedule the tests by their durations of the previous runs, when
+    enabled in settings"""
+    if not hasattr(config, 'schedule_info_file'):
+        return None
+    config.duration_scheduler = scheduling.DurationScheduling(
+        config,
+        scheduling.DurationHistory(scheduling.get_durations_file()),
+        collection_info_file=config.schedule_info_file,
+        log=log
+    )
+    return config.duration_scheduler
+
+
+def pytest_sessionstart(session):
+    """Load the bugs fetched at runtime by the previous sessions from the
+    Bugzilla cache.
+
+    Delete the expired shared functions values and the abandoned locks,
+    only once per session, by the xdist master or the single process.
+    """
+    load_runtime_bugs()
+    if hasattr(session.config, 'slaveinput'):
+        return
+    if (setting_is_set('shared_function') and
+            settings.shared_function.gc_on_start):
+        deleted = storage_gc.collect(
+            time_budget=settings.shared_function.gc_time_budget)
+        log('shared storage garbage collection: deleted values: {values}, '
+            'locks: {locks}, function locks: {function_locks}'
+            .format(**deleted))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_finish(session):
+    """Start in background the warmup of the shared functions used by the
+    collected tests, once per session by the single process or the first
+    xdist worker.
+
+    The xdist worker writes the ``run_in_one_thread`` tests ids for the
+    master scheduler, before its collection is sent to the master.
+    """
+    slaveinput = getattr(session.config, 'slaveinput', {})
+    session.config.shared_warmup = warmup.start_warmup(
+        session.items, worker_id=slaveinput.get('slaveid'))
+    schedule_info_file = slaveinput.get('schedule_info_file')
+    if schedule_info_file:
+        scheduling.write_collection_info(schedule_info_file, session.items)
+
+
+def pytest_collectstart(collector):
+    """Seed the datafactory values generated at the test module import by the
+    module path"""
+    if isinstance(collector, pytest.Module) and datapool.is_enabled():
+        datapool.use_pool(collector.nodeid)
+
+
+def pytest_runtest_setup(item):
+    """Wait the warmup of the shared functions used by the test, and seed
+    the datafactory values generated by the test by its id"""
+    shared_warmup = getattr(item.config, 'shared_warmup', None)
+    if shared_warmup is not None:
+        shared_warmup.wait_for_items([item])
+    if datapool.is_enabled():
+        datapool.use_pool(item.nodeid)
+
+
+def pytest_runtest_logreport(report):
+    """Record the tests durations, by the xdist master or the single
+    process"""
+    if (not os.environ.get('PYTEST_XDIST_WORKER') and
+            scheduling.is_duration_scheduling_enabled()):
+        scheduling.record_report(report)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect the shared functions and function locks contention records of
+    the finished xdist worker.
+    """
+    worker_stats = getattr(node, 'slaveoutput', {}).get('shared_contention')
+    if worker_stats:
+        if not hasattr(node.config, 'workers_contention'):
+            node.config.workers_contention = []
+        node.config.workers_contention.append(worker_stats)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Log the nailgun connection reuse and endpoints latency of this
+    process, and the shared functions warmup duration. Save the bugs fetched
+    at runtime in the Bugzilla cache.
+
+    The xdist master or the single process saves the tests durations, the
+    xdist workers log their datapoints selection coverage.
+
+    The xdist workers send their contention records to the master, that
+    writes the contention report of all the workers.
+    """
+    log_stats(log=log)
+    save_runtime_bugs()
+    shared_warmup = getattr(session.config, 'shared_warmup', None)
+    if shared_warmup is not None:
+        shared_warmup.wait()
+        warmup.log_report(shared_warmup, log=log)
+    if hasattr(session.config, 'slaveoutput'):
+        session.config.slaveoutput['shared_contention'] = (
+            contention.get_stats())
+        log_datapoint_coverage(log=log)
+        return
+    if scheduling.is_duration_scheduling_enabled():
+        scheduling.save_session_durations()
+    stats = contention.merge_stats(
+        contention.get_stats(),
+        *getattr(session.config, 'workers_contention', [])
+    )
+    session.config.shared_contention = stats
+    if stats:
+        contention.write_report(stats)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report the shared functions warmup duration, the top keys by wait
+    time of the shared functions and function locks, the predicted and
+    actual makespan of the duration scheduling, and the datapoints selection
+    coverage"""
+    shared_warmup = getattr(terminalreporter.config, 'shared_warmup', None)
+    if shared_warmup is not None and shared_warmup.get_report():
+        terminalreporter.write_sep('-', 'shared functions warmup')
+        warmup.log_report(shared_warmup, log=terminalreporter.write_line)
+    stats = getattr(terminalreporter.config, 'shared_contention', None)
+    if stats:
+        terminalreporter.write_sep(
+            '-', 'shared functions and function locks contention')
+        contention.log_report(stats, log=terminalreporter.write_line)
+        terminalreporter.write_line(
+            'full report: {0}'.format(contention.DEFAULT_REPORT_FILE))
+    duration_scheduler = getattr(
+        terminalreporter.config, 'duration_scheduler', None)
+    if duration_scheduler is not None:
+        terminalreporter.write_sep('-', 'duration scheduling')
+        scheduling.log_report(
+            duration_scheduler.get_report(), log=terminalreporter.write_line)
+    if get_datapoint_coverage():
+        terminalreporter.write_sep(
+            '-', 'datapoints selection, seed: {0}'.format(
+                settings.datapoint_seed))
+        log_datapoint_coverage(log=terminalreporter.write_line)
+
+
 def pytest_namespace():
     """return dict of name->object to be made globally available in
     the pytest namespace.  This hook is called at plugin registration
@@ -137,37 +364,36 @@ def pytest_namespace():
     }
 
 
-def _extract_setup_class_ids(item):
-    setup_class_method = getattr(item.parent.obj, 'setUpClass', None)
-    return getattr(setup_class_method, 'bugzilla_ids', [])
-
-
 def pytest_collection_modifyitems(items, config):
     """ called after collection has been performed, may filter or re-order
     the items in-place.
 
-    Deselecting all tests skipped due to WONTFIX BZ.
+    Deselecting all tests skipped due to WONTFIX BZ, and when enabled in
+    settings all tests skipped due to missing configuration.
     """
     if not settings.configured:
         settings.configure()
+    # validate once for the whole session the feature sections the collected
+    # tests require, the lazy settings do not read the other ones
+    get_feature_matrix().build(get_required_features(items))
 
+    removal_ids = ()
     if settings.bugzilla.wontfix_lookup is not True:
-        # if lookup is disable return all collection unmodified
         log('BZ deselect is disabled in settings')
+    else:
+        removal_ids = pytest.bugzilla.removal_ids
+    if not (removal_ids or settings.deselect_unconfigured):
+        # return all collection unmodified
         return items
 
-    deselected_items = []
-    decorated_functions = group_by_key(pytest.bugzilla.decorated_functions)
-
     log("Collected %s test cases" % len(items))
-
-    for item in items:
-        name = get_func_name(item.function, test_item=item)
-        bug_ids = list(decorated_functions.get(name, []))
-        bug_ids.extend(_extract_setup_class_ids(item))
-        if any(bug_id in pytest.bugzilla.removal_ids for bug_id in bug_ids):
-            deselected_items.append(item)
-            log("Deselected test %s" % name)
-
-    config.hook.pytest_deselected(items=deselected_items)
-    items[:] = [item for item in items if item not in deselected_items]
+    selected_items, deselected_items = get_deselected_items(
+        items,
+        removal_ids=removal_ids,
+        decorated_functions=pytest.bugzilla.decorated_functions,
+        unconfigured=settings.deselect_unconfigured,
+        log=log
+    )
+    if deselected_items:
+        config.hook.pytest_deselected(items=deselected_items)
+        items[:] = selected_items
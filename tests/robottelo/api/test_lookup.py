@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Tests for :mod:`robottelo.api.lookup`."""
+import six
+from nailgun import entities, signals
+from nailgun.config import ServerConfig
+from unittest2 import TestCase, skipUnless
+
+from robottelo.api import lookup
+from robottelo.api.lookup import LookupCache
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+SERVER_CONFIG = ServerConfig('https://sat.example.com')
+
+
+def fake_response(results, status_code=200, headers=None):
+    """Return a fake search response"""
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = {'results': results}
+    return response
+
+
+class LookupCacheTestCase(TestCase):
+    """Tests for :class:`robottelo.api.lookup.LookupCache`"""
+
+    def setUp(self):
+        self.cache = LookupCache({entities.Architecture: 60})
+        self._patcher = mock.patch('robottelo.api.lookup.client.get')
+        self.get = self._patcher.start()
+        self.get.return_value = fake_response(
+            [{'id': 1, 'name': 'x86_64'}], headers={'ETag': 'W/"abc"'})
+
+    def tearDown(self):
+        self._patcher.stop()
+
+    def search(self, name='x86_64', entity_cls=entities.Architecture):
+        return self.cache.search(
+            entity_cls(SERVER_CONFIG),
+            query={'search': 'name="{0}"'.format(name)}
+        )
+
+    def test_search_results(self):
+        """The cached search returns new entities"""
+        first = self.search()
+        second = self.search()
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(first[0].id, 1)
+        self.assertEqual(second[0].name, 'x86_64')
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+
+    def test_search_query_is_part_of_key(self):
+        """Different queries are cached separately"""
+        self.search('x86_64')
+        self.search('i386')
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_credentials_are_part_of_key(self):
+        """The searches of different users are cached separately"""
+        self.search()
+        self.cache.search(
+            entities.Architecture(ServerConfig(
+                'https://sat.example.com', auth=('viewer', 'changeme'))),
+            query={'search': 'name="x86_64"'}
+        )
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_not_registered_entity(self):
+        """Searches of not registered entities are not cached"""
+        with mock.patch.object(entities.Domain, 'search') as search:
+            self.cache.search(entities.Domain(SERVER_CONFIG))
+            self.cache.search(entities.Domain(SERVER_CONFIG))
+        self.assertEqual(search.call_count, 2)
+        self.get.assert_not_called()
+
+    def test_revalidation_not_modified(self):
+        """Expired results are revalidated using the ETag"""
+        self.search()
+        for entry in self.cache._entries.values():
+            entry.fetched_at -= 61
+        self.get.return_value = fake_response([], status_code=304)
+        results = self.search()
+        self.assertEqual(results[0].name, 'x86_64')
+        self.assertEqual(
+            self.get.call_args[1]['headers'], {'If-None-Match': 'W/"abc"'})
+        self.assertEqual(self.cache.get_stats()['revalidations'], 1)
+
+    def test_revalidation_modified(self):
+        """Expired and modified results are replaced"""
+        self.search()
+        for entry in self.cache._entries.values():
+            entry.fetched_at -= 61
+        self.get.return_value = fake_response([{'id': 2, 'name': 'x86_64'}])
+        self.assertEqual(self.search()[0].id, 2)
+
+    def test_invalidate(self):
+        """Invalidated results are fetched again"""
+        self.search()
+        self.cache.invalidate(entities.Architecture)
+        self.search()
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_invalidate_lookups(self):
+        """The process lookup cache is invalidated without signals"""
+        with mock.patch.object(lookup, 'lookup_cache', self.cache):
+            self.search()
+            lookup.invalidate_lookups(entities.Architecture)
+            self.search()
+        self.assertEqual(self.get.call_count, 2)
+
+    @skipUnless(signals.SIGNALS_AVAILABLE, 'blinker is not installed')
+    def test_invalidate_on_create(self):
+        """Creating an entity of a cached class invalidates the results"""
+        self.search()
+        signals.post_create.send(entities.Architecture)
+        self.search()
+        self.assertEqual(self.get.call_count, 2)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Tests for :mod:`robottelo.api.session`."""
+import requests
+import six
+from nailgun import client
+from unittest2 import TestCase
+
+from robottelo.api import session
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class GetEndpointNameTestCase(TestCase):
+    """Tests for :func:`robottelo.api.session.get_endpoint_name`"""
+
+    def test_ids_are_replaced(self):
+        self.assertEqual(
+            session.get_endpoint_name(
+                'get', 'https://sat.example.com/api/v2/hosts/12/facts'),
+            'GET /api/v2/hosts/:id/facts'
+        )
+
+    def test_uuids_are_replaced(self):
+        self.assertEqual(
+            session.get_endpoint_name(
+                'get',
+                'https://sat.example.com/foreman_tasks/api/tasks/'
+                '0f4b2a3c-8bd4-4d4b-9f7e-0e6a5d2a1c3b'
+            ),
+            'GET /foreman_tasks/api/tasks/:id'
+        )
+
+    def test_names_are_kept(self):
+        self.assertEqual(
+            session.get_endpoint_name(
+                'post', 'https://sat.example.com/katello/api/v2/repositories'),
+            'POST /katello/api/v2/repositories'
+        )
+
+
+class PooledSessionTestCase(TestCase):
+    """Tests for :class:`robottelo.api.session.PooledSession`"""
+
+    def setUp(self):
+        self.pooled_session = session.PooledSession(pool_size=3)
+        self._patcher = mock.patch.object(
+            self.pooled_session.session, 'request')
+        self.request = self._patcher.start()
+
+    def tearDown(self):
+        self._patcher.stop()
+
+    def test_session_is_reused(self):
+        """The same session is used for all requests in a process"""
+        self.assertIs(
+            self.pooled_session.session, self.pooled_session.session)
+        adapter = self.pooled_session.session.get_adapter('https://sat')
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_no_cookies(self):
+        """The session keeps no response cookie, it is shared by all the
+        users"""
+        session_ = self.pooled_session.session
+        url = 'https://sat.example.com/api/v2/users/1'
+        raw = mock.Mock(_original_response=mock.Mock(msg=mock.Mock(
+            get_all=lambda name, default: ['_session_id=1234; path=/'])))
+        requests.cookies.extract_cookies_to_jar(
+            session_.cookies, requests.Request('GET', url), raw)
+        self.assertEqual(len(session_.cookies), 0)
+        prepared = session_.prepare_request(requests.Request('GET', url))
+        self.assertNotIn('Cookie', prepared.headers)
+
+    def test_requests_api(self):
+        """The requests module functions are sent through the session"""
+        url = 'https://sat.example.com/api/v2/hosts/1'
+        self.pooled_session.get(url, params={'a': 1}, verify=False)
+        self.request.assert_called_with(
+            'get', url, params={'a': 1}, verify=False, allow_redirects=True)
+        self.pooled_session.post(url, data='{}', verify=False)
+        self.request.assert_called_with(
+            'post', url, data='{}', json=None, verify=False)
+        self.pooled_session.delete(url)
+        self.request.assert_called_with('delete', url)
+        self.assertIs(
+            self.pooled_session.exceptions, requests.exceptions)
+
+    def test_latency_by_endpoint(self):
+        """The requests are counted by endpoint"""
+        for host_id in range(3):
+            self.pooled_session.get(
+                'https://sat.example.com/api/v2/hosts/{0}'.format(host_id))
+        self.pooled_session.put('https://sat.example.com/api/v2/hosts/1')
+        endpoints = self.pooled_session.get_stats()['endpoints']
+        self.assertEqual(endpoints['GET /api/v2/hosts/:id']['count'], 3)
+        self.assertEqual(endpoints['PUT /api/v2/hosts/:id']['count'], 1)
+
+    def test_reuse_ratio(self):
+        """The reuse ratio is computed from the connection pools"""
+        pool = mock.Mock(num_requests=10, num_connections=2)
+        with mock.patch.object(
+                self.pooled_session, '_connection_pools',
+                return_value=[pool]):
+            stats = self.pooled_session.get_stats()
+        self.assertEqual(stats['requests'], 10)
+        self.assertEqual(stats['connections'], 2)
+        self.assertAlmostEqual(stats['reuse_ratio'], 0.8)
+
+
+class InstallPooledSessionTestCase(TestCase):
+    """Tests for :func:`robottelo.api.session.install_pooled_session`"""
+
+    def tearDown(self):
+        session.uninstall_pooled_session()
+
+    def test_install(self):
+        """NailGun client requests module is replaced once"""
+        pooled_session = session.install_pooled_session(pool_size=2)
+        self.assertIs(client.requests, pooled_session)
+        self.assertIs(session.get_pooled_session(), pooled_session)
+        self.assertIs(session.install_pooled_session(), pooled_session)
+
+    def test_uninstall(self):
+        """NailGun client requests module is restored"""
+        session.install_pooled_session()
+        session.uninstall_pooled_session()
+        self.assertIs(client.requests, requests)
+        self.assertIsNone(session.get_pooled_session())
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Tests for :mod:`robottelo.api.tasks`."""
+import threading
+
+import six
+from nailgun import entities, entity_mixins
+from unittest2 import TestCase
+
+from robottelo.api import tasks
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class FakeEntity(object):
+    """An entity with a method that triggers a foreman task"""
+
+    def __init__(self, task_id='task-id'):
+        self.task_id = task_id
+        self.calls = []
+
+    def sync(self, synchronous=True, **kwargs):
+        self.calls.append((synchronous, kwargs))
+        return {'id': self.task_id, 'label': 'Sync', 'state': 'running'}
+
+
+class RunEntityTaskTestCase(TestCase):
+    """Tests for :func:`robottelo.api.tasks.run_entity_task`"""
+
+    def setUp(self):
+        self._patcher = mock.patch('robottelo.api.tasks.entities.ForemanTask')
+        self.foreman_task = self._patcher.start()
+        self.read_json = self.foreman_task.return_value.read_json
+
+    def tearDown(self):
+        self._patcher.stop()
+
+    def test_call_is_asynchronous(self):
+        """The entity method is called with synchronous=False"""
+        self.read_json.return_value = {'state': 'stopped', 'result': 'success'}
+        entity = FakeEntity()
+        result = tasks.run_entity_task(entity.sync, timeout=10, data={'a': 1})
+        self.assertEqual(entity.calls, [(False, {'data': {'a': 1}})])
+        self.assertEqual(result['result'], 'success')
+        self.foreman_task.assert_called_once_with(None, id='task-id')
+
+    def test_synchronous_kwarg(self):
+        """The synchronous kwarg of the caller is not passed twice, the task
+        is not waited when it is False"""
+        self.read_json.return_value = {'state': 'stopped', 'result': 'success'}
+        entity = FakeEntity()
+        result = tasks.run_entity_task(entity.sync, synchronous=True)
+        self.assertEqual(result['result'], 'success')
+        result = tasks.run_entity_task(entity.sync, synchronous=False)
+        self.assertEqual(result['state'], 'running')
+        self.assertEqual(entity.calls, [(False, {}), (False, {})])
+        self.assertEqual(self.read_json.call_count, 1)
+
+    def test_global_timeout_untouched(self):
+        """The nailgun global task timeout is not modified"""
+        original_timeout = entity_mixins.TASK_TIMEOUT
+        self.read_json.return_value = {'state': 'stopped', 'result': 'success'}
+        tasks.run_entity_task(FakeEntity().sync, timeout=original_timeout+1)
+        self.assertEqual(entity_mixins.TASK_TIMEOUT, original_timeout)
+
+    def test_not_a_task_response(self):
+        """A response that is not a task is returned as is"""
+        result = tasks.run_entity_task(lambda synchronous: 'content')
+        self.assertEqual(result, 'content')
+        self.foreman_task.assert_not_called()
+
+    def test_task_failed(self):
+        """TaskFailedError is raised when the task result is not success"""
+        self.read_json.return_value = {'state': 'stopped', 'result': 'error'}
+        with self.assertRaises(entity_mixins.TaskFailedError):
+            tasks.run_entity_task(FakeEntity().sync)
+
+    def test_task_timeout(self):
+        """TaskTimedOutError is raised when the deadline is reached"""
+        self.read_json.return_value = {'state': 'running', 'result': 'pending'}
+        with self.assertRaises(entity_mixins.TaskTimedOutError):
+            tasks.run_entity_task(FakeEntity().sync, timeout=0, poll_rate=1)
+
+
+class EntityTaskExecutorTestCase(TestCase):
+    """Tests for :class:`robottelo.api.tasks.EntityTaskExecutor`"""
+
+    def setUp(self):
+        self._patcher = mock.patch('robottelo.api.tasks.poll_task')
+        self.poll_task = self._patcher.start()
+
+    def tearDown(self):
+        self._patcher.stop()
+
+    def test_tasks_are_waited_concurrently(self):
+        """All the submitted tasks are polled at the same time"""
+        barrier = threading.Event()
+        polling = []
+        lock = threading.Lock()
+
+        def poll_task(task_id, timeout=None, **kwargs):
+            with lock:
+                polling.append(task_id)
+                if len(polling) == 3:
+                    barrier.set()
+            # would time out if the tasks were waited one after another
+            self.assertTrue(barrier.wait(5))
+            return {'id': task_id, 'timeout': timeout}
+
+        self.poll_task.side_effect = poll_task
+        with tasks.EntityTaskExecutor(max_workers=3) as executor:
+            handles = [
+                executor.submit(FakeEntity(task_id=index).sync, timeout=index)
+                for index in range(3)
+            ]
+            results = tasks.wait_all(handles)
+        self.assertEqual(
+            results, [{'id': index, 'timeout': index} for index in range(3)])
+
+    def test_wait_all_raises_first_error(self):
+        """All the handles are waited and the first error is raised"""
+        self.poll_task.side_effect = [
+            {'id': 0}, entity_mixins.TaskFailedError('failed'), {'id': 2}]
+        with tasks.EntityTaskExecutor(max_workers=1) as executor:
+            handles = [
+                executor.submit(FakeEntity(task_id=index).sync)
+                for index in range(3)
+            ]
+            with self.assertRaises(entity_mixins.TaskFailedError):
+                tasks.wait_all(handles)
+            self.assertTrue(all(handle.ready() for handle in handles))
+
+
+class ThreadSafePollingTestCase(TestCase):
+    """Tests for :func:`robottelo.api.tasks.install_thread_safe_polling`"""
+
+    def setUp(self):
+        self.nailgun_poll_task = mock.Mock(return_value='main thread')
+        for target, name, value in (
+                (entity_mixins, '_poll_task', self.nailgun_poll_task),
+                (entities, '_poll_task', self.nailgun_poll_task),
+                (tasks, '_nailgun_poll_task', None)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        poll_patcher = mock.patch.object(
+            tasks, 'poll_task', return_value='other thread')
+        self.poll_task = poll_patcher.start()
+        self.addCleanup(poll_patcher.stop)
+
+    def test_polled_out_of_main_thread(self):
+        """The tasks waited by nailgun out of the main thread are polled by
+        poll_task, with the nailgun timeout"""
+        tasks.install_thread_safe_polling()
+        tasks.install_thread_safe_polling()
+        self.assertIs(entities._poll_task, entity_mixins._poll_task)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                entities._poll_task('task-id', 'config')))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, ['other thread'])
+        self.poll_task.assert_called_once_with(
+            'task-id', timeout=entity_mixins.TASK_TIMEOUT, poll_rate=None,
+            server_config='config')
+        self.assertEqual(
+            entity_mixins._poll_task('task-id', 'config'), 'main thread')
+        self.nailgun_poll_task.assert_called_once_with(
+            'task-id', 'config', poll_rate=None, timeout=None)
@@ -1,7 +1,33 @@
 """Unit tests for :mod:`robottelo.api.utils`."""
+import importlib
+import shutil
+import tempfile
+
+import six
+from fauxfactory import gen_string
+from nailgun.config import ServerConfig
 from robottelo.api import utils
+from robottelo.api.lookup import invalidate_lookups
+from robottelo.decorators.func_shared import file_storage
+from robottelo.decorators.func_shared.shared import (
+    _set_configured,
+    clear_cache,
+    enable_shared_function,
+    set_default_scope,
+)
 from unittest2 import TestCase
 
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+SERVER_CONFIG = ServerConfig('https://sat.example.com')
+
+# the package exports the shared decorator under the shared module name
+shared_module = importlib.import_module(
+    'robottelo.decorators.func_shared.shared')
+
 
 class UtilsTestCase(TestCase):
     """Tests for the functions in :mod:`robottelo.api.utils`."""
@@ -19,3 +45,165 @@ class UtilsTestCase(TestCase):
             utils.one_to_many_names('person'),
             {'person', 'person_ids', 'people'},
         )
+
+
+class PermissionsTestCase(TestCase):
+    """Tests for the permissions helpers in :mod:`robottelo.api.utils`."""
+
+    def setUp(self):
+        invalidate_lookups()
+        self.addCleanup(invalidate_lookups)
+        config_patcher = mock.patch(
+            'nailgun.entity_mixins.DEFAULT_SERVER_CONFIG', SERVER_CONFIG)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+        permissions = [
+            {'id': 1, 'name': 'access_dashboard', 'resource_type': None},
+            {'id': 2, 'name': 'view_organizations',
+             'resource_type': 'Organization'},
+            {'id': 3, 'name': 'view_locations', 'resource_type': 'Location'},
+            {'id': 5, 'name': 'view_hosts', 'resource_type': 'Other'},
+            {'id': 4, 'name': 'view_hosts', 'resource_type': 'Host'},
+        ]
+        get_patcher = mock.patch('robottelo.api.lookup.client.get')
+        self.get = get_patcher.start()
+        self.addCleanup(get_patcher.stop)
+        self.get.return_value = mock.Mock(status_code=200, headers={})
+        self.get.return_value.json.return_value = {'results': permissions}
+        filter_patcher = mock.patch.object(utils.entities, 'Filter')
+        self.filter = filter_patcher.start()
+        self.addCleanup(filter_patcher.stop)
+
+    def test_permissions_index_fetched_once(self):
+        """The permissions catalog is fetched once"""
+        utils.get_permissions_index()
+        index = utils.get_permissions_index()
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(index[('Organization', 'view_organizations')].id, 2)
+        self.assertEqual(index[(None, 'view_locations')].id, 3)
+        self.assertNotIn((None, 'view_hosts'), index)
+
+    def test_permissions_index_by_user(self):
+        """The permissions catalog is fetched again for an other user"""
+        utils.get_permissions_index()
+        user_config = ServerConfig(
+            'https://sat.example.com', auth=('user', 'password'))
+        with mock.patch(
+                'nailgun.entity_mixins.DEFAULT_SERVER_CONFIG', user_config):
+            utils.get_permissions_index()
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_permissions_first_match(self):
+        """The first permission of a name that is not unique is returned"""
+        permissions = utils.get_permissions_by_names(
+            {None: ['view_hosts', 'view_locations']}, first_match=True)
+        self.assertEqual(
+            [permission.id for permission in permissions[None]], [4, 3])
+
+    def test_create_role_permissions(self):
+        """A filter is created for each resource type"""
+        role = mock.Mock()
+        utils.create_role_permissions(role, {
+            None: ['access_dashboard'],
+            'Organization': ['view_organizations'],
+            'Host': ['view_hosts'],
+        })
+        created = sorted(
+            [permission.id for permission in call[1]['permission']]
+            for call in self.filter.call_args_list
+        )
+        self.assertEqual(created, [[1], [2], [4]])
+        self.assertEqual(self.filter.return_value.create.call_count, 3)
+
+    def test_create_role_permissions_not_found(self):
+        """All the unknown permissions are reported and no filter created"""
+        with self.assertRaises(utils.entities.APIResponseError) as context:
+            utils.create_role_permissions(mock.Mock(), {
+                None: ['view_hosts'],
+                'Organization': ['view_organizations', 'unknown'],
+            })
+        message = str(context.exception)
+        self.assertIn('(None, "view_hosts")', message)
+        self.assertIn('(Organization, "unknown")', message)
+        self.filter.assert_not_called()
+
+    def test_create_role_permissions_empty_resource_type(self):
+        """A resource type without permissions is an error"""
+        with self.assertRaises(ValueError):
+            utils.create_role_permissions(mock.Mock(), {'Organization': []})
+
+
+class ConfigureProvisioningTestCase(TestCase):
+    """Tests for :func:`robottelo.api.utils.configure_provisioning`."""
+
+    def setUp(self):
+        # share the environment in a temporary file storage, without reading
+        # the shared function settings, and restore the module state
+        self.addCleanup(_set_configured, shared_module._configured)
+        self.addCleanup(enable_shared_function, shared_module.ENABLED)
+        self.addCleanup(set_default_scope, shared_module.NAMESPACE_SCOPE)
+        self.addCleanup(clear_cache)
+        _set_configured(True)
+        enable_shared_function(True)
+        set_default_scope(gen_string('alpha', 10))
+        storage_patcher = mock.patch.object(
+            shared_module, 'DEFAULT_STORAGE_HANDLER', 'file')
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+        shared_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shared_dir)
+        shared_dir_patcher = mock.patch.object(
+            file_storage, 'SHARED_DIR', shared_dir)
+        shared_dir_patcher.start()
+        self.addCleanup(shared_dir_patcher.stop)
+        config_patcher = mock.patch(
+            'nailgun.entity_mixins.DEFAULT_SERVER_CONFIG', SERVER_CONFIG)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+        settings_patcher = mock.patch.object(utils, 'settings')
+        settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        self.org = mock.Mock(id=1)
+        self.loc = mock.Mock(id=2)
+        create_patcher = mock.patch.object(
+            utils, '_create_provisioning_environment',
+            side_effect=lambda *args, **kwargs: {
+                'host_group': gen_string('alpha'), 'host_group_id': 3})
+        self.create = create_patcher.start()
+        self.addCleanup(create_patcher.stop)
+        exists_patcher = mock.patch.object(
+            utils, '_provisioning_environment_exists', return_value=True)
+        self.exists = exists_patcher.start()
+        self.addCleanup(exists_patcher.stop)
+
+    def configure_provisioning(self, **kwargs):
+        return utils.configure_provisioning(
+            org=self.org, loc=self.loc, **kwargs)
+
+    def test_environment_is_reused(self):
+        """The stored environment is returned to later calls"""
+        first = self.configure_provisioning()
+        second = self.configure_provisioning()
+        self.assertEqual(first, second)
+        self.assertEqual(self.create.call_count, 1)
+        self.assertNotIn('org_id', first)
+        self.exists.assert_called_once_with(
+            dict(first, org_id=1, loc_id=2, compute=False, os_name=None))
+
+    def test_environment_by_os(self):
+        """The environment is stored by os"""
+        self.configure_provisioning()
+        self.configure_provisioning(os='RHEL 7.5')
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_stale_environment(self):
+        """A new environment is created when the stored one was removed"""
+        first = self.configure_provisioning()
+        self.exists.return_value = False
+        second = self.configure_provisioning()
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.create.call_count, 2)
+        # the new environment replaced the stored one
+        self.exists.return_value = True
+        self.assertEqual(self.configure_provisioning(), second)
+        self.assertEqual(self.create.call_count, 2)
@@ -0,0 +1,135 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.bz_cache`."""
+import os
+import shutil
+import tempfile
+import time
+
+import six
+from unittest2 import TestCase
+
+from robottelo.bz_cache import BugzillaCache
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+TEST_MODULE = """
+from robottelo.decorators import skip_if_bug_open
+
+
+@skip_if_bug_open('bugzilla', 1234)
+def test_first():
+    pass
+
+
+@skip_if_bug_open('bugzilla', {bug_id})
+def test_second():
+    pass
+"""
+
+
+def _bug_data(bug_id):
+    return {'id': bug_id, 'resolution': '', 'flags': {'sat-6.3.0': '+'}}
+
+
+class BugzillaCacheTestCase(TestCase):
+    """Tests for :class:`robottelo.bz_cache.BugzillaCache`"""
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_dir)
+        self.tests_dir = os.path.join(self.root_dir, 'tests')
+        os.mkdir(self.tests_dir)
+        self.cache_file = os.path.join(self.root_dir, 'cache.json')
+        self._write_module('test_first.py', 1235)
+        self._write_module('test_second.py', 1236)
+        reader_patcher = mock.patch('robottelo.bz_cache.BZReader')
+        self.reader = reader_patcher.start()
+        self.addCleanup(reader_patcher.stop)
+        self.reader.return_value.get_bug_data_in_bulk.side_effect = (
+            lambda bug_ids: {bug_id: _bug_data(bug_id) for bug_id in bug_ids})
+
+    def _write_module(self, name, bug_id):
+        with open(os.path.join(self.tests_dir, name), 'w') as file_handler:
+            file_handler.write(TEST_MODULE.format(bug_id=bug_id))
+
+    def _fetched_ids(self):
+        get_bug_data = self.reader.return_value.get_bug_data_in_bulk
+        return sorted(
+            bug_id
+            for call in get_bug_data.mock_calls
+            for bug_id in call[1][0]
+        )
+
+    def test_decorated_bugs(self):
+        """The decorated bugs have their locations and their data"""
+        bugs = BugzillaCache(self.cache_file).get_decorated_bugs(
+            self.tests_dir)
+        self.assertEqual(sorted(bugs), ['1234', '1235', '1236'])
+        self.assertEqual(
+            [(os.path.basename(data['file_path']), data['line_number'])
+             for data in bugs['1234']['files_data']],
+            [('test_first.py', 4), ('test_second.py', 4)]
+        )
+        self.assertEqual(bugs['1235']['bug_data'], _bug_data('1235'))
+
+    def test_incremental(self):
+        """Only the modified files are parsed and only the new bugs are
+        fetched"""
+        bz_cache = BugzillaCache(self.cache_file)
+        bz_cache.get_decorated_bugs(self.tests_dir)
+        bz_cache.save()
+        self.assertEqual(bz_cache.parsed_files, 2)
+        self.reader.reset_mock()
+        self._write_module('test_second.py', 12370)
+        bz_cache = BugzillaCache(self.cache_file)
+        bugs = bz_cache.get_decorated_bugs(self.tests_dir)
+        self.assertEqual(bz_cache.parsed_files, 1)
+        self.assertEqual(self._fetched_ids(), ['12370'])
+        self.assertEqual(sorted(bugs), ['1234', '1235', '12370'])
+
+    def test_ttl_and_offline(self):
+        """The stale bugs are fetched again, except in offline mode"""
+        bz_cache = BugzillaCache(self.cache_file, ttl=60)
+        bz_cache.get_decorated_bugs(self.tests_dir)
+        bz_cache.bugs['1234']['fetched'] = time.time() - 120
+        bz_cache.save()
+        self.reader.reset_mock()
+        offline_bugs = BugzillaCache(
+            self.cache_file, ttl=60, offline=True).get_decorated_bugs(
+                self.tests_dir)
+        self.assertEqual(self._fetched_ids(), [])
+        self.assertEqual(offline_bugs['1234']['bug_data'], _bug_data('1234'))
+        BugzillaCache(self.cache_file, ttl=60).get_decorated_bugs(
+            self.tests_dir)
+        self.assertEqual(self._fetched_ids(), ['1234'])
+
+    def test_fetch_error(self):
+        """The stale data is kept when the fetch fails"""
+        bz_cache = BugzillaCache(self.cache_file, ttl=0)
+        bz_cache.get_decorated_bugs(self.tests_dir)
+        self.reader.return_value.get_bug_data_in_bulk.side_effect = (
+            IOError('connection refused'))
+        bugs = bz_cache.get_decorated_bugs(self.tests_dir)
+        self.assertEqual(bugs['1234']['bug_data'], _bug_data('1234'))
+
+    def test_runtime_bugs(self):
+        """The bugs fetched at runtime are saved and loaded, merged with the
+        ones saved by the other processes"""
+        first = BugzillaCache(self.cache_file)
+        second = BugzillaCache(self.cache_file)
+        first.update_runtime_bugs({1234: _bug_data('1234')})
+        first.save()
+        second.update_runtime_bugs({1235: _bug_data('1235')})
+        second.save()
+        runtime_cache = {}
+        BugzillaCache(self.cache_file).load_runtime_bugs(runtime_cache)
+        self.assertEqual(
+            runtime_cache,
+            {1234: _bug_data('1234'), 1235: _bug_data('1235')}
+        )
+        runtime_cache = {}
+        BugzillaCache(self.cache_file, ttl=0).load_runtime_bugs(runtime_cache)
+        self.assertEqual(runtime_cache, {})
@@ -1,9 +1,17 @@
 # coding: utf-8
 
+from collections import namedtuple
+
 from unittest2 import TestCase
-from robottelo.bz_helpers import get_deselect_bug_ids, group_by_key
+from robottelo.bz_helpers import (
+    get_deselect_bug_ids,
+    get_deselected_items,
+    group_by_key,
+)
 from robottelo.helpers import get_func_name
 
+FakeItem = namedtuple('FakeItem', ['nodeid', 'function', 'cls'])
+
 BZ_DATA = {
     '1234': {
         'bug_data': {
@@ -80,5 +88,45 @@ class BZHelperTestCase(TestCase):
         )
 
 
+class GetDeselectedItemsTestCase(TestCase):
+    """Tests for :func:`robottelo.bz_helpers.get_deselected_items`"""
+
+    def test_deselect(self):
+        """The tests of decorated functions and of classes which setUpClass
+        is decorated with bugs to remove are deselected"""
+        class RemovedTestCase(object):
+            @classmethod
+            def setUpClass(cls):
+                pass
+            setUpClass.__func__.bugzilla_ids = ['1235']
+
+        items = [
+            FakeItem('first', test_function, None),
+            FakeItem('second', test_other_function, None),
+            FakeItem('third', test_other_function, RemovedTestCase),
+        ]
+        messages = []
+        selected, deselected = get_deselected_items(
+            items,
+            removal_ids={'1234', '1235'},
+            decorated_functions=[
+                (get_func_name(test_function), '1234'),
+                (get_func_name(test_function), '1236'),
+            ],
+            log=messages.append
+        )
+        self.assertEqual([item.nodeid for item in selected], ['second'])
+        self.assertEqual(
+            [item.nodeid for item in deselected], ['first', 'third'])
+        self.assertEqual(messages, [
+            'Deselected test first: BZ 1234',
+            'Deselected test third: BZ 1235',
+        ])
+
+
 def test_function():
     """Does nothing, only used to test get_func_name"""
+
+
+def test_other_function():
+    """Does nothing, only used to test get_deselected_items"""
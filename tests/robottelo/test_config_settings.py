@@ -1,6 +1,19 @@
 """Tests for module ``robottelo.config.settings``."""
+import os
+import shutil
+import tempfile
+
 import six
-from robottelo.config.base import Settings, INIReader, ImproperlyConfigured
+from robottelo.api.session import (
+    get_pooled_session,
+    uninstall_pooled_session,
+)
+from robottelo.config.base import (
+    ImproperlyConfigured,
+    INIReader,
+    SETTINGS_SNAPSHOT_ENV,
+    Settings,
+)
 from unittest2 import TestCase
 
 if six.PY2:
@@ -51,6 +64,91 @@ class SettingsTestCase(TestCase):
             self.assertEqual(settings.server.hostname, 'example.com')
             self.assertEqual(settings.server.ssh_password, '1234')
 
+    @mock.patch(builtin_open, new_callable=lambda: get_valid_ini)
+    def test_configure_not_pooled_session(self, mock_open):
+        self.addCleanup(uninstall_pooled_session)
+        with mock.patch('os.path.isfile', return_value=True):
+            settings = Settings()
+            settings.configure()
+            self.assertIsNone(settings.http_client.pooled)
+            self.assertIsNone(get_pooled_session())
+
+    @mock.patch(builtin_open, new_callable=lambda: get_pooled_ini)
+    def test_configure_pooled_session(self, mock_open):
+        self.addCleanup(uninstall_pooled_session)
+        with mock.patch('os.path.isfile', return_value=True):
+            settings = Settings()
+            settings.configure()
+            self.assertTrue(settings.http_client.pooled)
+            self.assertEqual(settings.http_client.pool_size, 10)
+            self.assertIsNotNone(get_pooled_session())
+
+
+class SettingsSnapshotTestCase(TestCase):
+    """Tests for the settings snapshot and the lazy feature settings"""
+
+    def setUp(self):
+        self.addCleanup(uninstall_pooled_session)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.settings_path = os.path.join(self.tmp_dir, 'robottelo.properties')
+        self.snapshot_path = os.path.join(self.tmp_dir, 'settings.snapshot')
+        with open(self.settings_path, 'w') as handler:
+            handler.write('\n'.join(
+                list(get_valid_ini(None)) +
+                ['[http_client]', 'pool_size=5']))
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop(SETTINGS_SNAPSHOT_ENV, None)
+
+    def test_snapshot(self):
+        """The snapshot settings are loaded without reading the settings file
+        """
+        settings = Settings()
+        settings.configure(settings_path=self.settings_path)
+        settings.write_snapshot(self.snapshot_path)
+        os.environ[SETTINGS_SNAPSHOT_ENV] = self.snapshot_path
+        with mock.patch('robottelo.config.base.INIReader') as reader:
+            loaded_settings = Settings()
+            loaded_settings.configure(settings_path=self.settings_path)
+        self.assertFalse(reader.called)
+        self.assertEqual(loaded_settings.server.hostname, 'example.com')
+        self.assertEqual(loaded_settings.http_client.pool_size, 5)
+        self.assertEqual(loaded_settings.project, settings.project)
+
+    def test_outdated_snapshot(self):
+        """The settings file is read when modified after the snapshot"""
+        settings = Settings()
+        settings.configure(settings_path=self.settings_path)
+        settings.write_snapshot(self.snapshot_path)
+        os.environ[SETTINGS_SNAPSHOT_ENV] = self.snapshot_path
+        with open(self.settings_path, 'a') as handler:
+            handler.write('\n[robottelo]\nproject=sam\n')
+        loaded_settings = Settings()
+        loaded_settings.configure(settings_path=self.settings_path)
+        self.assertEqual(loaded_settings.project, 'sam')
+
+    def test_lazy(self):
+        """The feature settings are read and validated when accessed"""
+        with open(self.settings_path, 'a') as handler:
+            # an invalid feature settings
+            handler.write('\n[clients]\n[shared_function]\nstorage=sqlite\n')
+        settings = Settings()
+        settings.configure(settings_path=self.settings_path, lazy=True)
+        self.assertIn('clients', settings._pending_features)
+        self.assertIn('clients', settings.all_features)
+        # the invalid feature settings raise when accessed
+        with self.assertRaises(ImproperlyConfigured):
+            settings.clients
+        # an attribute error for the attribute lookup protocols
+        self.assertIsNone(getattr(settings, 'clients', None))
+        self.assertIn('shared_function', settings._pending_features)
+        self.assertEqual(settings.shared_function.storage, 'sqlite')
+        self.assertNotIn('shared_function', settings._pending_features)
+        with self.assertRaises(AttributeError):
+            settings.not_a_feature
+
 
 class FakeOpen(object):
     def __init__(self, lines, *args, **kwargs):
@@ -100,3 +198,8 @@ def get_valid_ini(path, *args, **kwargs):
         '[logger_root]', 'level=NOTSET', 'handlers=default'
     ]
     return FakeOpen(lines)
+
+
+def get_pooled_ini(path, *args, **kwargs):
+    return FakeOpen(
+        list(get_valid_ini(path)) + ['[http_client]', 'pooled=true'])
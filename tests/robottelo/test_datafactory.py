@@ -6,6 +6,7 @@ import unittest2
 
 from robottelo.config import settings
 from robottelo.constants import STRING_TYPES
+from robottelo import datafactory
 from robottelo.datafactory import (
     generate_strings_list,
     invalid_emails_list,
@@ -15,6 +16,8 @@ from robottelo.datafactory import (
     invalid_values_list,
     invalid_usernames_list,
     InvalidArgumentError,
+    pairwise_datapoints,
+    select_datapoints,
     valid_data_list,
     valid_docker_repository_names,
     valid_emails_list,
@@ -177,3 +180,86 @@ class InvalidValuesListTestCase(unittest2.TestCase):
         self.assertRaises(InvalidArgumentError, invalid_values_list, 'CLI')
         self.assertRaises(InvalidArgumentError, invalid_values_list, 'API')
         self.assertRaises(InvalidArgumentError, invalid_values_list, 'invalid')
+
+
+class SelectDatapointsTestCase(unittest2.TestCase):
+    """Tests for :meth:`robottelo.datafactory.select_datapoints` and
+    :meth:`robottelo.datafactory.pairwise_datapoints`"""
+
+    def setUp(self):
+        self.addCleanup(datafactory._datapoint_coverage.clear)
+        self.dataset = [
+            u'', u' ', u'abc', u'123', u'a' * 255, u'\u4e00' * 85, u'x',
+            u'<b>bold</b>', u'abcdefghijkl', u'7' * 20,
+        ]
+
+    def test_cover(self):
+        """The smallest covering subset is selected, the same for a seed"""
+        selected = select_datapoints(
+            self.dataset, cover=True, seed=1, name='dataset')
+        self.assertEqual(
+            set().union(*map(datafactory.get_datapoint_features, selected)),
+            set().union(*map(datafactory.get_datapoint_features,
+                             self.dataset))
+        )
+        self.assertLess(len(selected), len(self.dataset))
+        self.assertEqual(
+            selected, select_datapoints(self.dataset, cover=True, seed=1))
+        coverage = datafactory.get_datapoint_coverage()[0]
+        self.assertEqual(coverage['selected'], len(selected))
+        self.assertEqual(coverage['covered'], coverage['features'])
+
+    def test_budget(self):
+        """At most the budget datapoints are selected"""
+        self.assertEqual(
+            len(select_datapoints(self.dataset, budget=4, seed=1)), 4)
+        self.assertEqual(
+            len(select_datapoints(self.dataset, budget=20, seed=1)),
+            len(self.dataset)
+        )
+
+    def test_filtered_datapoint(self):
+        """The datafactory functions select the budget datapoints"""
+        with mock.patch('robottelo.datafactory.settings') as settings_mock:
+            settings_mock.run_one_datapoint = False
+            settings_mock.datapoint_budget = 3
+            settings_mock.datapoint_cover = False
+            settings_mock.datapoint_seed = 1
+            self.assertEqual(len(valid_names_list()), 3)
+        self.assertEqual(
+            [entry['name'] for entry in datafactory.get_datapoint_coverage()],
+            ['valid_names_list']
+        )
+
+    def test_selection_from_generator_features(self):
+        """The selection depends on the generator, not on its random
+        values"""
+        self.addCleanup(datafactory._generator_features.clear)
+
+        def random_lengths():
+            return [u'a' * random.randint(1, 255) for _ in range(10)]
+
+        with mock.patch('robottelo.datafactory.settings') as settings_mock:
+            settings_mock.run_one_datapoint = False
+            settings_mock.datapoint_budget = 0
+            settings_mock.datapoint_cover = True
+            settings_mock.datapoint_seed = 1
+            generator = datafactory.filtered_datapoint(random_lengths)
+            counts = {len(generator()) for _ in range(10)}
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(
+            datafactory.get_generator_features(random_lengths),
+            datafactory.get_generator_features(random_lengths)
+        )
+
+    def test_pairwise(self):
+        """Every pair of values of two lists is combined"""
+        factors = (list(range(4)), list(range(3)), ['api', 'cli', 'ui'])
+        combinations = pairwise_datapoints(*factors, seed=1)
+        self.assertLess(len(combinations), 4 * 3 * 3)
+        for first, second in itertools.combinations(range(3), 2):
+            self.assertEqual(
+                {(row[first], row[second]) for row in combinations},
+                set(itertools.product(factors[first], factors[second]))
+            )
+        self.assertEqual(combinations, pairwise_datapoints(*factors, seed=1))
@@ -0,0 +1,92 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.datapool`."""
+import string
+
+import six
+from unittest2 import TestCase
+
+from robottelo import datapool
+from robottelo.constants import STRING_TYPES
+from robottelo.datafactory import valid_data_list
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class DataPoolTestCase(TestCase):
+    """Tests for :class:`robottelo.datapool.DataPool`"""
+
+    def test_seeded(self):
+        """The same seed generates the same values"""
+        values = [
+            datapool.DataPool(1234, chunk_size=16).generate(str_type, 10, 5)
+            for _ in range(2)
+            for str_type in STRING_TYPES
+        ]
+        self.assertEqual(values[:len(STRING_TYPES)],
+                         values[len(STRING_TYPES):])
+        self.assertNotEqual(
+            datapool.DataPool(1234).gen_string('alpha', 20),
+            datapool.DataPool(1235).gen_string('alpha', 20)
+        )
+
+    def test_string_types(self):
+        """The strings have the characters of their type and the length"""
+        pool = datapool.DataPool(1234, chunk_size=16)
+        for value in pool.generate('alphanumeric', 50, 3):
+            self.assertEqual(len(value), 50)
+            self.assertTrue(
+                set(value) <= set(string.ascii_letters + string.digits))
+        self.assertTrue(
+            all(u'一' <= char <= u'鿌'
+                for char in pool.gen_string('cjk', 85)))
+        html = pool.gen_string('html', 5)
+        self.assertRegex(html, r'^<(\w+)>[a-zA-Z]{5}</\1>$')
+        self.assertEqual(len(pool.gen_string('utf8')), 10)
+        with self.assertRaises(ValueError):
+            pool.gen_string('unknown')
+
+
+class CurrentPoolTestCase(TestCase):
+    """Tests for the datafactory values drawn from the current pool"""
+
+    def setUp(self):
+        settings_patcher = mock.patch('robottelo.datapool.settings')
+        self.settings = settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        self.settings.configured = True
+        self.settings.datapoint_pool = True
+        self.settings.datapoint_seed = 42
+        self.addCleanup(datapool._current_pool.__delitem__, slice(None))
+
+    def test_seed_by_key(self):
+        """The datafactory values are the same for a key and a seed"""
+        datapool.use_pool('tests/foreman/api/test_a.py')
+        first = valid_data_list()
+        datapool.use_pool('tests/foreman/api/test_b.py')
+        self.assertNotEqual(valid_data_list(), first)
+        datapool.use_pool('tests/foreman/api/test_a.py')
+        self.assertEqual(valid_data_list(), first)
+        self.settings.datapoint_seed = 43
+        datapool.use_pool('tests/foreman/api/test_a.py')
+        self.assertNotEqual(valid_data_list(), first)
+
+    def test_fixed_pool(self):
+        """The fixed pool values do not depend on the settings seed"""
+        self.settings.datapoint_pool = False
+        with datapool.fixed_pool('valid_data_list'):
+            first = valid_data_list()
+        self.settings.datapoint_seed = 43
+        with datapool.fixed_pool('valid_data_list'):
+            self.assertEqual(valid_data_list(), first)
+        self.assertFalse(datapool.is_enabled())
+
+    def test_disabled(self):
+        """fauxfactory generates the values when the pools are disabled"""
+        self.settings.datapoint_pool = False
+        with mock.patch('robottelo.datapool.fauxfactory') as fauxfactory:
+            fauxfactory.gen_string.return_value = u'faux'
+            self.assertEqual(datapool.gen_string('alpha', 5), u'faux')
+        fauxfactory.gen_string.assert_called_once_with('alpha', 5)
@@ -1233,6 +1233,89 @@ class SkipIfNotSetTestCase(TestCase):
         self.settings.configure.called_once_with()
 
 
+class FeatureMatrixTestCase(TestCase):
+    """Tests for :class:`robottelo.decorators.FeatureMatrix`."""
+
+    def setUp(self):
+        self.settings_patcher = mock.patch('robottelo.decorators.settings')
+        self.settings = self.settings_patcher.start()
+        self.addCleanup(self.settings_patcher.stop)
+        self.settings.all_features = ['clients', 'docker']
+        self.settings.project = 'SAT'
+        self.settings.clients.validate.return_value = []
+        self.settings.docker.validate.return_value = [
+            '[docker] docker_url must be provided.']
+
+    def test_validated_once(self):
+        """Each feature section is validated only once"""
+        matrix = decorators.get_feature_matrix().build()
+        self.assertIs(decorators.get_feature_matrix(), matrix)
+
+        @decorators.skip_if_not_set('clients')
+        def dummy():
+            return 'ok'
+
+        for _ in range(3):
+            self.assertEqual(dummy(), 'ok')
+            self.assertFalse(decorators.setting_is_set('docker'))
+        self.settings.clients.validate.assert_called_once_with()
+        self.settings.docker.validate.assert_called_once_with()
+        self.assertEqual(matrix.project, 'sat')
+        self.assertEqual(
+            matrix.as_dict()['features'],
+            {'clients': [],
+             'docker': ['[docker] docker_url must be provided.']}
+        )
+
+    def test_build_required_features(self):
+        """Only the feature sections of the collected tests are validated"""
+        @decorators.skip_if_not_set('clients')
+        def test_clients():
+            pass
+
+        class DummyTestCase(TestCase):
+            @classmethod
+            @decorators.skip_if_not_set('clients')
+            def setUpClass(cls):
+                pass
+
+        items = [mock.Mock(function=test_clients), mock.Mock(function=None)]
+        items[0].cls = None
+        items[1].cls = DummyTestCase
+        features = decorators.get_required_features(items)
+        self.assertEqual(features, {'clients'})
+        matrix = decorators.get_feature_matrix().build(features)
+        self.settings.clients.validate.assert_called_once_with()
+        self.settings.docker.validate.assert_not_called()
+        self.assertEqual(matrix.as_dict()['features'], {'clients': []})
+
+    def test_get_skip_reason(self):
+        """The skip reason is read from the decorated functions"""
+        @decorators.skip_if_not_set('clients')
+        @decorators.run_only_on('sat')
+        def configured():
+            pass
+
+        @decorators.skip_if_not_set('clients')
+        @decorators.skip_if_not_set('docker')
+        def not_configured():
+            pass
+
+        @decorators.run_only_on('sam')
+        def other_project():
+            pass
+
+        self.assertEqual(not_configured.required_features,
+                         ('docker', 'clients'))
+        self.assertIsNone(decorators.get_skip_reason(configured, None))
+        self.assertEqual(
+            decorators.get_skip_reason(configured, not_configured),
+            'Missing configuration for: docker.'
+        )
+        self.assertIn('this test will run only on "sam" mode',
+                      decorators.get_skip_reason(other_project))
+
+
 class StubbedTestCase(TestCase):
     """Tests for :func:`robottelo.decorators.stubbed`."""
 
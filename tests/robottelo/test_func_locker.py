@@ -5,18 +5,30 @@ import os
 import time
 import tempfile
 
+import six
 from unittest2 import TestCase
+from robottelo.decorators import func_locker
 from robottelo.decorators.func_locker import (
     get_temp_dir,
     lock_function,
     locking_function,
+    read_locking_function,
+    rw_lock_function,
+    semaphore_function,
+    semaphore_locking_function,
     set_default_scope,
+    write_locking_function,
     LOCK_FILE_NAME_EXT,
     TEMP_FUNC_LOCK_DIR,
     TEMP_ROOT_DIR,
     FunctionLockerError,
 )
 
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
 _this_module_name_string = 'tests.robottelo.test_func_locker'
 
 NAMESPACE_SCOPE = 'func_locker_unittest_scope'
@@ -209,6 +221,47 @@ def simple_function_not_locked():
     return None
 
 
+@semaphore_function(limit=2)
+def simple_semaphore_function(index=None):
+    """Return the time interval the function was running"""
+    start = time.time()
+    time.sleep(0.2)
+    return start, time.time()
+
+
+@rw_lock_function
+def simple_read_function(index=None):
+    """Return the time interval the function was running"""
+    start = time.time()
+    time.sleep(0.2)
+    return start, time.time()
+
+
+def simple_read_or_write_function(index):
+    """Write every fourth call, read otherwise, return whether writing and
+    the time interval"""
+    if index % 4:
+        return False, simple_read_function()
+    with write_locking_function(simple_read_function):
+        start = time.time()
+        time.sleep(0.2)
+        return True, (start, time.time())
+
+
+def _max_concurrency(intervals):
+    """Return the maximum number of intervals overlapping at a time"""
+    events = sorted(
+        [(start, 1) for start, _ in intervals] +
+        [(end, -1) for _, end in intervals],
+        key=lambda event: (event[0], event[1])
+    )
+    count = max_count = 0
+    for _, step in events:
+        count += step
+        max_count = max(max_count, count)
+    return max_count
+
+
 class FuncLockerTestCase(TestCase):
 
     @classmethod
@@ -456,3 +509,92 @@ class FuncLockerTestCase(TestCase):
                 pass
 
         self.assertIn('Cannot ensure locking', str(context.exception))
+
+
+class FuncSemaphoreTestCase(TestCase):
+
+    def setUp(self):
+        self.pool = multiprocessing.Pool(POOL_SIZE)
+
+    def tearDown(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def test_semaphore_in_multiprocess(self):
+        """Ensure that at most limit calls run at the same time"""
+        intervals = self.pool.map(simple_semaphore_function, range(6))
+        self.assertEqual(_max_concurrency(intervals), 2)
+
+    def test_semaphore_timeout(self):
+        """Ensure that the semaphore is not acquired when all the slots are
+        held"""
+        with semaphore_locking_function(simple_semaphore_function):
+            with semaphore_locking_function(simple_semaphore_function):
+                with self.assertRaises(FunctionLockerError):
+                    with semaphore_locking_function(
+                            simple_semaphore_function, timeout=0.2):
+                        pass
+        with semaphore_locking_function(
+                simple_semaphore_function, timeout=0.2, fair=True):
+            pass
+
+    def test_rw_lock_in_multiprocess(self):
+        """Ensure that the readers run at the same time and the writers
+        alone"""
+        results = self.pool.map(simple_read_or_write_function, range(8))
+        intervals = [interval for _, interval in results]
+        read_intervals = [
+            interval for write, interval in results if not write]
+        self.assertGreater(_max_concurrency(read_intervals), 1)
+        for write, interval in results:
+            if write:
+                for other in intervals:
+                    if other is not interval:
+                        self.assertTrue(
+                            other[1] <= interval[0] or
+                            other[0] >= interval[1]
+                        )
+
+    def test_rw_lock_write_timeout(self):
+        """Ensure that the writer waits the readers"""
+        with read_locking_function(simple_read_function):
+            with self.assertRaises(FunctionLockerError):
+                with write_locking_function(simple_read_function,
+                                            timeout=0.2):
+                    pass
+        with write_locking_function(simple_read_function, timeout=0.2):
+            pass
+
+    def test_negative_not_rw_locked(self):
+        """Ensure that the not decorated functions cannot be locked"""
+        with self.assertRaises(FunctionLockerError):
+            with read_locking_function(simple_function_not_locked):
+                pass
+        with self.assertRaises(FunctionLockerError):
+            with semaphore_locking_function(simple_function_not_locked):
+                pass
+
+
+class LockStorageTestCase(TestCase):
+    """Tests for the function locks storage selection"""
+
+    def setUp(self):
+        settings_patcher = mock.patch(
+            'robottelo.decorators.func_locker.settings')
+        self.settings = settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        self.settings.configured = True
+        self.settings.shared_function.storage = 'redis'
+        self.settings.shared_function.enabled = False
+        self.settings.shared_function.lock_storage = None
+
+    def test_shared_function_disabled(self):
+        """The file locks are used when the shared functions are disabled"""
+        self.assertEqual(func_locker._get_lock_storage(), 'file')
+        self.settings.shared_function.enabled = True
+        self.assertEqual(func_locker._get_lock_storage(), 'redis')
+
+    def test_lock_storage_setting(self):
+        """The lock storage setting overrides the shared function storage"""
+        self.settings.shared_function.lock_storage = 'sqlite'
+        self.assertEqual(func_locker._get_lock_storage(), 'sqlite')
@@ -1,15 +1,20 @@
 # coding: utf-8
 
+import importlib
 import multiprocessing
 import os
 import time
 
 
+import six
 from fauxfactory import gen_integer, gen_string
 from unittest2 import TestCase
 
 from robottelo.decorators.func_shared.shared import (
+    _check_config,
     _set_configured,
+    clear_cache,
+    get_stats,
     set_default_scope,
     enable_shared_function,
     shared,
@@ -17,17 +22,27 @@ from robottelo.decorators.func_shared.shared import (
     _NAMESPACE_SCOPE_KEY_TYPE,
 )
 from robottelo.decorators.func_shared.file_storage import (
+    FileStorageHandler,
     get_temp_dir,
     TEMP_ROOT_DIR,
     TEMP_FUNC_SHARED_DIR,
 )
 
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
 DEFAULT_POOL_SIZE = 8
 SIMPLE_TIMEOUT_VALUE = 3
 
 _this_module_name = 'tests.robottelo.test_func_shared'
 _set_configured(True)
 
+# the package exports the shared decorator under the shared module name
+shared_module = importlib.import_module(
+    'robottelo.decorators.func_shared.shared')
+
 
 class MainCounter(object):
     """Basic class that contain a counter function"""
@@ -147,6 +162,12 @@ def basic_shared_counter_string(
     return '{0}_{1}_{2}'.format(prefix, counter+increment_by, suffix)
 
 
+@shared
+def simple_shared_counter_cached(index=0):
+    """used to check the in process cache of shared values"""
+    return {'index': index+1}
+
+
 class NotRestorableException(Exception):
     """ this exception is not restorable as need mote args"""
     def __init__(self, msg, details):
@@ -527,3 +548,111 @@ class FunctionSharedTestCase(TestCase):
             inc_string_2 = basic_shared_counter_string(
                 suffix=suffix, prefix=prefix, counter=counter_value)
             self.assertEqual(inc_string, inc_string_2)
+
+    def test_in_process_cache(self):
+        """Test that once ready the shared value is returned from the process
+        cache without reading the storage"""
+        clear_cache()
+        counter_value = gen_integer(min_value=2, max_value=10000)
+        result = simple_shared_counter_cached(index=counter_value)
+        self.assertEqual(result, {'index': counter_value + 1})
+        # the caller can not modify the cached value
+        result['index'] = 0
+        with mock.patch.object(FileStorageHandler, 'lock') as lock:
+            result = simple_shared_counter_cached(index=0)
+        lock.assert_not_called()
+        self.assertEqual(result, {'index': counter_value + 1})
+        self.assertEqual(
+            get_stats(),
+            dict(l1_hits=1, storage_hits=0, executions=1, entries=1)
+        )
+        # when not in the process cache the ready storage value is read
+        # without lock
+        clear_cache()
+        with mock.patch.object(FileStorageHandler, 'lock') as lock:
+            result = simple_shared_counter_cached(index=0)
+        lock.assert_not_called()
+        self.assertEqual(result, {'index': counter_value + 1})
+        self.assertEqual(get_stats()['storage_hits'], 1)
+
+    def test_in_process_cache_not_failed(self):
+        """Test that the failed calls are not kept in the process cache"""
+        clear_cache()
+        counter_value = gen_integer(min_value=2, max_value=10000)
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                simple_shared_counter_with_exception(counter_value)
+        self.assertEqual(
+            get_stats(),
+            dict(l1_hits=0, storage_hits=1, executions=1, entries=0)
+        )
+
+    def test_file_storage_set(self):
+        """Test that the file storage value is replaced at once"""
+        root_dir = os.path.join(
+            get_temp_dir(), TEMP_ROOT_DIR, TEMP_FUNC_SHARED_DIR)
+        storage = FileStorageHandler(root_dir=root_dir)
+        key = '.'.join([self.scope, 'file_storage_set'])
+        storage.set(key, {'index': 1})
+        storage.set(key, {'index': 2})
+        self.assertEqual(storage.get(key), {'index': 2})
+        self.assertEqual(
+            [name for name in os.listdir(root_dir) if key in name], [key])
+
+    def test_class_name_of_nested_definitions(self):
+        """Test that the class name is the names of the two frames
+        calling the decorator"""
+        def define_function():
+            class Outer(object):
+                class Inner(object):
+                    @shared
+                    def function(self):
+                        pass
+            return Outer.Inner.function
+
+        self.assertEqual(MainCounter.SubCounter.shared_counter.__class_name__,
+                         'MainCounter.SubCounter')
+        self.assertEqual(shared_counter.__class_name__, '')
+        # only the two nearest frames are used
+        self.assertEqual(define_function().__class_name__, 'Outer.Inner')
+
+
+class CheckConfigTestCase(TestCase):
+    """Tests for the shared function settings read at call time"""
+
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            shared_module,
+            _configured=False,
+            _forced_settings=set(),
+            DEFAULT_STORAGE_HANDLER=shared_module.DEFAULT_STORAGE_HANDLER,
+            ENABLED=False,
+            NAMESPACE_SCOPE=None,
+            SHARE_DEFAULT_TIMEOUT=shared_module.SHARE_DEFAULT_TIMEOUT,
+            DEFAULT_CALL_RETRIES=shared_module.DEFAULT_CALL_RETRIES,
+            setting_is_set=mock.Mock(return_value=True),
+            settings=mock.DEFAULT,
+            codec=mock.DEFAULT,
+            file_storage=mock.DEFAULT,
+            redis_storage=mock.DEFAULT,
+            sqlite_storage=mock.DEFAULT,
+        )
+        self.settings = patcher.start()['settings']
+        self.addCleanup(patcher.stop)
+        self.settings.shared_function.storage = 'file'
+        self.settings.shared_function.enabled = True
+        self.settings.shared_function.scope = 'settings_scope'
+
+    def test_read_settings(self):
+        """The settings are read on the first check"""
+        _check_config()
+        self.assertTrue(shared_module.ENABLED)
+        self.assertEqual(shared_module.NAMESPACE_SCOPE, 'settings_scope')
+
+    def test_forced_settings(self):
+        """The settings forced before the first check are kept"""
+        enable_shared_function(False)
+        set_default_scope('forced_scope')
+        _check_config()
+        self.assertFalse(shared_module.ENABLED)
+        self.assertEqual(shared_module.NAMESPACE_SCOPE, 'forced_scope')
@@ -0,0 +1,149 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.host_facts`."""
+import shutil
+import tempfile
+import time
+
+import six
+from unittest2 import TestCase
+
+from robottelo import host_facts
+from robottelo.ssh import SSHCommandResult
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+PROBE_OUTPUT = [
+    u'satellite_package=satellite-6.2.0-21.1.el7sat.noarch',
+    u'satellite_version=',
+    u'redhat_release=Red Hat Enterprise Linux Server release 7.2 (Maipo)',
+    u'boot_id=f2a9c1e4-1e7b-4a8b-9a3c-5d6e7f8a9b0c',
+    u'uptime=3600.25',
+]
+
+
+class ParseHostFactsTestCase(TestCase):
+    """Tests for :func:`robottelo.host_facts.parse_host_facts`"""
+
+    def test_parse(self):
+        """The versions are parsed from the probe output"""
+        facts = host_facts.parse_host_facts(PROBE_OUTPUT)
+        self.assertEqual(facts['sat_version'], u'6.2')
+        self.assertEqual(facts['os_version'], u'RHEL7.2')
+        self.assertAlmostEqual(
+            facts['boot_time'], time.time() - 3600, delta=5)
+
+    def test_parse_sat_6_1(self):
+        """The 6.1 version is parsed from version.rb when the satellite
+        package is not installed"""
+        facts = host_facts.parse_host_facts([
+            u'satellite_package=package satellite is not installed',
+            u'satellite_version=  VERSION = "6.1.8"',
+            u'redhat_release=Fedora release 23 (Twenty Three)',
+        ])
+        self.assertEqual(facts['sat_version'], u'6.1')
+        self.assertEqual(facts['os_version'], host_facts.NOT_AVAILABLE)
+        self.assertIsNone(facts['boot_time'])
+
+
+class GetHostFactsTestCase(TestCase):
+    """Tests for :func:`robottelo.host_facts.get_host_facts`"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        settings_patcher = mock.patch('robottelo.host_facts.settings')
+        self.settings = settings_patcher.start()
+        self.addCleanup(settings_patcher.stop)
+        self.settings.configured = True
+        self.settings.tmp_dir = self.tmp_dir
+        self.settings.server.facts_cache = True
+        self.settings.server.facts_cache_ttl = 600
+        command_patcher = mock.patch('robottelo.host_facts.ssh.command')
+        self.command = command_patcher.start()
+        self.addCleanup(command_patcher.stop)
+        self.command.return_value = SSHCommandResult(stdout=PROBE_OUTPUT)
+        self.addCleanup(host_facts._host_facts.clear)
+
+    def test_single_probe(self):
+        """The facts are probed once and shared by the processes"""
+        facts = host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(facts['sat_version'], u'6.2')
+        self.command.assert_called_once_with(
+            host_facts._HOST_FACTS_COMMAND, hostname='sat.example.com')
+        # another process reads the facts file
+        host_facts._host_facts.clear()
+        self.assertEqual(
+            host_facts.get_host_facts('sat.example.com')['os_version'],
+            u'RHEL7.2'
+        )
+        self.assertEqual(self.command.call_count, 1)
+
+    def test_expired(self):
+        """The expired facts are probed again and the changes logged"""
+        host_facts.get_host_facts('sat.example.com')
+        host_facts._host_facts.clear()
+        self.settings.server.facts_cache_ttl = 0
+        self.command.return_value = SSHCommandResult(stdout=[
+            u'satellite_package=satellite-6.3.0-1.el7sat.noarch'
+        ] + PROBE_OUTPUT[1:])
+        with mock.patch.object(host_facts, 'LOGGER') as logger:
+            facts = host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(facts['sat_version'], u'6.3')
+        self.assertEqual(self.command.call_count, 2)
+        logger.info.assert_called_once_with(
+            'host sat.example.com facts changed: satellite_package')
+
+    def test_process_cache_expired(self):
+        """The facts read by the process expire with the cache ttl"""
+        self.settings.configured = False
+        host_facts.get_host_facts('sat.example.com')
+        host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(self.command.call_count, 1)
+        self.settings.server.facts_cache_ttl = 0
+        host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(self.command.call_count, 2)
+
+    def test_fingerprint_unchanged(self):
+        """The shared facts are kept when the host fingerprint did not
+        change"""
+        host_facts.get_host_facts('sat.example.com')
+        host_facts._host_facts.clear()
+        self.command.return_value = SSHCommandResult(
+            stdout=[PROBE_OUTPUT[0], PROBE_OUTPUT[3]])
+        with mock.patch.object(host_facts, 'FINGERPRINT_CHECK_INTERVAL', 0):
+            facts = host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(facts['sat_version'], u'6.2')
+        self.assertEqual(self.command.call_count, 2)
+        self.command.assert_called_with(
+            host_facts._HOST_FINGERPRINT_COMMAND, hostname='sat.example.com')
+
+    def test_fingerprint_changed(self):
+        """The shared facts are dropped and probed again when the host was
+        rebooted"""
+        host_facts.get_host_facts('sat.example.com')
+        host_facts._host_facts.clear()
+        boot_id = u'0b1c2d3e-4f5a-6b7c-8d9e-0f1a2b3c4d5e'
+        rebooted_output = PROBE_OUTPUT[:3] + [u'boot_id=' + boot_id]
+        self.command.side_effect = [
+            SSHCommandResult(stdout=[PROBE_OUTPUT[0], rebooted_output[3]]),
+            SSHCommandResult(stdout=rebooted_output),
+        ]
+        with mock.patch.object(host_facts, 'FINGERPRINT_CHECK_INTERVAL', 0):
+            with mock.patch.object(host_facts, 'LOGGER') as logger:
+                facts = host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(facts['boot_id'], boot_id)
+        self.assertEqual(self.command.call_count, 3)
+        self.command.assert_called_with(
+            host_facts._HOST_FACTS_COMMAND, hostname='sat.example.com')
+        logger.info.assert_called_once_with(
+            'host sat.example.com facts changed: boot_id')
+
+    def test_invalidate(self):
+        """The invalidated facts are probed again"""
+        host_facts.get_host_facts('sat.example.com')
+        host_facts.invalidate_host_facts('sat.example.com')
+        host_facts.get_host_facts('sat.example.com')
+        self.assertEqual(self.command.call_count, 2)
@@ -0,0 +1,360 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.redis_storage`.
+
+:class:`RedisStorageTestCase` needs a redis server listening on localhost, by
+default port 6379 or the port set in the ``REDIS_PORT`` environment variable,
+the other tests use an in memory fake of the redis client.
+"""
+import os
+import threading
+import time
+
+import six
+from fauxfactory import gen_string
+from unittest2 import TestCase, skipUnless
+
+from robottelo.decorators.func_shared import redis_storage
+from robottelo.decorators.func_shared.redis_storage import (
+    LockError,
+    RedisStorageHandler,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+REDIS_PORT = int(os.environ.get('REDIS_PORT', redis_storage.REDIS_PORT))
+
+
+class FakePubSub(object):
+    """A subscription that receives no message, the waiters try again after
+    the get_message timeout"""
+
+    def subscribe(self, channel):
+        pass
+
+    def get_message(self, timeout=0):
+        time.sleep(min(timeout, 0.05))
+
+    def close(self):
+        pass
+
+
+class FakePipeline(object):
+    """Queue the commands and run them at execute"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.queue(getattr(self._client, name), *args, **kwargs)
+        return command
+
+    def queue(self, command, *args, **kwargs):
+        self._commands.append((command, args, kwargs))
+
+    def execute(self):
+        self._client.round_trips += 1
+        return [command(*args, **kwargs)
+                for command, args, kwargs in self._commands]
+
+
+class FakeRedis(object):
+    """An in memory redis client, with the commands used by the redis
+    storage"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # the values and their expire time
+        self.values = {}
+        self.idle_times = {}
+        self.published = []
+        self.round_trips = 0
+
+    def _get_entry(self, key):
+        entry = self.values.get(key)
+        if entry is not None and entry[1] is not None and (
+                entry[1] <= time.time()):
+            del self.values[key]
+            entry = None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._get_entry(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, nx=False, px=None, ex=None):
+        with self._lock:
+            if nx and self._get_entry(key) is not None:
+                return None
+            expire_at = None
+            if px is not None:
+                expire_at = time.time() + px / 1000.0
+            elif ex is not None:
+                expire_at = time.time() + ex
+            self.values[key] = (value, expire_at)
+            return True
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.get(key) for key in keys]
+
+    def delete(self, *keys):
+        with self._lock:
+            count = 0
+            for key in keys:
+                if self._get_entry(key) is not None:
+                    del self.values[key]
+                    count += 1
+            return count
+
+    def ttl(self, key):
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return -2
+            if entry[1] is None:
+                return -1
+            return int(entry[1] - time.time())
+
+    def object(self, subcommand, key):
+        return self.idle_times.get(key, 0)
+
+    def scan_iter(self, count=None):
+        with self._lock:
+            return iter([key.encode('utf-8') for key in list(self.values)])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub()
+
+    def register_script(self, script):
+        def run_script(function):
+            def script_call(keys, args, client=None):
+                if client is not None:
+                    return client.queue(function, keys, args)
+                self.round_trips += 1
+                return function(keys, args)
+            return script_call
+
+        def release(keys, args):
+            with self._lock:
+                if self.get(keys[0]) != args[0]:
+                    return 0
+                self.delete(keys[0])
+                self.published.append((keys[1], args[0]))
+                return 1
+
+        def renew(keys, args):
+            with self._lock:
+                value = self.get(keys[0])
+                if value != args[0]:
+                    return 0
+                self.set(keys[0], value, px=args[1])
+                return 1
+
+        def collect(keys, args):
+            with self._lock:
+                count = 0
+                for index, value in enumerate(args):
+                    key, lock_key = keys[index * 2], keys[index * 2 + 1]
+                    if (self.get(lock_key) is None and
+                            self.get(key) == value):
+                        count += self.delete(key)
+                return count
+
+        if script == redis_storage._RELEASE_SCRIPT:
+            return run_script(release)
+        if script == redis_storage._COLLECT_SCRIPT:
+            return run_script(collect)
+        return run_script(renew)
+
+
+def _redis_available():
+    if redis_storage.redis is None:
+        return False
+    try:
+        return redis_storage.redis.StrictRedis(port=REDIS_PORT).ping()
+    except redis_storage.redis.ConnectionError:
+        return False
+
+
+@skipUnless(_redis_available(), 'redis server is not available')
+class RedisStorageTestCase(TestCase):
+    """Tests for the redis storage handler"""
+
+    def setUp(self):
+        self.storage = RedisStorageHandler(
+            port=REDIS_PORT, lock_timeout=5, lock_lease=1, share_timeout=60)
+        self.key = gen_string('alpha', 10)
+        self.addCleanup(self.storage.client.delete, self.key,
+                        '{0}.lock'.format(self.key))
+
+    def test_set_expire(self):
+        """The values are stored with the share timeout"""
+        self.storage.set(self.key, {'state': 'READY'})
+        self.assertEqual(self.storage.get(self.key), {'state': 'READY'})
+        self.assertGreater(self.storage.client.ttl(self.key), 0)
+
+    def test_waiter_notified(self):
+        """The waiter acquires the lock as soon as it is released"""
+        acquired = []
+        with self.storage.lock(self.key):
+            def wait_lock():
+                with self.storage.lock(self.key):
+                    acquired.append(time.time())
+
+            waiter = threading.Thread(target=wait_lock)
+            waiter.start()
+            time.sleep(0.2)
+            self.assertEqual(acquired, [])
+            released = time.time()
+        waiter.join()
+        # much less than the lease, the waiter did not wait the expiry
+        self.assertLess(acquired[0] - released, 0.5)
+
+    def test_lease_renewed(self):
+        """The lock held longer than its lease is not lost"""
+        with self.storage.lock(self.key):
+            time.sleep(2.5)
+            with self.assertRaises(LockError):
+                with self.storage.lock(self.key, timeout=0.1):
+                    pass
+        with self.storage.lock(self.key, timeout=0.1):
+            pass
+
+    def test_abandoned_lock_expire(self):
+        """The lock of a dead process expires with its lease"""
+        lock = self.storage.lock(self.key)
+        self.assertTrue(lock.acquire())
+        # simulate a dead process, the lease is not renewed anymore
+        lock._heartbeat.stop()
+        with self.storage.lock(self.key, timeout=3):
+            pass
+
+
+class FakeRedisStorageTestCase(TestCase):
+    """Tests for the redis lock and storage handler with a fake redis client,
+    runnable without a redis server"""
+
+    def setUp(self):
+        self.client = FakeRedis()
+        redis_patcher = mock.patch.object(redis_storage, 'redis')
+        redis_module = redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        redis_module.StrictRedis.return_value = self.client
+        self.storage = RedisStorageHandler(
+            lock_timeout=60, lock_lease=0.3, share_timeout=60)
+
+    def test_lock_acquire_release(self):
+        """The lock is exclusive, its release notifies the waiters"""
+        lock = self.storage.lock('key', timeout=0)
+        self.assertTrue(lock.acquire())
+        self.addCleanup(lock.release)
+        self.assertFalse(self.storage.lock('key', timeout=0).acquire())
+        lock.release()
+        self.assertIsNone(self.client.get('key.lock'))
+        self.assertEqual(
+            [channel for channel, _ in self.client.published],
+            ['key.lock.released']
+        )
+        other_lock = self.storage.lock('key', timeout=0)
+        self.assertTrue(other_lock.acquire())
+        other_lock.release()
+
+    def test_lock_owner(self):
+        """The lock stores its owner"""
+        lock = redis_storage.RedisLock(
+            self.client, 'key.lock', timeout=0, lease=1, owner='gw0 1234')
+        self.assertTrue(lock.acquire())
+        self.addCleanup(lock.release)
+        self.assertEqual(lock.get_owner(), 'gw0 1234')
+
+    def test_heartbeat(self):
+        """The lease is renewed while held, the abandoned lock expires"""
+        lock = self.storage.lock('key', timeout=0)
+        self.assertTrue(lock.acquire())
+        self.addCleanup(lock.release)
+        # more than the lease, renewed by the heartbeat
+        time.sleep(0.5)
+        self.assertFalse(self.storage.lock('key', timeout=0).acquire())
+        # simulate a dead process, the lease is not renewed anymore
+        lock._heartbeat.stop()
+        waiter = self.storage.lock('key', timeout=2)
+        start = time.time()
+        self.assertTrue(waiter.acquire())
+        waiter.release()
+        self.assertLess(time.time() - start, 1)
+        # the lease of the abandoned lock was lost
+        self.assertFalse(lock.renew())
+
+    def test_value_with_lock_round_trips(self):
+        """The value is read with the lock acquisition and written with the
+        lock release"""
+        self.storage.set('key', {'index': 1})
+        with self.storage.lock('key', timeout=0) as lock:
+            self.storage.when_lock_acquired(lock)
+            with mock.patch.object(
+                    self.client, 'get', side_effect=AssertionError):
+                self.assertEqual(self.storage.get('key'), {'index': 1})
+            self.storage.set('key', {'index': 2})
+            # written with the release
+            self.assertEqual(self.storage.decode(self.client.get('key')),
+                             {'index': 1})
+        self.assertEqual(self.storage.get('key'), {'index': 2})
+        self.assertGreater(self.client.ttl('key'), 0)
+        # the lock acquisition and the lock release
+        self.assertEqual(self.client.round_trips, 2)
+
+    def test_value_missing_with_lock(self):
+        """A missing value is read once, with the lock acquisition"""
+        with self.storage.lock('key', timeout=0) as lock:
+            self.storage.when_lock_acquired(lock)
+            with mock.patch.object(
+                    self.client, 'get', side_effect=AssertionError):
+                self.assertIsNone(self.storage.get('key'))
+        self.assertEqual(self.client.round_trips, 2)
+
+    def test_collect(self):
+        """The expired values and the abandoned locks are deleted by
+        batches"""
+        for index in range(5):
+            self.storage.set('value{0}'.format(index), {'index': index})
+        self.client.set('other', b'not a shared function value')
+        # a lock with a lease, a lock without lease not released since the
+        # lock timeout, a recent lock without lease
+        self.client.set('held.lock', 'token', px=60000)
+        for key, idle_time in (('abandoned.lock', 120), ('recent.lock', 1)):
+            self.client.set(key, 'token')
+            self.client.idle_times[key] = idle_time
+        with mock.patch.object(redis_storage, 'PIPELINE_SIZE', 2):
+            deleted = self.storage.collect(
+                lambda value: value['index'] % 2 == 0)
+        self.assertEqual(deleted, dict(values=3, locks=1))
+        self.assertEqual(
+            sorted(self.client.values),
+            ['held.lock', 'other', 'recent.lock', 'value1', 'value3'])
+        # 6 values read by 3 mget and deleted by 3 scripts, 3 locks checked
+        # by 2 pipelines
+        self.assertEqual(self.client.round_trips, 8)
+
+    def test_collect_locked_or_rewritten(self):
+        """The expired values locked or rewritten since read are kept"""
+        self.storage.set('locked', {'index': 0})
+        self.storage.set('rewritten', {'index': 0})
+
+        def rewrite_expired(value):
+            self.storage.set('rewritten', {'index': 1})
+            return True
+
+        with self.storage.lock('locked', timeout=0):
+            deleted = self.storage.collect(rewrite_expired)
+        self.assertEqual(deleted, dict(values=0, locks=0))
+        self.assertEqual(self.storage.get('locked'), {'index': 0})
+        self.assertEqual(self.storage.get('rewritten'), {'index': 1})
@@ -0,0 +1,322 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.scheduling`."""
+import os
+import shutil
+import tempfile
+
+from unittest2 import TestCase
+
+from robottelo import scheduling
+from robottelo.decorators.func_locker import lock_function
+from robottelo.decorators.func_shared.shared import shared
+
+COLLECTION = [
+    'test_a.py::ShortTestCase::test_1',
+    'test_a.py::ShortTestCase::test_2',
+    'test_a.py::LongTestCase::test_1',
+    'test_a.py::LongTestCase::test_2',
+    'test_b.py::SerialTestCase::test_1',
+    'test_b.py::OtherSerialTestCase::test_1',
+    'test_b.py::test_function',
+]
+
+DURATIONS = {
+    'test_a.py::ShortTestCase::test_1': 1.0,
+    'test_a.py::ShortTestCase::test_2': 1.0,
+    'test_a.py::LongTestCase::test_1': 10.0,
+    'test_a.py::LongTestCase::test_2': 20.0,
+    'test_b.py::SerialTestCase::test_1': 4.0,
+    'test_b.py::OtherSerialTestCase::test_1': 4.0,
+}
+
+
+class FakeNode(object):
+    """An xdist worker node recording the tests sent to run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indexes):
+        self.sent.extend(indexes)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+class FakeMarker(object):
+
+    def __init__(self, *args):
+        self.args = args
+
+
+class FakeItem(object):
+
+    def __init__(self, nodeid, serial=False, markers=None, module=None,
+                 cls=None):
+        self.nodeid = nodeid
+        self.markers = dict(markers or {})
+        if serial:
+            self.markers[scheduling.SERIAL_MARKER] = FakeMarker()
+        self.module = module
+        self.cls = cls
+
+    def get_marker(self, name):
+        return self.markers.get(name)
+
+
+class SharedSetupTestCase(object):
+
+    @classmethod
+    @shared
+    def setUpClass(cls):
+        pass
+
+
+class LockedTestCase(SharedSetupTestCase):
+
+    @lock_function
+    def test_locked(self):
+        pass
+
+
+class DurationHistoryTestCase(TestCase):
+    """Tests for :class:`robottelo.scheduling.DurationHistory`"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.history_file = os.path.join(self.tmp_dir, 'durations.json')
+
+    def test_record(self):
+        """The tests and classes durations averages are saved and loaded"""
+        history = scheduling.DurationHistory(self.history_file)
+        history.record(DURATIONS)
+        history.save()
+        history = scheduling.DurationHistory(self.history_file)
+        history.record({'test_a.py::LongTestCase::test_2': 10.0})
+        self.assertEqual(history.tests['test_a.py::LongTestCase::test_2'], 15)
+        self.assertEqual(history.classes['test_a.py::LongTestCase'], 20)
+
+    def test_estimate(self):
+        """The unknown tests are estimated with the median duration, the
+        renamed tests of a known class with the class duration"""
+        history = scheduling.DurationHistory(self.history_file)
+        self.assertEqual(
+            history.get_default_duration(),
+            scheduling.DEFAULT_TEST_DURATION
+        )
+        history.record(DURATIONS)
+        self.assertEqual(history.get_default_duration(), 4.0)
+        self.assertEqual(
+            history.estimate(
+                'test_a.py::LongTestCase',
+                ['test_a.py::LongTestCase::test_1',
+                 'test_a.py::LongTestCase::test_3']
+            ),
+            14.0
+        )
+        self.assertEqual(
+            history.estimate(
+                'test_a.py::LongTestCase', ['test_a.py::LongTestCase::new']),
+            30.0
+        )
+
+
+class DurationSchedulingTestCase(TestCase):
+    """Tests for :class:`robottelo.scheduling.DurationScheduling`"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.history = scheduling.DurationHistory(
+            os.path.join(self.tmp_dir, 'durations.json'))
+        self.history.record(DURATIONS)
+        self.info_file = os.path.join(self.tmp_dir, 'info.json')
+        scheduling.write_collection_info(self.info_file, [
+            FakeItem(nodeid, serial='Serial' in nodeid)
+            for nodeid in COLLECTION
+        ])
+
+    def _make_scheduler(self, nodes_count):
+        scheduler = scheduling.DurationScheduling(
+            None, self.history, collection_info_file=self.info_file,
+            numnodes=nodes_count
+        )
+        nodes = [FakeNode('gw{0}'.format(index))
+                 for index in range(nodes_count)]
+        for node in nodes:
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, COLLECTION)
+        self.assertTrue(scheduler.collection_is_completed)
+        scheduler.schedule()
+        return scheduler, nodes
+
+    def _sent_ids(self, node):
+        return [COLLECTION[index] for index in node.sent]
+
+    def test_longest_first(self):
+        """The longest classes are sent first, the serial classes together"""
+        scheduler, nodes = self._make_scheduler(2)
+        self.assertEqual(
+            self._sent_ids(nodes[0]),
+            ['test_a.py::LongTestCase::test_1',
+             'test_a.py::LongTestCase::test_2']
+        )
+        self.assertEqual(
+            self._sent_ids(nodes[1]),
+            ['test_b.py::SerialTestCase::test_1',
+             'test_b.py::OtherSerialTestCase::test_1']
+        )
+        self.assertEqual(scheduler.predicted_makespan, 30.0)
+        scheduler.mark_test_complete(nodes[1], nodes[1].sent[0])
+        # the node with few pending tests gets the next longest unit
+        self.assertEqual(
+            self._sent_ids(nodes[1])[2:], ['test_b.py::test_function'])
+        completed = set([nodes[1].sent[0]])
+        while scheduler.has_pending:
+            for node in nodes:
+                for index in list(node.sent):
+                    if index not in completed:
+                        completed.add(index)
+                        scheduler.mark_test_complete(node, index)
+        self.assertEqual(completed, set(range(len(COLLECTION))))
+        self.assertTrue(scheduler.tests_finished)
+        report = scheduler.get_report()
+        self.assertEqual(report['units'], 4)
+        self.assertEqual(report['workers'], 2)
+        self.assertIsNotNone(report['actual_makespan'])
+
+    def test_unused_nodes(self):
+        """The nodes without work unit are shut down"""
+        scheduler, nodes = self._make_scheduler(6)
+        self.assertEqual(len(scheduler.nodes), 4)
+        # the last two nodes have no work and the work queue is empty
+        self.assertTrue(all(node.shutting_down for node in nodes))
+        self.assertEqual(
+            [len(node.sent) for node in nodes], [2, 2, 1, 2, 0, 0])
+
+    def test_remove_node(self):
+        """The pending tests of a crashed node are scheduled again"""
+        scheduler, nodes = self._make_scheduler(2)
+        crashitem = scheduler.remove_node(nodes[0])
+        self.assertEqual(crashitem, 'test_a.py::LongTestCase::test_1')
+        # sent again to the other node
+        self.assertEqual(
+            self._sent_ids(nodes[1])[2:],
+            ['test_a.py::LongTestCase::test_1',
+             'test_a.py::LongTestCase::test_2']
+        )
+
+
+class PredictMakespanTestCase(TestCase):
+    """Tests for :func:`robottelo.scheduling.predict_makespan`"""
+
+    def test_predict(self):
+        """The units are assigned longest first to the least loaded worker"""
+        self.assertEqual(
+            scheduling.predict_makespan([7, 5, 4, 3, 3, 2], 2), 12)
+        self.assertEqual(scheduling.predict_makespan([7, 5], 4), 7)
+        self.assertEqual(scheduling.predict_makespan([7, 5], 0), 0)
+
+
+class ScopeKeysTestCase(TestCase):
+    """Tests for :func:`robottelo.scheduling.get_scope_keys`"""
+
+    def test_scope_keys(self):
+        """The keys of the decorated functions of the class and its parents
+        and of the markers are found"""
+        affinity, locks = scheduling.get_scope_keys([
+            FakeItem('test_c.py::LockedTestCase::test_locked',
+                     cls=LockedTestCase,
+                     markers={'affinity': FakeMarker('manifest')}),
+            FakeItem('test_c.py::test_function',
+                     markers={'lock_group': FakeMarker('location')}),
+        ])
+        self.assertEqual(
+            affinity['test_c.py::LockedTestCase'],
+            ['manifest', SharedSetupTestCase.setUpClass.__shared_key__]
+        )
+        self.assertEqual(
+            locks,
+            {
+                'test_c.py::LockedTestCase': [
+                    LockedTestCase.test_locked.__lock_key__],
+                'test_c.py': ['location'],
+            }
+        )
+
+    def test_group_by_affinity(self):
+        """The scopes sharing keys through other scopes are grouped"""
+        self.assertEqual(
+            scheduling.group_by_affinity({
+                'a': ['x'], 'b': ['y'], 'c': ['x', 'y'], 'd': ['z']}),
+            [['a', 'b', 'c'], ['d']]
+        )
+
+
+class AffinitySchedulingTestCase(TestCase):
+    """Tests for the shared setup and lock groups of
+    :class:`robottelo.scheduling.DurationScheduling`"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.history = scheduling.DurationHistory(
+            os.path.join(self.tmp_dir, 'durations.json'))
+        self.info_file = os.path.join(self.tmp_dir, 'info.json')
+
+    def _make_scheduler(self, items, durations, nodes_count=2):
+        self.history.record(durations)
+        scheduling.write_collection_info(self.info_file, items)
+        collection = [item.nodeid for item in items]
+        scheduler = scheduling.DurationScheduling(
+            None, self.history, collection_info_file=self.info_file,
+            numnodes=nodes_count
+        )
+        nodes = [FakeNode('gw{0}'.format(index))
+                 for index in range(nodes_count)]
+        for node in nodes:
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, collection)
+        scheduler.schedule()
+        return scheduler, nodes, collection
+
+    def test_affinity_groups(self):
+        """The classes sharing a setup are merged up to the worker load"""
+        items = [
+            FakeItem('test_d.py::{0}TestCase::test_1'.format(name),
+                     markers={'affinity': FakeMarker(*keys)})
+            for name, keys in (('A', ['manifest']), ('B', ['manifest']),
+                               ('C', ['manifest']), ('D', []))
+        ]
+        scheduler, _, _ = self._make_scheduler(
+            items, {item.nodeid: 5.0 for item in items})
+        self.assertEqual(
+            sorted(scheduler.estimates.items()),
+            [('<affinity:manifest#0>', 10.0),
+             ('test_d.py::CTestCase', 5.0),
+             ('test_d.py::DTestCase', 5.0)]
+        )
+        self.assertEqual(scheduler.predicted_makespan, 10.0)
+
+    def test_lock_groups(self):
+        """A unit holding the lock of a running unit is not sent"""
+        items = [
+            FakeItem('test_e.py::{0}TestCase::test_1'.format(name),
+                     markers={'lock_group': FakeMarker(*keys)})
+            for name, keys in (('E', ['location']), ('F', ['location']),
+                               ('G', []))
+        ]
+        scheduler, nodes, collection = self._make_scheduler(
+            items, dict(zip([item.nodeid for item in items], [10, 8, 2])))
+        self.assertEqual(
+            [[collection[index] for index in node.sent] for node in nodes],
+            [['test_e.py::ETestCase::test_1'],
+             ['test_e.py::GTestCase::test_1']]
+        )
+        # no other unit, the conflicting unit is sent
+        scheduler.mark_test_complete(nodes[1], nodes[1].sent[0])
+        self.assertEqual(
+            collection[nodes[1].sent[-1]], 'test_e.py::FTestCase::test_1')
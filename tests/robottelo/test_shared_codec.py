@@ -0,0 +1,67 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.codec`."""
+import json
+import shutil
+import tempfile
+
+from unittest2 import TestCase, skipUnless
+
+from robottelo.decorators.func_shared import codec
+from robottelo.decorators.func_shared.codec import Codec, CodecError
+from robottelo.decorators.func_shared.file_storage import FileStorageHandler
+
+VALUE = {
+    'state': 'READY',
+    'result': {
+        'repos': [
+            {'id': index, 'name': u'repo_{0}'.format(index), 'enabled': True}
+            for index in range(100)
+        ],
+    },
+    'error': None,
+}
+
+
+class CodecTestCase(TestCase):
+    """Tests for :class:`robottelo.decorators.func_shared.codec.Codec`"""
+
+    def test_json_is_not_tagged(self):
+        """Not compressed json values are plain json as the values stored
+        before codecs"""
+        encoded = Codec().encode(VALUE)
+        self.assertEqual(json.loads(encoded.decode('utf-8')), VALUE)
+        self.assertEqual(Codec.decode(json.dumps(VALUE)), VALUE)
+
+    def test_compression_threshold(self):
+        """Only values bigger than threshold are compressed"""
+        zlib_codec = Codec(compression='zlib', threshold=100)
+        encoded = zlib_codec.encode(VALUE)
+        self.assertTrue(encoded.startswith(b'\x00json+zlib\x00'))
+        self.assertLess(len(encoded), len(Codec().encode(VALUE)))
+        self.assertEqual(Codec.decode(encoded), VALUE)
+        self.assertEqual(zlib_codec.encode({'a': 1}), b'{"a": 1}')
+
+    @skipUnless(codec.msgpack, 'msgpack is not installed')
+    def test_msgpack(self):
+        """msgpack values are tagged and decoded by any codec"""
+        encoded = Codec(serializer='msgpack').encode(VALUE)
+        self.assertTrue(encoded.startswith(b'\x00msgpack\x00'))
+        self.assertEqual(Codec().decode(encoded), VALUE)
+
+    def test_not_supported(self):
+        """CodecError is raised for unknown codecs"""
+        with self.assertRaises(CodecError):
+            Codec(serializer='pickle')
+        with self.assertRaises(CodecError):
+            Codec.decode(b'\x00json+bz2\x00payload')
+
+    def test_file_storage_codec(self):
+        """The storage handler codec is used for the stored values"""
+        root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        storage = FileStorageHandler(
+            root_dir=root_dir, codec=Codec(compression='zlib', threshold=0))
+        storage.set('key', VALUE)
+        self.assertEqual(storage.get('key'), VALUE)
+        self.assertEqual(FileStorageHandler(root_dir=root_dir).get('key'),
+                         VALUE)
@@ -0,0 +1,114 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.contention`."""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+
+from fauxfactory import gen_string
+from unittest2 import TestCase
+
+from robottelo.decorators.func_shared import contention
+from robottelo.decorators.func_shared.shared import (
+    _set_configured,
+    enable_shared_function,
+    set_default_scope,
+    shared,
+)
+
+_set_configured(True)
+
+
+@contextmanager
+def _failing_lock():
+    raise RuntimeError('lock timeout')
+    yield  # pragma: no cover
+
+
+@shared
+def contention_shared_function():
+    """a shared function to record"""
+    return 'value'
+
+
+class ContentionTestCase(TestCase):
+    """Tests for the contention records"""
+
+    def setUp(self):
+        contention.clear_stats()
+        self.addCleanup(contention.clear_stats)
+
+    def test_measure(self):
+        """The wait time, the hold time and the timeouts are recorded"""
+        lock = threading.Lock()
+
+        @contextmanager
+        def locked():
+            with lock:
+                yield 'data'
+
+        lock.acquire()
+        timer = threading.Timer(0.2, lock.release)
+        timer.start()
+        with contention.measure('shared', 'key', locked()) as data:
+            self.assertEqual(data, 'data')
+            time.sleep(0.1)
+        with self.assertRaises(RuntimeError):
+            with contention.measure('shared', 'key', _failing_lock()):
+                pass
+        entry = contention.get_stats()['key']
+        self.assertEqual(entry['acquisitions'], 1)
+        self.assertEqual(entry['timeouts'], 1)
+        self.assertGreaterEqual(entry['max_wait_time'], 0.15)
+        self.assertGreaterEqual(entry['hold_time'], 0.1)
+
+    def test_shared_function(self):
+        """The storage lock and the call of the shared function are
+        recorded"""
+        set_default_scope(gen_string('alpha', 10))
+        self.addCleanup(set_default_scope, None)
+        enable_shared_function(True)
+        self.addCleanup(enable_shared_function, False)
+        self.assertEqual(contention_shared_function(), 'value')
+        self.assertEqual(contention_shared_function(), 'value')
+        (entry,) = contention.get_stats().values()
+        self.assertEqual(entry['kind'], contention.KIND_SHARED)
+        self.assertEqual(entry['acquisitions'], 1)
+        self.assertEqual(entry['calls'], 1)
+        self.assertEqual(entry['retries'], 0)
+        self.assertEqual(entry['workers'], [contention.get_worker_id()])
+
+    def test_merge_and_report(self):
+        """The workers records are merged and sorted by wait time"""
+        first = dict(contention._new_entry('shared'), wait_time=1.0,
+                     max_wait_time=1.0, acquisitions=1, workers=['gw0'])
+        second = dict(contention._new_entry('shared'), wait_time=3.0,
+                      max_wait_time=2.0, acquisitions=2, calls=1,
+                      workers=['gw1'])
+        other = dict(contention._new_entry('lock_function'), wait_time=2.0)
+        stats = contention.merge_stats(
+            {'key': first}, {'key': second, 'other': other})
+        self.assertEqual(stats['key']['wait_time'], 4.0)
+        self.assertEqual(stats['key']['max_wait_time'], 2.0)
+        self.assertEqual(stats['key']['acquisitions'], 3)
+        self.assertEqual(stats['key']['workers'], ['gw0', 'gw1'])
+        # the merged records are not modified
+        self.assertEqual(first['workers'], ['gw0'])
+
+        root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        file_path = os.path.join(root_dir, 'report.json')
+        contention.write_report(stats, file_path=file_path)
+        with open(file_path) as file_handler:
+            report = json.load(file_handler)
+        self.assertEqual([entry['key'] for entry in report], ['key', 'other'])
+
+        messages = []
+        contention.log_report(stats, log=messages.append, top=1)
+        self.assertEqual(len(messages), 1)
+        self.assertIn('shared key: waited 4.000s', messages[0])
+        self.assertIn('computed by gw0,gw1', messages[0])
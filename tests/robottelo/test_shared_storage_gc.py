@@ -0,0 +1,191 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.storage_gc`."""
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import six
+from unittest2 import TestCase
+
+from robottelo.decorators import func_locker
+from robottelo.decorators.func_shared import storage_gc
+from robottelo.decorators.func_shared.file_storage import FileStorageHandler
+from robottelo.decorators.func_shared.shared import (
+    _DATETIME_FORMAT,
+    _set_configured,
+)
+from robottelo.decorators.func_shared.sqlite_storage import (
+    SQLiteStorageHandler,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+_set_configured(True)
+
+
+def _value(age=0):
+    """Return a stored value created age seconds ago"""
+    creation_datetime = (
+        datetime.datetime.utcnow() - datetime.timedelta(seconds=age))
+    return dict(
+        id='transaction',
+        state='READY',
+        result='result',
+        error=None,
+        creation_datetime=creation_datetime.strftime(_DATETIME_FORMAT),
+    )
+
+
+def _dead_pid():
+    """Return the process id of a terminated process"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _touch(file_path, content='', age=0):
+    """Write the file content and set its modification time age seconds
+    ago"""
+    with open(file_path, 'w') as file_handler:
+        file_handler.write(content)
+    mtime = time.time() - age
+    os.utime(file_path, (mtime, mtime))
+
+
+class FileStorageCollectTestCase(TestCase):
+    """Tests for the file storage garbage collection"""
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_dir)
+        self.storage = FileStorageHandler(root_dir=self.root_dir)
+
+    def _path(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def test_collect_values(self):
+        """The expired and the corrupted values are deleted"""
+        self.storage.set('valid', _value())
+        self.storage.set('expired', _value(age=100))
+        _touch(self._path('corrupted'), content='{not json')
+        deleted = self.storage.collect(
+            lambda value: storage_gc.is_value_expired(value, timeout=10))
+        self.assertEqual(deleted, dict(values=2, locks=0))
+        self.assertEqual(self.storage.keys(), ['valid'])
+
+    def test_collect_values_locked(self):
+        """The expired values whose lock is held are kept"""
+        self.storage.set('expired', _value(age=100))
+        with self.storage.lock('expired'):
+            deleted = self.storage.collect(
+                lambda value: storage_gc.is_value_expired(value, timeout=10))
+        self.assertEqual(deleted, dict(values=0, locks=0))
+        self.assertEqual(self.storage.keys(), ['expired'])
+
+    def test_collect_values_rewritten(self):
+        """The expired values rewritten before the lock is acquired are
+        kept"""
+        self.storage.set('expired', _value(age=100))
+
+        def rewrite_expired(value):
+            expired = storage_gc.is_value_expired(value, timeout=10)
+            if expired:
+                self.storage.set('expired', _value())
+            return expired
+
+        deleted = self.storage.collect(rewrite_expired)
+        self.assertEqual(deleted, dict(values=0, locks=0))
+        self.assertEqual(self.storage.keys(), ['expired'])
+
+    def test_collect_locks(self):
+        """Only the old not locked lock files of the missing values and the
+        old temporary files are removed"""
+        self.storage.set('valid', _value())
+        # the lock file of a stored value
+        _touch(self._path('valid.lock'), age=7200)
+        # a recent lock file, may be locked in a moment
+        _touch(self._path('recent.lock'))
+        # a lock file of a living process
+        _touch(self._path('living.lock'), content=str(os.getpid()), age=7200)
+        _touch(self._path('dead.lock'), content=str(_dead_pid()), age=7200)
+        _touch(self._path('.valid.abc.tmp'), age=7200)
+        _touch(self._path('.valid.def.tmp'))
+        self.assertEqual(self.storage.collect_locks(), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.root_dir)),
+            ['.valid.def.tmp', 'living.lock', 'recent.lock', 'valid',
+             'valid.lock']
+        )
+
+    def test_collect_deadline(self):
+        """Nothing is deleted once the deadline is passed"""
+        self.storage.set('expired', _value(age=100))
+        deleted = self.storage.collect(
+            lambda value: True, deadline=time.time() - 1)
+        self.assertEqual(deleted, dict(values=0, locks=0))
+        self.assertEqual(self.storage.keys(), ['expired'])
+
+
+class SQLiteStorageCollectTestCase(TestCase):
+    """Tests for the sqlite storage garbage collection"""
+
+    def test_collect(self):
+        """The values older than the share timeout are deleted"""
+        root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        storage = SQLiteStorageHandler(
+            database_path=os.path.join(root_dir, 'storage.sqlite'))
+        storage.set('valid', _value())
+        storage.set('expired', _value(age=100))
+        deleted = storage.collect(
+            lambda value: storage_gc.is_value_expired(value, timeout=10))
+        self.assertEqual(deleted, dict(values=1, locks=0))
+        self.assertEqual(storage.keys(), ['valid'])
+
+
+class CollectTestCase(TestCase):
+    """Tests for :func:`robottelo.decorators.func_shared.storage_gc.collect`
+    """
+
+    def test_collect(self):
+        """The storage and the function locks are collected"""
+        root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        storage = FileStorageHandler(root_dir=os.path.join(root_dir, 'shared'))
+        storage.set('expired', _value(age=200000))
+        lock_dir = os.path.join(root_dir, 'lock_functions', 'scope')
+        os.makedirs(lock_dir)
+        _touch(os.path.join(lock_dir, 'function.lock'), age=7200)
+        _touch(os.path.join(lock_dir, 'other.lock'), content=str(os.getpid()),
+               age=7200)
+        with mock.patch.object(func_locker, 'LOCK_DIR',
+                               os.path.join(root_dir, 'lock_functions')):
+            with mock.patch.object(func_locker, 'LOCK_STORAGE', 'file'):
+                deleted = storage_gc.collect(storage=storage, time_budget=60)
+        self.assertEqual(deleted['values'], 1)
+        self.assertEqual(deleted['function_locks'], 1)
+        self.assertEqual(os.listdir(lock_dir), ['other.lock'])
+
+    def test_collect_redis_function_locks(self):
+        """The redis function locks are collected in redis, not in the lock
+        files directory"""
+        with mock.patch.object(func_locker, 'LOCK_STORAGE', 'redis'):
+            with mock.patch.object(
+                    storage_gc.redis_storage,
+                    'RedisStorageHandler') as handler_class:
+                with mock.patch.object(
+                        func_locker,
+                        '_get_temp_lock_function_dir') as get_lock_dir:
+                    handler_class.return_value.collect_locks.return_value = 2
+                    self.assertEqual(
+                        storage_gc.collect_function_locks(deadline=10), 2)
+        handler_class.return_value.collect_locks.assert_called_once_with(
+            deadline=10)
+        get_lock_dir.assert_not_called()
@@ -0,0 +1,159 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.warmup`."""
+import sys
+import threading
+
+import six
+from fauxfactory import gen_string
+from unittest2 import TestCase
+
+from robottelo.decorators.func_shared import warmup
+from robottelo.decorators.func_shared.shared import (
+    _set_configured,
+    enable_shared_function,
+    set_default_scope,
+    shared,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+_set_configured(True)
+
+_calls = []
+
+
+class FakeItem(object):
+    """A collected pytest item"""
+
+    def __init__(self, module, cls=None):
+        self.module = module
+        self.cls = cls
+
+
+@shared(warmup=True)
+def module_warmup_function():
+    """a warmup function at module level"""
+    _calls.append('module')
+    return 'module'
+
+
+@shared
+def not_warmup_function():
+    """a shared function without warmup"""
+    return 'not_warmup'
+
+
+class WarmupTestCase(TestCase):
+    """A test class with a warmup class method"""
+
+    def setUp(self):
+        polling_patcher = mock.patch.object(
+            warmup, 'install_thread_safe_polling')
+        self.install_thread_safe_polling = polling_patcher.start()
+        self.addCleanup(polling_patcher.stop)
+
+    @classmethod
+    @shared(warmup=True)
+    def class_warmup_function(cls):
+        _calls.append(cls.__name__)
+        return cls.__name__
+
+    def test_used_warmup_functions(self):
+        """Only the warmup functions of the collected tests are returned"""
+        items = [
+            FakeItem(sys.modules[__name__], cls=WarmupTestCase),
+            FakeItem(sys.modules[__name__]),
+        ]
+        functions = warmup.get_used_warmup_functions(items)
+        self.assertEqual(
+            sorted(functions),
+            [
+                'tests.robottelo.test_shared_warmup.WarmupTestCase'
+                '.class_warmup_function',
+                'tests.robottelo.test_shared_warmup.module_warmup_function',
+            ]
+        )
+        self.assertEqual(
+            sorted(function() for function in functions.values()),
+            ['WarmupTestCase', 'module']
+        )
+
+    def test_no_collected_warmup_functions(self):
+        """The warmup functions of not collected tests are not returned"""
+        items = [FakeItem(threading)]
+        self.assertEqual(warmup.get_used_warmup_functions(items), {})
+
+    def test_warmup_is_concurrent(self):
+        """The warmup functions are called at the same time"""
+        barrier = threading.Event()
+        started = []
+
+        def function():
+            started.append(1)
+            if len(started) == 2:
+                barrier.set()
+            # would time out if the functions were called one after another
+            if not barrier.wait(5):
+                raise AssertionError('not concurrent')
+
+        shared_warmup = warmup.SharedWarmup(
+            {'first': function, 'second': function, 'failed': lambda: 1 / 0},
+            max_workers=2
+        )
+        shared_warmup.start()
+        shared_warmup.wait()
+        report = {
+            name: status for name, _, status in shared_warmup.get_report()}
+        self.assertEqual(
+            report, {'first': 'ready', 'second': 'ready', 'failed': 'failed'})
+        # the tasks waited in the warmup threads do not interrupt the tests
+        self.install_thread_safe_polling.assert_called_once_with()
+
+    def test_wait_for_items(self):
+        """The tests wait the warmup of the functions they use"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def function():
+            started.set()
+            release.wait(5)
+
+        name = warmup._get_name(module_warmup_function)
+        shared_warmup = warmup.SharedWarmup({name: function})
+        shared_warmup.start()
+        started.wait(5)
+        waiter = threading.Thread(
+            target=shared_warmup.wait_for_items,
+            args=([FakeItem(sys.modules[__name__])],))
+        waiter.start()
+        waiter.join(0.2)
+        self.assertTrue(waiter.is_alive())
+        release.set()
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(shared_warmup.get_report()[0][2], 'ready')
+
+    def test_start_warmup(self):
+        """The warmup calls the shared functions only when enabled"""
+        items = [FakeItem(sys.modules[__name__])]
+        del _calls[:]
+        enable_shared_function(False)
+        self.assertIsNone(warmup.start_warmup(items))
+        set_default_scope(gen_string('alpha', 10))
+        self.addCleanup(set_default_scope, None)
+        enable_shared_function(True)
+        self.addCleanup(enable_shared_function, False)
+        # only one xdist worker runs the warmup
+        self.assertIsNone(warmup.start_warmup(items, worker_id='gw1'))
+        shared_warmup = warmup.start_warmup(items, worker_id='gw0')
+        shared_warmup.wait()
+        # the second call returns the shared result
+        module_warmup_function()
+        self.assertEqual(_calls, ['module'])
+        messages = []
+        warmup.log_report(shared_warmup, log=messages.append)
+        self.assertEqual(len(messages), 1)
+        self.assertIn('module_warmup_function: ready', messages[0])
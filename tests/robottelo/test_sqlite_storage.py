@@ -0,0 +1,193 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.decorators.func_shared.sqlite_storage`."""
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from unittest2 import TestCase
+
+from robottelo.decorators import func_locker
+from robottelo.decorators.func_shared import sqlite_storage
+from robottelo.decorators.func_shared.codec import Codec
+from robottelo.decorators.func_shared.sqlite_storage import (
+    SQLiteLockError,
+    SQLiteStorageHandler,
+)
+
+POOL_SIZE = 4
+
+
+def _locked_increment(database_path):
+    """Increment a stored counter, the read and the write must be atomic"""
+    storage = SQLiteStorageHandler(database_path=database_path)
+    with storage.lock('counter'):
+        value = storage.get('counter') or 0
+        time.sleep(0.01)
+        storage.set('counter', value + 1)
+
+
+class SQLiteStorageTestCase(TestCase):
+    """Tests for :class:`SQLiteStorageHandler`"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.database_path = os.path.join(self.tmp_dir, 'storage.sqlite')
+        self.storage = SQLiteStorageHandler(
+            database_path=self.database_path, lock_timeout=1)
+
+    def test_get_set(self):
+        """The values are stored and replaced"""
+        self.assertIsNone(self.storage.get('key'))
+        self.storage.set('key', {'index': 1})
+        self.storage.set('key', {'index': 2})
+        self.assertEqual(self.storage.get('key'), {'index': 2})
+
+    def test_expired_value(self):
+        """The expired values are not returned and are cleaned"""
+        storage = SQLiteStorageHandler(
+            database_path=self.database_path, share_timeout=-1)
+        storage.set('key', {'index': 1})
+        self.assertIsNone(storage.get('key'))
+        self.assertEqual(storage.cleanup(), dict(values=1, locks=0))
+
+    def test_lock_is_exclusive(self):
+        """Only one process at a time holds the lock"""
+        pool = multiprocessing.Pool(POOL_SIZE)
+        try:
+            pool.map(_locked_increment, [self.database_path] * 10)
+        finally:
+            pool.terminate()
+            pool.join()
+        self.assertEqual(self.storage.get('counter'), 10)
+
+    def test_lock_timeout(self):
+        """SQLiteLockError is raised when the lock is held"""
+        with self.storage.lock('key'):
+            with self.assertRaises(SQLiteLockError):
+                with sqlite_storage.lock(
+                        'key.lock', timeout=0.2,
+                        database_path=self.database_path):
+                    pass
+        # released
+        with self.storage.lock('key'):
+            pass
+
+    def test_lock_lease_renewed(self):
+        """The lock is held longer than its lease, renewed until released"""
+        with sqlite_storage.lock(
+                'key.lock', lease=0.3, database_path=self.database_path):
+            time.sleep(1)
+            self.assertIsNone(sqlite_storage.claim_lock(
+                'key.lock', database_path=self.database_path))
+        # released
+        self.assertEqual(
+            sqlite_storage.cleanup(database_path=self.database_path),
+            dict(values=0, locks=0)
+        )
+
+    def test_lock_lease_expired(self):
+        """A lock not renewed is reclaimed after its lease"""
+        owner = sqlite_storage.claim_lock(
+            'key.lock', lease=0.1, database_path=self.database_path)
+        self.assertIsNotNone(owner)
+        time.sleep(0.2)
+        self.assertIsNotNone(sqlite_storage.claim_lock(
+            'key.lock', database_path=self.database_path))
+        # reclaimed by an other owner
+        self.assertFalse(sqlite_storage.renew_lock(
+            'key.lock', owner, 1, database_path=self.database_path))
+
+    def test_dead_process_lock(self):
+        """The lock of a dead process is reclaimed"""
+        process = multiprocessing.Process(
+            target=sqlite_storage.claim_lock,
+            args=('key.lock',),
+            kwargs={'database_path': self.database_path}
+        )
+        process.start()
+        process.join()
+        self.assertEqual(
+            sqlite_storage.get_lock_pid(
+                'key.lock', database_path=self.database_path),
+            process.pid
+        )
+        self.assertEqual(
+            sqlite_storage.cleanup(database_path=self.database_path),
+            dict(values=0, locks=1)
+        )
+        process = multiprocessing.Process(
+            target=sqlite_storage.claim_lock,
+            args=('key.lock',),
+            kwargs={'database_path': self.database_path}
+        )
+        process.start()
+        process.join()
+        with self.storage.lock('key'):
+            pass
+
+    def test_migrate_file_storage(self):
+        """The file storage values are imported"""
+        root_dir = os.path.join(self.tmp_dir, 'shared_functions')
+        os.mkdir(root_dir)
+        with open(os.path.join(root_dir, 'scope.key'), 'w') as handler:
+            json.dump({'index': 1}, handler)
+        # a value tagged by its codec
+        with open(os.path.join(root_dir, 'scope.zlib'), 'wb') as handler:
+            handler.write(
+                Codec(compression='zlib', threshold=0).encode({'index': 2}))
+        with open(os.path.join(root_dir, 'scope.other'), 'wb') as handler:
+            handler.write(b'\x00not a value')
+        open(os.path.join(root_dir, 'scope.key.lock'), 'w').close()
+        count = sqlite_storage.migrate_file_storage(
+            root_dir, database_path=self.database_path, remove=True)
+        self.assertEqual(count, 2)
+        self.assertEqual(self.storage.get('scope.key'), {'index': 1})
+        self.assertEqual(self.storage.get('scope.zlib'), {'index': 2})
+        # the values that are not shared function values are kept
+        self.assertEqual(os.listdir(root_dir), ['scope.other'])
+
+
+class SQLiteFunctionLockerTestCase(TestCase):
+    """Tests for the function locker using the sqlite locks"""
+
+    def setUp(self):
+        func_locker.set_lock_storage('sqlite')
+        self.addCleanup(func_locker.set_lock_storage, None)
+
+    def test_locking_function(self):
+        """The function lock is a sqlite lock"""
+
+        @func_locker.lock_function(scope='sqlite_func_locker')
+        def locked():
+            function_name = func_locker._get_function_name(
+                locked, class_name=locked.__class_name__)
+            return sqlite_storage.get_lock_pid(
+                'sqlite_func_locker/{0}.lock'.format(function_name))
+
+        self.assertEqual(locked(), os.getpid())
+        with func_locker.locking_function(
+                locked, scope='sqlite_func_locker'):
+            with self.assertRaises(func_locker.FunctionLockerError):
+                locked()
+
+    def test_semaphore_function(self):
+        """The semaphore slots are sqlite locks"""
+
+        @func_locker.semaphore_function(limit=2, scope='sqlite_func_locker')
+        def limited():
+            return 'called'
+
+        with func_locker.semaphore_locking_function(
+                limited, scope='sqlite_func_locker'):
+            self.assertEqual(limited(), 'called')
+            with func_locker.semaphore_locking_function(
+                    limited, scope='sqlite_func_locker'):
+                with self.assertRaises(func_locker.FunctionLockerError):
+                    with func_locker.semaphore_locking_function(
+                            limited, scope='sqlite_func_locker',
+                            timeout=0.2):
+                        pass
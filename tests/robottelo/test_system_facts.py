@@ -0,0 +1,67 @@
+# coding: utf-8
+"""Tests for :mod:`robottelo.system_facts`."""
+import json
+import uuid
+
+from unittest2 import TestCase, skipIf
+
+from robottelo import system_facts
+from robottelo.system_facts import (
+    SYSTEM_FACTS,
+    generate_system_facts,
+    iter_system_facts,
+)
+
+
+class IterSystemFactsTestCase(TestCase):
+    """Tests for :func:`robottelo.system_facts.iter_system_facts`"""
+
+    def _check_facts(self, facts):
+        self.assertEqual(set(facts), set(SYSTEM_FACTS))
+        self.assertEqual(
+            uuid.UUID(facts['dmi.system.uuid']).version, 4)
+        self.assertEqual(facts['virt.uuid'], facts['dmi.system.uuid'])
+        self.assertEqual(
+            int(facts['net.interface.eth1.hwaddr'][:2], 16) % 2, 0)
+        self.assertEqual(
+            facts['network.ipaddr'], facts['net.interface.eth1.ipaddr'])
+        self.assertEqual(facts['uname.nodename'], facts['network.hostname'])
+
+    def test_batches(self):
+        """The facts are yielded in batches, the same for a seed"""
+        batches = list(iter_system_facts(25, batch_size=10, seed=42))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        for facts in batches[0]:
+            self._check_facts(facts)
+        self.assertEqual(
+            list(iter_system_facts(25, batch_size=10, seed=42)), batches)
+        self.assertEqual(
+            sorted(generate_system_facts()), sorted(batches[0][0]))
+
+    def test_overlay(self):
+        """The overlay facts share the template"""
+        facts = next(iter_system_facts(
+            3, names=[u'a.example.net', u'b.example.net', u'c.example.net'],
+            seed=42, overlay=True))
+        self.assertEqual(
+            [dict(system)
+             for system in next(iter_system_facts(
+                 3, names=[u'a.example.net', u'b.example.net',
+                           u'c.example.net'], seed=42))],
+            [dict(system) for system in facts]
+        )
+        self.assertIs(facts[0].template, SYSTEM_FACTS)
+        self.assertEqual(len(facts[0]), len(SYSTEM_FACTS))
+        self.assertEqual(facts[1]['network.hostname'], u'b.example.net')
+
+    def test_overlay_json(self):
+        """The overlay facts are serialized to JSON as plain dicts"""
+        for facts in next(iter_system_facts(3, seed=42, overlay=True)):
+            self.assertEqual(
+                json.loads(json.dumps(facts.to_json_dict())), dict(facts))
+
+    @skipIf(system_facts.numpy is None, 'numpy is not installed')
+    def test_vectorized(self):
+        """The vectorized generation yields valid facts"""
+        for facts in next(iter_system_facts(10, seed=42, vectorized=True)):
+            self._check_facts(facts)